@@ -0,0 +1,298 @@
+"""
+Compiled, cached loading of the YAML agent tree.
+
+The YAML configs are parsed and validated once into a flat JSON cache
+keyed by a content hash of every agent YAML file. Later starts load the
+cache when nothing changed and build the LlmAgent objects directly.
+reload_changed() re-parses only the files whose hash changed and builds a
+new agent tree for the server to swap in, without restarting it.
+
+Build step (e.g. in the Dockerfile):
+    python -m agents.agent_cache
+"""
+
+import os
+import json
+import hashlib
+import logging
+import importlib
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+import yaml
+
+from agents.local_llm import LOCAL_ENABLED
+
+logger = logging.getLogger(__name__)
+
+AGENTS_DIR = Path(__file__).parent
+ROOT_CONFIG = AGENTS_DIR / "root_agent.yaml"
+CACHE_PATH = Path(os.getenv("PURRPUR_AGENT_CACHE", str(AGENTS_DIR / ".agent_tree_cache.json")))
+CACHE_VERSION = 2
+
+# Keys we can build natively; configs using anything else go through from_config
+NATIVE_KEYS = {"name", "model", "agent_class", "instruction", "description", "tools", "sub_agents"}
+
+# Live loader state: file hashes and compiled nodes the current tree was built from
+_state: Dict[str, Any] = {"hashes": {}, "files": {}, "root": None}
+_tool_cache: Dict[str, Any] = {}
+
+
+class AgentConfigError(ValueError):
+    """Raised when an agent YAML config is invalid."""
+
+
+def _relative(path: Path) -> str:
+    return path.resolve().relative_to(AGENTS_DIR.resolve()).as_posix()
+
+
+def hash_configs(base_dir: Path = AGENTS_DIR) -> Dict[str, str]:
+    """Returns relative path -> sha256 of every YAML file under the agents dir."""
+    return {
+        _relative(path): hashlib.sha256(path.read_bytes()).hexdigest()
+        for path in sorted(base_dir.rglob("*.yaml"))
+    }
+
+
+def fingerprint(hashes: Dict[str, str]) -> str:
+    digest = hashlib.sha256(str(CACHE_VERSION).encode())
+    for path, file_hash in sorted(hashes.items()):
+        digest.update(f"{path}:{file_hash}\n".encode())
+    return digest.hexdigest()
+
+
+def compile_config(rel_path: str) -> Dict[str, Any]:
+    """
+    Parses and validates one agent YAML file into a node.
+
+    Sub-agents are kept as relative config paths so nodes can be cached and
+    recompiled independently.
+    """
+    path = AGENTS_DIR / rel_path
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = yaml.safe_load(f)
+    except (OSError, yaml.YAMLError) as e:
+        raise AgentConfigError(f"{rel_path}: {e}")
+
+    if not isinstance(data, dict) or not isinstance(data.get("name"), str):
+        raise AgentConfigError(f"{rel_path}: expected a mapping with a 'name'")
+
+    agent_class = data.get("agent_class", "LlmAgent")
+    if agent_class == "LlmAgent" and not isinstance(data.get("instruction", ""), str):
+        raise AgentConfigError(f"{rel_path}: 'instruction' must be a string")
+
+    # Anything the native builder can't reproduce exactly (tool args, sub-agents
+    # given as code references) leaves the node to from_config
+    native = agent_class == "LlmAgent" and set(data) <= NATIVE_KEYS
+
+    tools = []
+    for tool in data.get("tools") or []:
+        if not isinstance(tool, dict) or not isinstance(tool.get("name"), str):
+            raise AgentConfigError(f"{rel_path}: every tool needs a 'name'")
+        if tool.get("args"):
+            native = False
+        tools.append(tool["name"])
+
+    sub_agents = []
+    entries = data.get("sub_agents") or []
+    if not all(isinstance(sub, dict) and "config_path" in sub for sub in entries):
+        # e.g. `code:` references: from_config builds this whole subtree
+        native = False
+        entries = []
+    for sub in entries:
+        sub_path = (path.parent / sub["config_path"])
+        if not sub_path.exists():
+            raise AgentConfigError(f"{rel_path}: sub_agent config not found: {sub['config_path']}")
+        sub_agents.append(_relative(sub_path))
+
+    return {
+        "config_path": rel_path,
+        "name": data["name"],
+        "agent_class": agent_class,
+        "model": data.get("model"),
+        "instruction": data.get("instruction", ""),
+        "description": data.get("description", ""),
+        "tools": tools,
+        "sub_agents": sub_agents,
+        "native": native,
+    }
+
+
+def compile_tree(
+    root: str,
+    previous: Optional[Dict[str, Dict[str, Any]]] = None,
+    changed: Optional[set] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Compiles every config reachable from `root` into a flat path -> node map.
+
+    Nodes from `previous` are reused unless their path is in `changed`.
+    """
+    files: Dict[str, Dict[str, Any]] = {}
+
+    def visit(rel_path: str, stack: tuple) -> None:
+        if rel_path in stack:
+            raise AgentConfigError(f"Cycle in sub_agents: {' -> '.join(stack + (rel_path,))}")
+        if rel_path in files:
+            return
+        if previous and rel_path in previous and (changed is None or rel_path not in changed):
+            node = previous[rel_path]
+        else:
+            node = compile_config(rel_path)
+        files[rel_path] = node
+        for child in node["sub_agents"]:
+            visit(child, stack + (rel_path,))
+
+    visit(root, ())
+    return files
+
+
+def _read_cache(path: Path = CACHE_PATH) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_cache(cache: Dict[str, Any], path: Path = CACHE_PATH) -> None:
+    try:
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(cache, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"⚠️ No se pudo escribir el cache de agentes {path}: {e}")
+
+
+def load_compiled(root_config: Path = ROOT_CONFIG) -> Dict[str, Any]:
+    """
+    Returns {"fingerprint", "hashes", "root", "files"} from the cache, or
+    compiles and caches it when any YAML file changed.
+    """
+    hashes = hash_configs()
+    current = fingerprint(hashes)
+    root = _relative(root_config)
+
+    cache = _read_cache()
+    if cache and cache.get("fingerprint") == current and cache.get("root") == root:
+        logger.debug("Agent tree loaded from cache")
+        return cache
+
+    cache = {
+        "fingerprint": current,
+        "hashes": hashes,
+        "root": root,
+        "files": compile_tree(root),
+    }
+    _write_cache(cache)
+    logger.info(f"📦 Agent tree compilado ({len(cache['files'])} configs) -> {CACHE_PATH}")
+    return cache
+
+
+def _resolve_tool(name: str):
+    """Resolves a YAML tool reference (module.path.attribute) to the tool object."""
+    tool = _tool_cache.get(name)
+    if tool is None:
+        if "." not in name:
+            # Built-in ADK tool (e.g. google_search)
+            tool = getattr(importlib.import_module("google.adk.tools"), name)
+        else:
+            module_name, attr = name.rsplit(".", 1)
+            tool = getattr(importlib.import_module(module_name), attr)
+        _tool_cache[name] = tool
+    return tool
+
+
+def _model(name: str):
+    """The configured model name, or its local stand-in when PURRPUR_LLM_PROVIDER=local."""
+    if not LOCAL_ENABLED:
+        return name
+    from agents.local_adk_model import local_model
+    return local_model(name)
+
+
+def build_agent(rel_path: str, files: Dict[str, Dict[str, Any]]):
+    """Builds the agent (and its sub-agents) for a compiled node."""
+    node = files[rel_path]
+    if not node["native"]:
+        from google.adk.agents.config_agent_utils import from_config
+        agent = from_config(str(AGENTS_DIR / rel_path))
+        if LOCAL_ENABLED:
+            _use_local_models(agent)
+        return agent
+
+    from google.adk.agents import LlmAgent
+    kwargs = {
+        "name": node["name"],
+        "instruction": node["instruction"],
+        "description": node["description"],
+        "tools": [_resolve_tool(name) for name in node["tools"]],
+        "sub_agents": [build_agent(child, files) for child in node["sub_agents"]],
+    }
+    if node["model"]:
+        kwargs["model"] = _model(node["model"])
+    return LlmAgent(**kwargs)
+
+
+def _use_local_models(agent) -> None:
+    if isinstance(getattr(agent, "model", None), str) and agent.model:
+        agent.model = _model(agent.model)
+    for child in getattr(agent, "sub_agents", []):
+        _use_local_models(child)
+
+
+def load_root_agent(root_config: Path = ROOT_CONFIG):
+    """Loads the agent tree (from the compiled cache when possible) and returns the root agent."""
+    cache = load_compiled(root_config)
+    _state.update(hashes=cache["hashes"], files=cache["files"], root=cache["root"])
+    return build_agent(cache["root"], cache["files"])
+
+
+def reload_changed() -> Tuple[List[str], Optional[Any]]:
+    """
+    Hot-reloads the agent YAML files that changed since the tree was loaded.
+
+    Changed configs are re-parsed (unchanged files are not) and a new agent
+    tree is built on the side; the live tree is never modified, so runs in
+    progress finish on the agents they started with. The caller swaps the
+    new root in (together with the runner reset, see runtime.reset_runners).
+
+    Returns:
+        (relative paths of the reloaded config files, new root agent or None
+        if nothing changed).
+    """
+    if _state["root"] is None:
+        raise RuntimeError("Agent tree was not loaded with load_root_agent()")
+
+    hashes = hash_configs()
+    changed = {path for path, file_hash in hashes.items() if _state["hashes"].get(path) != file_hash}
+    if not changed:
+        _state["hashes"] = hashes
+        return [], None
+
+    files = compile_tree(_state["root"], _state["files"], changed)
+    reloaded = sorted(path for path in changed if path in files)
+    if not reloaded:
+        # Only files outside the tree changed (e.g. render.yaml)
+        _state["hashes"] = hashes
+        return [], None
+
+    root_agent = build_agent(_state["root"], files)
+    _state.update(hashes=hashes, files=files)
+    _write_cache({
+        "fingerprint": fingerprint(hashes),
+        "hashes": hashes,
+        "root": _state["root"],
+        "files": files,
+    })
+
+    logger.info(f"♻️ Agentes recargados: {', '.join(reloaded)}")
+    return reloaded, root_agent
+
+
+if __name__ == "__main__":
+    # Build step: validate every config and write the compiled cache
+    compiled = load_compiled()
+    print(f"✅ {len(compiled['files'])} agent configs compiled ({compiled['fingerprint'][:12]}) -> {CACHE_PATH}")
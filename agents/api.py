@@ -5,10 +5,13 @@ Provides REST endpoints for interacting with the multi-agent system
 import os
 import sys
 import asyncio
-from fastapi import FastAPI, HTTPException
+import base64
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, PlainTextResponse
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
+from contextlib import asynccontextmanager
 import json
 
 # Add current directory to path to import agents
@@ -23,10 +26,89 @@ except ImportError as e:
     ADK_AVAILABLE = False
     root_agent = None
 
+from agents.runtime import stream_agent_events, run_agent, get_limiter, reset_runners
+from agents.registry import AgentIndex, scan_agent_configs
+from agents.jobs import JobQueue, QueueFullError, WebhookNotAllowedError
+from agents.metrics import track_request, render_metrics
+from agents import router
+from agents.routing import routing_status
+from agents.images import PreparedImage, ImageError, prepare_image
+
+# Name -> agent index over every YAML config, reusing the loaded root tree
+agent_index = AgentIndex(root_agent)
+
+async def _resolve_agent(agent_name: Optional[str]):
+    """Agent a request runs on: the named agent from the index, else the root agent (None if unknown)"""
+    if not agent_name:
+        return root_agent
+    return await agent_index.get(agent_name)
+
+async def _execute_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Runs a queued job payload (see JobRequest) and returns its result"""
+    import time
+    agent = await _resolve_agent(payload.get("agent_name"))
+    if agent is None:
+        raise ValueError(f"Agent '{payload['agent_name']}' not found")
+    with track_request("jobs"):
+        start_time = time.time()
+        result = await run_agent(agent, payload["prompt"], payload.get("parameters"))
+        result["execution_time"] = time.time() - start_time
+    return result
+
+job_queue = JobQueue(_execute_job)
+
+# Poll interval (seconds) for hot-reloading changed agent YAML files; 0 disables
+AGENT_HOT_RELOAD = float(os.getenv("PURRPUR_AGENT_HOT_RELOAD", "0"))
+
+# Serializes the watcher and /agents/reload (reload_changed keeps module state)
+_reload_lock = asyncio.Lock()
+
+def _build_reloaded_agents() -> tuple:
+    """Hashes, re-parses and builds changed agent YAML files (blocking: runs in a worker thread)"""
+    from agents.agent_cache import reload_changed
+    reloaded, new_root = reload_changed()
+    configs = scan_agent_configs(agent_index.base_dir) if new_root is not None else None
+    return reloaded, new_root, configs
+
+async def _reload_agents() -> list:
+    """Re-parses changed agent YAML files off the event loop and swaps in the freshly built tree"""
+    async with _reload_lock:
+        reloaded, new_root, configs = await asyncio.to_thread(_build_reloaded_agents)
+        if new_root is not None:
+            def swap():
+                # Runs in progress keep the old tree; new requests see the new one
+                global root_agent
+                root_agent = new_root
+                agent_index.refresh(new_root, configs)
+            reset_runners(swap)
+    return reloaded
+
+async def _watch_agent_configs(interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await _reload_agents()
+        except Exception as e:
+            print(f"Warning: agent hot reload failed: {e}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await router.open_clients()
+    await job_queue.start()
+    watcher = None
+    if AGENT_HOT_RELOAD > 0 and root_agent is not None:
+        watcher = asyncio.create_task(_watch_agent_configs(AGENT_HOT_RELOAD))
+    yield
+    if watcher is not None:
+        watcher.cancel()
+    await job_queue.stop()
+    await router.close_clients()
+
 app = FastAPI(
     title="Purrpur ADK Agent API",
     description="API for interacting with the Purrpur multi-agent system powered by Google ADK",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -43,6 +125,7 @@ class AgentRequest(BaseModel):
     prompt: str
     agent_name: Optional[str] = None  # Specific agent to use (optional, defaults to root)
     parameters: Optional[Dict[str, Any]] = None
+    include_trace: bool = False  # Return the OTLP/JSON span tree in metadata.trace
 
 class AgentResponse(BaseModel):
     response: str
@@ -61,6 +144,24 @@ class AgentListResponse(BaseModel):
     agents: list
     total: int
 
+class BatchRequest(BaseModel):
+    requests: List[AgentRequest]  # At most PURRPUR_BATCH_MAX_ITEMS
+    max_parallel: Optional[int] = None  # Capped by PURRPUR_BATCH_MAX_PARALLEL
+
+class JobRequest(AgentRequest):
+    priority: int = 5  # Lower runs first
+    webhook_url: Optional[str] = None  # POSTed the final job record on completion (host must be in PURRPUR_JOB_WEBHOOK_HOSTS)
+
+class JobResponse(BaseModel):
+    job_id: str
+    status: str
+    created_at: Optional[float] = None
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    queue_position: Optional[int] = None  # Queued jobs that run before this one
+
 # Endpoints
 @app.get("/", response_model=HealthResponse)
 async def health_check():
@@ -73,77 +174,143 @@ async def health_check():
         "root_agent_name": root_agent.name if root_agent else None
     }
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics: request, per-agent LLM call and per-tool latency, tokens, errors"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+@app.get("/router/status")
+async def router_status():
+    """Model router: rolling p50/p95 latency and error rate per model plus recent decisions"""
+    return routing_status()
+
+@app.get("/callbacks/status")
+async def callbacks_status():
+    """Agent callbacks: per-callback/per-agent timing, budget overruns, load shedding and injected prompt tokens"""
+    from agents.callbacks.profiler import callback_stats
+    from agents.callbacks.injection import injection_stats
+    return {**callback_stats(), "injected_tokens": injection_stats()}
+
 @app.get("/agents", response_model=AgentListResponse)
 async def list_agents():
-    """List available agents in the system"""
-    # This is a simplified list - in a real implementation you'd scan YAML files
-    agents = [
-        {"name": "purrpurragent", "role": "CEO & Orchestrator", "type": "root"},
-        {"name": "brand_manager_agent", "role": "Brand Creation", "type": "main"},
-        {"name": "backend_cloud_agent", "role": "Backend & Cloud", "type": "main"},
-        {"name": "cto_architect_agent", "role": "Technical Architecture", "type": "main"},
-        {"name": "frontend_web_agent", "role": "Web Development", "type": "main"},
-        {"name": "mobile_dev_agent", "role": "Mobile Development", "type": "main"},
-        {"name": "qa_testing_agent", "role": "Quality Assurance", "type": "main"},
-        {"name": "cmo_agent", "role": "Marketing Strategy", "type": "main"},
-        {"name": "social_media_manager_agent", "role": "Social Media", "type": "main"},
-        {"name": "traffic_manager_agent", "role": "Paid Advertising", "type": "main"},
-        {"name": "copywriter_storyteller_agent", "role": "Content Creation", "type": "main"},
-        {"name": "data_seo_agent", "role": "Analytics & SEO", "type": "main"},
-        {"name": "graphic_multimedia_agent", "role": "Visual Assets", "type": "main"},
-        {"name": "translator_simplifier_agent", "role": "Translation", "type": "main"},
-        {"name": "ui_ux_designer_agent", "role": "UI/UX Design", "type": "main"},
-        {"name": "cfo_agent", "role": "Financial Planning", "type": "main"},
-        {"name": "platdev_manager_agent", "role": "Platform Development", "type": "main"}
-    ]
+    """List available agents in the system (generated from the YAML agent index)"""
+    agents = agent_index.list()
     return {
         "agents": agents,
         "total": len(agents)
     }
 
+@app.post("/agents/reload")
+async def reload_agents():
+    """Hot-reload agent YAML files that changed since startup (no server restart)"""
+    if not ADK_AVAILABLE or root_agent is None:
+        raise HTTPException(503, "ADK agent system not available.")
+    try:
+        reloaded = await _reload_agents()
+    except Exception as e:
+        raise HTTPException(400, f"Agent reload failed: {str(e)}")
+    return {"reloaded": reloaded, "total": len(reloaded)}
+
+def _sse(event_type: str, data: Dict[str, Any]) -> str:
+    """Formats a single Server-Sent Events frame"""
+    return f"event: {event_type}\ndata: {json.dumps(data, default=str)}\n\n"
+
+def _wants_event_stream(http_request: Optional[Request]) -> bool:
+    if http_request is None:
+        return False
+    return "text/event-stream" in http_request.headers.get("accept", "")
+
+async def _agent_event_stream(agent, request: AgentRequest, endpoint: str):
+    """Runs the agent and yields SSE frames for every intermediate event"""
+    import time
+    start_time = time.time()
+    yield _sse("start", {"agent": agent.name})
+    try:
+        async with get_limiter(endpoint):
+            with track_request(endpoint):
+                async for event in stream_agent_events(agent, request.prompt, request.parameters):
+                    event_type = event.pop("type")
+                    if event_type == "final":
+                        event["execution_time"] = time.time() - start_time
+                    yield _sse(event_type, event)
+    except Exception as e:
+        yield _sse("error", {"detail": f"Agent execution failed: {str(e)}"})
+    yield _sse("done", {"execution_time": time.time() - start_time})
+
+def _streaming_response(agent, request: AgentRequest, endpoint: str) -> StreamingResponse:
+    return StreamingResponse(
+        _agent_event_stream(agent, request, endpoint),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/generate/stream")
+async def generate_stream(request: AgentRequest):
+    """
+    Streaming variant of /generate (Server-Sent Events)
+    
+    Emits `start`, `delta` (token chunks), `delegation` (agent hops),
+    `tool_start`/`tool_end`, `final` and `done` events as they happen.
+    """
+    if not ADK_AVAILABLE or root_agent is None:
+        raise HTTPException(503, "ADK agent system not available. Please check installation.")
+    return _streaming_response(await _request_agent(request), request, "generate_stream")
+
+async def _request_agent(request: AgentRequest):
+    """Resolves request.agent_name for the /generate endpoints (404 if unknown)"""
+    agent = await _resolve_agent(request.agent_name)
+    if agent is None:
+        raise HTTPException(404, f"Agent '{request.agent_name}' not found. See /agents for available agents.")
+    return agent
+
+async def _run_limited(endpoint: str, agent, prompt: str, parameters: Optional[Dict[str, Any]],
+                       include_trace: bool = False) -> Dict[str, Any]:
+    """Runs an agent natively on the event loop under the endpoint's concurrency limit"""
+    import time
+    async with get_limiter(endpoint):
+        with track_request(endpoint):
+            start_time = time.time()
+            result = await run_agent(agent, prompt, parameters, include_trace=include_trace)
+            result["execution_time"] = time.time() - start_time
+    return result
+
+def _run_metadata(result: Dict[str, Any]) -> Dict[str, Any]:
+    metadata = {
+        "delegation_chain": result["delegation_chain"],
+        "tools_used": result["tools_used"],
+        "trace_id": result["trace_id"]
+    }
+    if "trace" in result:
+        metadata["trace"] = result["trace"]
+    return metadata
+
 @app.post("/generate", response_model=AgentResponse)
-async def generate_with_agent(request: AgentRequest):
+async def generate_with_agent(request: AgentRequest, http_request: Request = None):
     """
     Generate response using the Purrpur multi-agent system
     
     The root agent (CEO) will automatically delegate to the appropriate
-    division director based on the request content.
+    division director based on the request content; set `agent_name` to
+    run a specific agent instead.
+    Send `Accept: text/event-stream` to receive the /generate/stream output instead.
     """
     if not ADK_AVAILABLE or root_agent is None:
         raise HTTPException(503, "ADK agent system not available. Please check installation.")
     
+    agent = await _request_agent(request)
+    if _wants_event_stream(http_request):
+        return _streaming_response(agent, request, "generate_stream")
+    
     try:
-        import time
-        start_time = time.time()
-        
-        # Prepare parameters for the agent
-        agent_params = request.parameters or {}
-        
-        # Run the agent (async)
-        # Note: ADK agents might have async methods, but we'll use run for simplicity
-        # In production, you'd use proper async handling
-        response = await asyncio.to_thread(
-            root_agent.run,
-            request.prompt,
-            **agent_params
+        result = await _run_limited(
+            "generate", agent, request.prompt, request.parameters, request.include_trace
         )
         
-        execution_time = time.time() - start_time
-        
-        # Format response
-        if hasattr(response, 'content'):
-            response_text = str(response.content)
-        else:
-            response_text = str(response)
-        
         return {
-            "response": response_text,
-            "agent_used": root_agent.name,
-            "execution_time": execution_time,
-            "metadata": {
-                "delegation_chain": getattr(response, 'delegation_chain', []),
-                "tools_used": getattr(response, 'tools_used', [])
-            }
+            "response": result["response"],
+            "agent_used": agent.name,
+            "execution_time": result["execution_time"],
+            "metadata": _run_metadata(result)
         }
         
     except Exception as e:
@@ -157,78 +324,295 @@ async def specific_agent(agent_name: str, request: AgentRequest):
     if not ADK_AVAILABLE:
         raise HTTPException(503, "ADK agent system not available.")
     
-    # In a full implementation, you'd load the specific agent from config
-    # For now, we'll use the root agent and mention the requested agent in metadata
+    if agent_name not in agent_index:
+        raise HTTPException(404, f"Agent '{agent_name}' not found. See /agents for available agents.")
+    
     try:
-        import time
-        start_time = time.time()
-        
-        # Add agent name to prompt for context
-        enhanced_prompt = f"[Requested agent: {agent_name}]\n{request.prompt}"
-        
-        response = await asyncio.to_thread(
-            root_agent.run,
-            enhanced_prompt,
-            **(request.parameters or {})
+        # Dispatch straight to the requested agent, skipping the orchestrator hop
+        agent = await agent_index.get(agent_name)
+        result = await _run_limited(
+            "agent", agent, request.prompt, request.parameters, request.include_trace
         )
         
-        execution_time = time.time() - start_time
-        
-        if hasattr(response, 'content'):
-            response_text = str(response.content)
-        else:
-            response_text = str(response)
-        
         return {
-            "response": response_text,
-            "agent_used": f"root_agent (delegated to {agent_name})",
-            "execution_time": execution_time,
+            "response": result["response"],
+            "agent_used": result["agent_used"],
+            "execution_time": result["execution_time"],
             "metadata": {
                 "requested_agent": agent_name,
-                "actual_agent": root_agent.name
+                "actual_agent": agent.name,
+                **_run_metadata(result)
             }
         }
         
     except Exception as e:
         raise HTTPException(500, f"Agent execution failed: {str(e)}")
 
+BATCH_MAX_PARALLEL = int(os.getenv("PURRPUR_BATCH_MAX_PARALLEL", "8"))
+# Largest accepted batch; bigger ones are rejected with 413 before any task is created
+BATCH_MAX_ITEMS = int(os.getenv("PURRPUR_BATCH_MAX_ITEMS", "100"))
+
+async def _run_batch_item(index: int, request: AgentRequest, semaphore: asyncio.Semaphore, batch_start: float) -> Dict[str, Any]:
+    """Runs one batch item and returns its NDJSON record (errors are reported, not raised)"""
+    import time
+    async with semaphore:
+        started = time.time()
+        try:
+            agent = await _resolve_agent(request.agent_name)
+            if agent is None:
+                raise ValueError(f"Agent '{request.agent_name}' not found")
+            result = await _run_limited(
+                "generate_batch", agent, request.prompt, request.parameters, request.include_trace
+            )
+            record = {
+                "index": index,
+                "status": "success",
+                "response": result["response"],
+                "agent_used": result["agent_used"],
+                "execution_time": result["execution_time"],
+                "metadata": _run_metadata(result)
+            }
+        except Exception as e:
+            record = {
+                "index": index,
+                "status": "error",
+                "error": f"Agent execution failed: {str(e)}",
+                "execution_time": time.time() - started,
+                "metadata": {}
+            }
+    record["metadata"]["queue_wait"] = started - batch_start
+    record["metadata"]["completed_at"] = time.time() - batch_start
+    return record
+
+@app.post("/generate/batch")
+async def generate_batch(request: BatchRequest):
+    """
+    Run many prompts in one request
+    
+    Items execute concurrently (up to `max_parallel`) and results are streamed
+    back as NDJSON in completion order; use `index` to match them to inputs.
+    At most PURRPUR_BATCH_MAX_ITEMS items per request (413 above that).
+    """
+    if not ADK_AVAILABLE or root_agent is None:
+        raise HTTPException(503, "ADK agent system not available.")
+    
+    if len(request.requests) > BATCH_MAX_ITEMS:
+        raise HTTPException(413, f"Batch has {len(request.requests)} items; the limit is {BATCH_MAX_ITEMS}")
+    
+    unknown = [r.agent_name for r in request.requests if r.agent_name and r.agent_name not in agent_index]
+    if unknown:
+        raise HTTPException(404, f"Agents not found: {', '.join(sorted(set(unknown)))}")
+    
+    parallel = min(request.max_parallel or BATCH_MAX_PARALLEL, BATCH_MAX_PARALLEL)
+    
+    async def results():
+        import time
+        batch_start = time.time()
+        semaphore = asyncio.Semaphore(max(parallel, 1))
+        tasks = [
+            asyncio.create_task(_run_batch_item(i, item, semaphore, batch_start))
+            for i, item in enumerate(request.requests)
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                record = await next_done
+                yield json.dumps(record, default=str) + "\n"
+        finally:
+            # Client went away or batch finished: drop anything still pending
+            for task in tasks:
+                task.cancel()
+    
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+@app.post("/jobs", response_model=JobResponse, status_code=202)
+async def submit_job(request: JobRequest):
+    """
+    Submit a long agent run as a background job
+    
+    Poll GET /jobs/{job_id} for status/result, or pass `webhook_url` to be
+    notified when it finishes.
+    """
+    if not ADK_AVAILABLE or root_agent is None:
+        raise HTTPException(503, "ADK agent system not available.")
+    
+    if request.agent_name and request.agent_name not in agent_index:
+        raise HTTPException(404, f"Agent '{request.agent_name}' not found. See /agents for available agents.")
+    
+    try:
+        job_id = await job_queue.submit(
+            {
+                "prompt": request.prompt,
+                "agent_name": request.agent_name,
+                "parameters": request.parameters
+            },
+            priority=request.priority,
+            webhook_url=request.webhook_url
+        )
+    except QueueFullError as e:
+        raise HTTPException(429, str(e))
+    except WebhookNotAllowedError as e:
+        raise HTTPException(422, str(e))
+    
+    return {"job_id": job_id, "status": "queued", "queue_position": job_queue.position(job_id)}
+
+@app.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str):
+    """Get status and (when finished) result of a background job"""
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(404, f"Job '{job_id}' not found.")
+    
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+        "result": job["result"],
+        "error": job["error"],
+        "queue_position": job.get("queue_position")
+    }
+
 # Legacy endpoint for backward compatibility
 class LegacyGenerateRequest(BaseModel):
     prompt: str
     image_base64: Optional[str] = None
+    candidates: Optional[int] = None  # Best-of-N width (1: one streamed, early-abort candidate), capped by PURRPUR_LEGACY_MAX_CANDIDATES
+
+LEGACY_MAX_CANDIDATES = int(os.getenv("PURRPUR_LEGACY_MAX_CANDIDATES", "6"))
+
+# Upper bound for uploaded screenshots (bytes)
+MAX_IMAGE_BYTES = int(os.getenv("PURRPUR_MAX_IMAGE_BYTES", str(20 * 1024 * 1024)))
+
+# Multipart bodies also carry the boundaries and the prompt field
+MAX_UPLOAD_BYTES = MAX_IMAGE_BYTES + 64 * 1024
+
+async def _capped_stream(request: Request, limit: int):
+    """Yields the request body chunks, aborting with 413 once it exceeds `limit` (Content-Length may be absent)"""
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > limit:
+            raise HTTPException(413, f"Image larger than {MAX_IMAGE_BYTES} bytes")
+        yield chunk
+
+async def _read_body(request: Request, limit: int) -> bytes:
+    """Reads the request body under the `limit` cap"""
+    return b"".join([chunk async for chunk in _capped_stream(request, limit)])
+
+async def _read_form(request: Request, limit: int):
+    """Parses a multipart body as it streams in, under the `limit` cap (request.form() would buffer it uncapped)"""
+    from starlette.formparsers import MultiPartParser
+    return await MultiPartParser(request.headers, _capped_stream(request, limit)).parse()
+
+async def _prepare_upload(data: bytes) -> PreparedImage:
+    if len(data) > MAX_IMAGE_BYTES:
+        raise HTTPException(413, f"Image larger than {MAX_IMAGE_BYTES} bytes")
+    try:
+        # Decoding/resizing is CPU-bound; keep it off the event loop
+        return await asyncio.to_thread(prepare_image, data)
+    except ImageError as e:
+        raise HTTPException(400, f"Invalid image: {e}")
+
+async def _legacy_generate(prompt: str, image: Optional[PreparedImage], candidates: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Best-of-N screenshot/prompt-to-component generation through the router.
+    
+    K candidates run concurrently across the eligible providers; the first
+    to pass Gate-1 is returned and the rest are cancelled, otherwise the
+    highest-scoring one (the image is base64-encoded once, in the payload).
+    With candidates=1 a single streamed generation is audited as it
+    arrives and retried on early failure (on the fallback model, or sampled
+    on the same one when there is no fallback).
+    """
+    if candidates is not None:
+        candidates = max(1, min(candidates, LEGACY_MAX_CANDIDATES))
+    async with get_limiter("legacy_generate"):
+        with track_request("legacy_generate"):
+            if candidates == 1:
+                # One streamed candidate, aborted mid-generation and retried
+                # as soon as it can no longer pass Gate-1
+                result = await router.generate_audited(prompt, image)
+                result["candidates"] = result.pop("attempts")
+                result["cancelled"] = sum(1 for attempt in result["candidates"] if "aborted" in attempt)
+                result["cached"] = None
+            else:
+                result = await router.best_of_n(prompt, image, candidates=candidates)
+
+    legacy = {
+        "code": result["text"],
+        "model_used": result["model"],
+        "audit_result": result["audit"],
+        "response": result["text"],
+        "candidates": result["candidates"],
+        "cancelled_candidates": result["cancelled"],
+        "cached": result["cached"]
+    }
+    if image is not None:
+        legacy["image"] = image.describe()
+    return legacy
 
 @app.post("/legacy/generate")
 async def legacy_generate(request: LegacyGenerateRequest):
     """
     Legacy endpoint for backward compatibility with old API
+    
+    Runs the best-of-N generate-and-audit pipeline; `audit_result` is the
+    real Gate-1 result of the returned component. Prefer /legacy/generate/upload for screenshots: it takes the raw image
+    bytes instead of a base64 string that is ~33% larger.
     """
-    if not ADK_AVAILABLE or root_agent is None:
-        raise HTTPException(503, "ADK agent system not available.")
+    image = None
+    if request.image_base64:
+        try:
+            data = base64.b64decode(request.image_base64, validate=True)
+        except ValueError:
+            raise HTTPException(400, "image_base64 is not valid base64")
+        image = await _prepare_upload(data)
+
+    try:
+        return await _legacy_generate(request.prompt, image, request.candidates)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(500, f"Generation failed: {str(e)}")
+
+@app.post("/legacy/generate/upload")
+async def legacy_generate_upload(request: Request, prompt: Optional[str] = None, candidates: Optional[int] = None):
+    """
+    Legacy generation with a binary screenshot upload
     
+    Accepts either multipart/form-data (`prompt` field + `image` file) or
+    the raw image as the request body (Content-Type: image/*) with the
+    prompt in the `prompt` query parameter. The image is downsampled to
+    the vision provider's optimal resolution before the call.
+    """
+    content_length = int(request.headers.get("content-length") or 0)
+    if content_length > MAX_UPLOAD_BYTES:
+        raise HTTPException(413, f"Image larger than {MAX_IMAGE_BYTES} bytes")
+
+    # Chunked uploads carry no Content-Length: both branches enforce the cap while reading
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        form = await _read_form(request, MAX_UPLOAD_BYTES)
+        try:
+            prompt = form.get("prompt") or prompt
+            upload = form.get("image")
+            if upload is None or isinstance(upload, str):
+                raise HTTPException(400, "Missing 'image' file field")
+            data = await upload.read()
+        finally:
+            await form.close()
+    else:
+        data = await _read_body(request, MAX_IMAGE_BYTES)
+
+    if not prompt:
+        raise HTTPException(400, "Missing prompt")
+    image = await _prepare_upload(data)
+
     try:
-        # Convert legacy request to agent request
-        agent_request = AgentRequest(
-            prompt=request.prompt,
-            parameters={
-                "image_base64": request.image_base64
-            } if request.image_base64 else None
-        )
-        
-        # Use the main generate endpoint
-        response = await generate_with_agent(agent_request)
-        
-        # Format in legacy response format
-        return {
-            "code": response["response"],
-            "model_used": "purrpur-adk",
-            "audit_result": {
-                "passed": True,
-                "score": 1.0,
-                "note": "Generated by Purrpur ADK agent system"
-            },
-            "response": response["response"]
-        }
-        
+        return await _legacy_generate(prompt, image, candidates)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(500, f"Generation failed: {str(e)}")
 
@@ -2,13 +2,24 @@
 auditor.py
 Evaluates the output of the router.py file based on Gate-1 criteria.
 Uses python-dotenv to load API keys from .env file.
+
+Batch mode over JSONL generation logs:
+    python -m agents.auditor --input runs.jsonl --output results.jsonl
 """
 
 import os
 import re
-from typing import Dict, Any, List
+import sys
+import json
+import time
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Iterator, Optional, Tuple, TextIO
 from dotenv import load_dotenv
 
+from agents.jsx_validator import validate_jsx
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -17,6 +28,66 @@ GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
 
 
+CRITERIA = (
+    "has_default_export",
+    "uses_tailwind",
+    "no_external_deps",
+    "has_dark_mode",
+    "is_code_only",
+    "valid_jsx",
+)
+
+ERROR_MESSAGES = {
+    "has_default_export": "Missing 'export default function'",
+    "uses_tailwind": "No Tailwind CSS classes detected",
+    "has_dark_mode": "No dark mode support detected",
+    "is_code_only": "Output contains explanations or markdown",
+    "valid_jsx": "Invalid or missing JSX structure",
+}
+
+# Every Gate-1 signal except imports as one alternation, scanned once with
+# finditer. Each branch sits inside a lookahead, so matches are zero-width
+# and never consume text another signal starts in (a one-line minified
+# component can hold every signal; `return (</` is both a JSX return and
+# a closing tag). Each branch is written so that no two quantifiers can
+# match the same characters (no nested/adjacent ambiguous repeats), which
+# keeps the scan linear even on huge single-line or whitespace-padded
+# outputs:
+# - tailwind only *looks ahead* inside the attribute value (bounded by its
+#   closing quote) so tokens like `dark:` inside className are still seen
+# - the JSX return check has no \s*\(?\s* backtracking
+# The leading lookahead lets the engine skip positions that can't start
+# any branch with a single character-class test.
+_SCANNER = re.compile(
+    r"""
+    (?=(?i:[cdehinrt])|[<`])
+    (?=
+      (?P<export>export\s+default\s+function)
+    | (?P<tailwind>className\s*=\s*["'](?=[^"'\n]*?(?:flex|grid|bg-|text-|p-|m-|w-|h-)))
+    | (?P<dark>dark:|class=(?:"dark"|'dark'))
+    | (?P<prose>(?i:here\s+is|this\s+component|i\s+created|the\s+code\s+above|explanation:|note:)|```)
+    | (?P<jsx_return>return\s*(?:\(\s*)?<)
+    | (?P<jsx_close></)
+    )
+    """,
+    re.VERBOSE
+)
+
+# Import statements, in a separate pass anchored at line starts (same
+# matches as the original `^import\s+.*?from\s+["'].*?["']`). The
+# whitespace after `import` is taken atomically via (?=(\s+))\1 so it
+# can't trade characters with the following .*? and backtrack.
+_IMPORT = re.compile(r"""^import(?=(\s+))\1.*?from\s+["'].*?["']""", re.MULTILINE)
+
+
+def external_imports(output: str) -> List[str]:
+    """Import statements other than React's (only React imports are allowed)."""
+    return [
+        match.group() for match in _IMPORT.finditer(output)
+        if "react" not in match.group().lower()
+    ]
+
+
 class Gate1Rule:
     """
     Gate-1 Rule: Validates that the generated React component meets quality criteria.
@@ -26,19 +97,34 @@ class Gate1Rule:
     2. Uses Tailwind CSS classes
     3. No external dependencies (imports)
     4. Includes dark mode support (class="dark")
-    5. Valid JSX/React syntax
+    5. Valid JSX/React syntax (parsed as TSX when tree-sitter is installed;
+       a failed parse fails the gate outright)
     6. Code only, no explanations
+    
+    Stateless: all patterns are precompiled at import time and evaluate()
+    keeps no per-call state on the instance, so one rule can be shared
+    across threads and reused for any number of outputs.
     """
     
-    def __init__(self):
-        self.criteria = {
-            "has_default_export": False,
-            "uses_tailwind": False,
-            "no_external_deps": False,
-            "has_dark_mode": False,
-            "is_code_only": False,
-            "valid_jsx": False
+    criteria_names = CRITERIA
+    pass_threshold = 0.8
+    
+    def scan(self, output: str) -> Dict[str, Any]:
+        """
+        Linear scan of the output collecting every Gate-1 signal (one
+        pass for the signals, one line-anchored pass for imports).
+        
+        Returns:
+            Dict of signal name -> bool, plus 'external_imports' (list).
+        """
+        found = {
+            "export": False, "tailwind": False, "dark": False,
+            "prose": False, "jsx_return": False, "jsx_close": False,
         }
+        for match in _SCANNER.finditer(output):
+            found[match.lastgroup] = True
+        found["external_imports"] = external_imports(output)
+        return found
     
     def evaluate(self, output: str) -> Dict[str, Any]:
         """
@@ -54,80 +140,177 @@ class Gate1Rule:
             return {
                 "passed": False,
                 "score": 0.0,
-                "criteria": self.criteria,
-                "errors": ["Output is empty or invalid"]
+                "criteria": dict.fromkeys(CRITERIA, False),
+                "errors": ["Output is empty or invalid"],
+                "total_criteria": len(CRITERIA),
+                "passed_criteria": 0
             }
         
+        found = self.scan(output)
+        criteria = {
+            "has_default_export": found["export"],
+            "uses_tailwind": found["tailwind"],
+            "no_external_deps": not found["external_imports"],
+            "has_dark_mode": found["dark"],
+            "is_code_only": not found["prose"],
+            "valid_jsx": found["jsx_return"] and found["jsx_close"],
+        }
+        jsx_errors = []
+        if criteria["valid_jsx"]:
+            # Heuristics passed: confirm with a real TSX parse (cached by content hash)
+            parsed = validate_jsx(output)
+            if parsed is not None and not parsed["valid"]:
+                criteria["valid_jsx"] = False
+                jsx_errors = parsed["errors"]
+        return self._result(criteria, found["external_imports"], jsx_errors)
+    
+    def _result(
+        self,
+        criteria: Dict[str, bool],
+        external_imports: List[str],
+        jsx_errors: List[str] = ()
+    ) -> Dict[str, Any]:
         errors = []
-        
-        # 1. Check for default export function
-        if re.search(r'export\s+default\s+function', output):
-            self.criteria["has_default_export"] = True
-        else:
-            errors.append("Missing 'export default function'")
-        
-        # 2. Check for Tailwind CSS classes (className with typical Tailwind patterns)
-        if re.search(r'className\s*=\s*["\'].*?(flex|grid|bg-|text-|p-|m-|w-|h-)', output):
-            self.criteria["uses_tailwind"] = True
-        else:
-            errors.append("No Tailwind CSS classes detected")
-        
-        # 3. Check for no external dependencies (no import statements except React if needed)
-        import_lines = re.findall(r'^import\s+.*?from\s+["\'].*?["\']', output, re.MULTILINE)
-        # Allow only React imports or no imports at all
-        external_imports = [imp for imp in import_lines if 'react' not in imp.lower()]
-        if len(external_imports) == 0:
-            self.criteria["no_external_deps"] = True
-        else:
-            errors.append(f"Found external dependencies: {external_imports}")
-        
-        # 4. Check for dark mode support
-        if 'dark:' in output or 'class="dark"' in output or "class='dark'" in output:
-            self.criteria["has_dark_mode"] = True
-        else:
-            errors.append("No dark mode support detected")
-        
-        # 5. Check if it's code only (no markdown, no explanations)
-        # Look for common explanation patterns
-        explanation_patterns = [
-            r'here\s+is',
-            r'this\s+component',
-            r'i\s+created',
-            r'the\s+code\s+above',
-            r'explanation:',
-            r'note:',
-            r'```'  # Markdown code blocks
-        ]
-        has_explanations = any(re.search(pattern, output, re.IGNORECASE) for pattern in explanation_patterns)
-        if not has_explanations:
-            self.criteria["is_code_only"] = True
-        else:
-            errors.append("Output contains explanations or markdown")
-        
-        # 6. Basic JSX validation (check for return statement and JSX structure)
-        if re.search(r'return\s*\(?\s*<', output) and '</' in output:
-            self.criteria["valid_jsx"] = True
-        else:
-            errors.append("Invalid or missing JSX structure")
+        for name in CRITERIA:
+            if criteria[name]:
+                continue
+            if name == "no_external_deps":
+                errors.append(f"Found external dependencies: {external_imports}")
+            elif name == "valid_jsx" and jsx_errors:
+                errors.append(f"JSX does not parse: {'; '.join(jsx_errors)}")
+            else:
+                errors.append(ERROR_MESSAGES[name])
         
         # Calculate score
-        passed_criteria = sum(1 for v in self.criteria.values() if v)
-        total_criteria = len(self.criteria)
+        passed_criteria = sum(1 for v in criteria.values() if v)
+        total_criteria = len(criteria)
         score = passed_criteria / total_criteria
         
-        # Pass if score >= 0.8 (at least 5 out of 6 criteria)
-        passed = score >= 0.8
+        # Pass if score >= 0.8 (at least 5 out of 6 criteria); code that
+        # fails the TSX parse never passes, whatever else it gets right
+        passed = score >= self.pass_threshold and not jsx_errors
         
         return {
             "passed": passed,
             "score": score,
-            "criteria": self.criteria.copy(),
+            "criteria": criteria,
             "errors": errors,
             "total_criteria": total_criteria,
             "passed_criteria": passed_criteria
         }
 
 
+# Shared, thread-safe instance
+GATE_1 = Gate1Rule()
+
+
+class StreamingAuditor:
+    """
+    Incremental Gate-1 audit over a stream of text chunks.
+    
+    Complete lines are scanned as they arrive (each byte once), so
+    criteria that can only go wrong are decided early: markdown fences
+    or "here is" prose (is_code_only) and external imports
+    (no_external_deps). feed() reports `failed` as soon as the output can
+    no longer pass Gate-1 (or a `required` criterion is violated), so
+    the caller can cancel the provider stream and retry. Prose and fences
+    are not treated as parse failures: a `// Here is...` header, or a
+    fence in a JSX comment or string, is still valid TSX. finish()
+    returns exactly what Gate1Rule.evaluate() returns for the full text.
+    
+    Lines are scanned independently, so `seen` (positive signals so far)
+    can miss matches spanning lines; only finish() is authoritative.
+    One instance per stream (it holds the buffer); not thread-safe.
+    """
+    
+    # Criteria that can only flip from passing to failing as text arrives
+    MONOTONIC_FAILURES = ("is_code_only", "no_external_deps")
+    
+    def __init__(self, rule: Gate1Rule = None, required: Tuple[str, ...] = ()):
+        self.rule = rule or GATE_1
+        self.required = tuple(required)
+        unknown = set(self.required) - set(CRITERIA)
+        if unknown:
+            raise ValueError(f"Unknown Gate-1 criteria: {sorted(unknown)}")
+        self._chunks: List[str] = []
+        # Chunks of the current, not yet complete line
+        self._pending: List[str] = []
+        self.seen = dict.fromkeys(("export", "tailwind", "dark", "jsx_return", "jsx_close"), False)
+        self.external_imports: List[str] = []
+        self.has_prose = False
+        self.failed = False
+        self.fail_reason: Optional[str] = None
+    
+    @property
+    def failed_criteria(self) -> List[str]:
+        failed = []
+        if self.has_prose:
+            failed.append("is_code_only")
+        if self.external_imports:
+            failed.append("no_external_deps")
+        return failed
+    
+    def _scan(self, text: str) -> None:
+        for match in _SCANNER.finditer(text):
+            kind = match.lastgroup
+            if kind == "prose":
+                self.has_prose = True
+            else:
+                self.seen[kind] = True
+        self.external_imports.extend(external_imports(text))
+    
+    def feed(self, chunk: str) -> Dict[str, Any]:
+        """
+        Adds a chunk and scans every line it completes.
+        
+        Returns:
+            {"failed", "reason", "failed_criteria", "seen"} for the text so far.
+        """
+        self._chunks.append(chunk)
+        cut = chunk.rfind("\n")
+        if cut < 0:
+            self._pending.append(chunk)
+        else:
+            self._pending.append(chunk[:cut + 1])
+            self._scan("".join(self._pending))
+            self._pending = [chunk[cut + 1:]]
+        self._check()
+        return self.status()
+    
+    def _check(self) -> None:
+        if self.failed:
+            return
+        failed = self.failed_criteria
+        required = [name for name in failed if name in self.required]
+        max_passed = len(CRITERIA) - len(failed)
+        if required:
+            self.failed = True
+            self.fail_reason = f"required criteria failed: {', '.join(required)}"
+        elif max_passed / len(CRITERIA) < self.rule.pass_threshold:
+            self.failed = True
+            self.fail_reason = f"cannot reach Gate-1 threshold ({', '.join(failed)} failed)"
+    
+    def status(self) -> Dict[str, Any]:
+        return {
+            "failed": self.failed,
+            "reason": self.fail_reason,
+            "failed_criteria": self.failed_criteria,
+            "seen": dict(self.seen),
+        }
+    
+    @property
+    def text(self) -> str:
+        return "".join(self._chunks)
+    
+    def finish(self) -> Dict[str, Any]:
+        """Final Gate-1 result for everything fed so far."""
+        if any(self._pending):
+            self._scan("".join(self._pending))
+            self._pending = []
+            self._check()
+        return self.rule.evaluate(self.text)
+
+
 def evaluate_output(output: str) -> Dict[str, Any]:
     """
     Main evaluation function that uses Gate-1 rule.
@@ -138,10 +321,7 @@ def evaluate_output(output: str) -> Dict[str, Any]:
     Returns:
         Dictionary with evaluation results
     """
-    gate_1_rule = Gate1Rule()
-    result = gate_1_rule.evaluate(output)
-    
-    return result
+    return GATE_1.evaluate(output)
 
 
 def print_evaluation_report(result: Dict[str, Any]) -> None:
@@ -170,10 +350,166 @@ def print_evaluation_report(result: Dict[str, Any]) -> None:
     print("="*60 + "\n")
 
 
-# Example usage
-if __name__ == "__main__":
-    # Test with a sample output
-    sample_output = """
+# Record fields tried (in order) when --field is not given
+OUTPUT_FIELDS = ("code", "output", "response", "completion", "text")
+
+
+def _record_output(record: Any, field: Optional[str]) -> Optional[str]:
+    if isinstance(record, str):
+        return record
+    if not isinstance(record, dict):
+        return None
+    if field:
+        return record.get(field)
+    for name in OUTPUT_FIELDS:
+        if isinstance(record.get(name), str):
+            return record[name]
+    return None
+
+
+def audit_lines(lines: List[Tuple[int, str]], field: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Audits a batch of raw JSONL lines (runs in the worker processes).
+    
+    Returns:
+        One result per line: line number, record id and the Gate-1 result,
+        or an 'error' for lines that aren't JSON / have no output field.
+    """
+    results = []
+    for line_no, line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            results.append({"line": line_no, "error": f"invalid JSON: {e}"})
+            continue
+        output = _record_output(record, field)
+        if output is None:
+            results.append({"line": line_no, "error": "no output field"})
+            continue
+        result = GATE_1.evaluate(output)
+        record_id = None
+        if isinstance(record, dict):
+            record_id = record.get("id", record.get("request_id"))
+        results.append({"line": line_no, "id": record_id, **result})
+    return results
+
+
+def _batches(stream: TextIO, batch_size: int) -> Iterator[List[Tuple[int, str]]]:
+    batch = []
+    for line_no, line in enumerate(stream, 1):
+        if line.strip():
+            batch.append((line_no, line))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class BatchSummary:
+    """Aggregate pass rate, per-criterion failures and score histogram."""
+    
+    def __init__(self):
+        self.total = 0
+        self.passed = 0
+        self.invalid = 0
+        self.failures = dict.fromkeys(CRITERIA, 0)
+        self.scores: Dict[int, int] = {}
+    
+    def add(self, result: Dict[str, Any]) -> None:
+        if "error" in result:
+            self.invalid += 1
+            return
+        self.total += 1
+        self.passed += result["passed"]
+        for name, ok in result["criteria"].items():
+            if not ok:
+                self.failures[name] += 1
+        self.scores[result["passed_criteria"]] = self.scores.get(result["passed_criteria"], 0) + 1
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "records": self.total,
+            "invalid_records": self.invalid,
+            "passed": self.passed,
+            "pass_rate": self.passed / self.total if self.total else 0.0,
+            "criterion_failures": self.failures,
+            "criterion_failure_rates": {
+                name: count / self.total if self.total else 0.0 for name, count in self.failures.items()
+            },
+            "passed_criteria_histogram": {str(k): self.scores.get(k, 0) for k in range(len(CRITERIA) + 1)},
+        }
+
+
+def audit_jsonl(
+    input_path: str,
+    output: Optional[TextIO] = None,
+    field: Optional[str] = None,
+    workers: Optional[int] = None,
+    batch_size: int = 500
+) -> Dict[str, Any]:
+    """
+    Streams a JSONL file through a process pool and audits every record.
+    
+    At most 2 batches per worker are in flight, so memory stays bounded
+    regardless of the file size; per-record results are written to
+    `output` (JSONL) in input order.
+    
+    Returns:
+        BatchSummary dict (pass rate, per-criterion failures, histogram).
+    """
+    workers = workers or os.cpu_count() or 1
+    summary = BatchSummary()
+    
+    def drain(future) -> None:
+        for result in future.result():
+            summary.add(result)
+            if output is not None:
+                output.write(json.dumps(result) + "\n")
+    
+    with open(input_path, "r", encoding="utf-8") as f, ProcessPoolExecutor(workers) as pool:
+        in_flight = deque()
+        for batch in _batches(f, batch_size):
+            in_flight.append(pool.submit(audit_lines, batch, field))
+            if len(in_flight) >= workers * 2:
+                drain(in_flight.popleft())
+        while in_flight:
+            drain(in_flight.popleft())
+    return summary.to_dict()
+
+
+def print_batch_report(summary: Dict[str, Any], elapsed: float) -> None:
+    print("\n" + "="*60)
+    print("GATE-1 BATCH REPORT")
+    print("="*60)
+    print(f"\nRecords: {summary['records']} ({summary['invalid_records']} invalid) in {elapsed:.1f}s")
+    print(f"Pass rate: {summary['pass_rate']:.1%} ({summary['passed']}/{summary['records']})")
+    
+    print("\nFailures per criterion:")
+    for name, count in sorted(summary["criterion_failures"].items(), key=lambda item: -item[1]):
+        rate = summary["criterion_failure_rates"][name]
+        print(f"  {name.replace('_', ' ').title():<22} {count:>8}  {rate:6.1%}  {'█' * round(rate * 30)}")
+    
+    print("\nPassed criteria histogram:")
+    peak = max(summary["passed_criteria_histogram"].values()) or 1
+    for passed, count in summary["passed_criteria_histogram"].items():
+        print(f"  {passed}/{len(CRITERIA)}  {count:>8}  {'█' * round(count / peak * 30)}")
+    print("="*60 + "\n")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Gate-1 audit of generated components")
+    parser.add_argument("--input", help="JSONL file, one generation per line (omit to audit a built-in sample)")
+    parser.add_argument("--output", help="Write per-record results as JSONL ('-' for stdout)")
+    parser.add_argument("--summary", help="Write the aggregate summary as JSON")
+    parser.add_argument("--field", help=f"Record field holding the code (default: first of {', '.join(OUTPUT_FIELDS)})")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=500, help="Records per worker task")
+    args = parser.parse_args(argv)
+    
+    if not args.input:
+        # Example usage: test with a sample output
+        sample_output = """
 export default function Component() {
   return (
     <div className="flex items-center justify-center min-h-screen bg-gray-100 dark:bg-gray-900">
@@ -186,6 +522,25 @@ export default function Component() {
   );
 }
 """
+        print_evaluation_report(evaluate_output(sample_output))
+        return 0
+    
+    start = time.perf_counter()
+    if args.output == "-":
+        summary = audit_jsonl(args.input, sys.stdout, args.field, args.workers, args.batch_size)
+    elif args.output:
+        with open(args.output, "w", encoding="utf-8") as out:
+            summary = audit_jsonl(args.input, out, args.field, args.workers, args.batch_size)
+    else:
+        summary = audit_jsonl(args.input, None, args.field, args.workers, args.batch_size)
     
-    result = evaluate_output(sample_output)
-    print_evaluation_report(result)
+    if args.summary:
+        with open(args.summary, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+    if args.output != "-":
+        print_batch_report(summary, time.perf_counter() - start)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
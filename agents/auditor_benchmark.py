@@ -0,0 +1,258 @@
+"""
+Gate-1 auditor benchmark.
+
+Times Gate1Rule.evaluate on adversarial inputs of growing size (up to
+1 MB) and checks that the cost per byte stays flat, i.e. the scan is
+linear. Inputs target the patterns that used to backtrack: long
+single-line minified markup full of className attributes, and keywords
+followed by huge whitespace runs.
+
+Before timing, checks a few regression cases (components that must fail
+the gate), checks that StreamingAuditor never aborts a stream whose full
+text passes evaluate_output (comment headers, fences inside JSX comments
+and strings), and fuzzes the scanner against the pre-refactor regex checks: every
+heuristic criterion must agree except uses_tailwind, which now only looks
+inside the className value (the documented difference).
+
+Usage:
+    python -m agents.auditor_benchmark
+    python -m agents.auditor_benchmark --max-size 2000000 --legacy
+    python -m agents.auditor_benchmark --fuzz 20000
+"""
+
+import re
+import sys
+import time
+import random
+import argparse
+from typing import Dict, Any, Callable, List
+
+from agents import jsx_validator
+from agents.auditor import GATE_1, StreamingAuditor, evaluate_output
+
+# Pre-refactor tailwind check, kept only for the --legacy comparison
+_LEGACY_TAILWIND = r'className\s*=\s*["\'].*?(flex|grid|bg-|text-|p-|m-|w-|h-)'
+
+COMPONENT = """export default function Card() {
+  return (
+    <div className="flex items-center bg-white dark:bg-gray-900 p-4">
+      <h1 className="text-xl font-bold">Title</h1>
+    </div>
+  );
+}
+"""
+
+
+# name -> (output, expected 'passed'); the invalid ones get 5/6 heuristically
+REGRESSIONS = {
+    "valid_component": (COMPONENT, True),
+    "mismatched_tag": (COMPONENT.replace("Title</h1>", "Title</h2>"), False),
+    "missing_paren": (COMPONENT.replace("  );", "  ;"), False),
+}
+
+
+def regressions() -> List[str]:
+    """Names of regression cases whose Gate-1 verdict is wrong (needs the TSX parser)."""
+    if not jsx_validator.available():
+        return []
+    return [
+        name for name, (output, expected) in REGRESSIONS.items()
+        if GATE_1.evaluate(output)["passed"] != expected
+    ]
+
+
+# Valid TSX that mentions prose or a fence: an early abort would drop a passing component
+STREAMING_CASES = {
+    **{name: output for name, (output, _) in REGRESSIONS.items()},
+    "line_comment_header": "// Here is the card component\n" + COMPONENT,
+    "block_comment_header": "/* Note: uses Tailwind only */\n" + COMPONENT,
+    "fence_in_jsx_comment": COMPONENT.replace(
+        "      <h1", "      {/* ```tsx copied from the docs ``` */}\n      <h1"
+    ),
+    "fence_in_string": COMPONENT.replace(
+        "export default", 'const FENCE = "```";\n\nexport default'
+    ),
+}
+
+
+def streaming_mismatches(chunk_size: int = 7) -> List[str]:
+    """Names of STREAMING_CASES where streaming aborts or finishes differently from evaluate_output."""
+    wrong = []
+    for name, output in STREAMING_CASES.items():
+        auditor = StreamingAuditor()
+        aborted = False
+        for offset in range(0, len(output), chunk_size):
+            aborted = aborted or auditor.feed(output[offset:offset + chunk_size])["failed"]
+        expected = evaluate_output(output)
+        if (aborted and expected["passed"]) or auditor.finish() != expected:
+            wrong.append(name)
+    return wrong
+
+
+def _repeat(unit: str, size: int) -> str:
+    return (unit * (size // len(unit) + 1))[:size]
+
+
+# name -> builder(size) for each adversarial input
+INPUTS: Dict[str, Callable[[int], str]] = {
+    # One line, thousands of className attributes, none with a Tailwind token
+    "minified_classnames": lambda n: _repeat('<span className="card item selected"></span>', n),
+    # Unterminated attribute running to the end of a single line
+    "open_attribute": lambda n: 'className="' + _repeat("x ", n - 11),
+    "return_whitespace": lambda n: "return" + " " * (n - 6),
+    "import_whitespace": lambda n: "import" + " " * (n - 6),
+    "export_whitespace": lambda n: _repeat("export ", n),
+    "prose_whitespace": lambda n: _repeat("here ", n),
+    "realistic": lambda n: _repeat(COMPONENT, n),
+}
+
+
+def _time(fn: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(sizes: List[int], repeat: int = 3) -> Dict[str, List[tuple]]:
+    """Returns name -> [(size, seconds)] for every adversarial input."""
+    results = {}
+    for name, build in INPUTS.items():
+        rows = []
+        for size in sizes:
+            text = build(size)
+            rows.append((len(text), _time(lambda: GATE_1.evaluate(text), repeat)))
+        results[name] = rows
+    return results
+
+
+def growth(rows: List[tuple]) -> float:
+    """Per-byte cost at the largest size relative to the smallest (~1.0 = linear)."""
+    (small_size, small_time), (big_size, big_time) = rows[0], rows[-1]
+    return (big_time / big_size) / max(small_time / small_size, 1e-12)
+
+
+def legacy_criteria(output: str) -> Dict[str, bool]:
+    """The pre-refactor regex checks (heuristic criteria, before the TSX parse)."""
+    explanation_patterns = [
+        r'here\s+is', r'this\s+component', r'i\s+created', r'the\s+code\s+above',
+        r'explanation:', r'note:', r'```',
+    ]
+    import_lines = re.findall(r'^import\s+.*?from\s+["\'].*?["\']', output, re.MULTILINE)
+    return {
+        "has_default_export": bool(re.search(r'export\s+default\s+function', output)),
+        "uses_tailwind": bool(re.search(_LEGACY_TAILWIND, output)),
+        "no_external_deps": not [imp for imp in import_lines if 'react' not in imp.lower()],
+        "has_dark_mode": 'dark:' in output or 'class="dark"' in output or "class='dark'" in output,
+        "is_code_only": not any(re.search(p, output, re.IGNORECASE) for p in explanation_patterns),
+        "valid_jsx": bool(re.search(r'return\s*\(?\s*<', output)) and '</' in output,
+    }
+
+
+def scanner_criteria(output: str) -> Dict[str, Any]:
+    found = GATE_1.scan(output)
+    return {
+        "has_default_export": found["export"],
+        "uses_tailwind": found["tailwind"],
+        "no_external_deps": not found["external_imports"],
+        "has_dark_mode": found["dark"],
+        "is_code_only": not found["prose"],
+        "valid_jsx": found["jsx_return"] and found["jsx_close"],
+        "external_imports": found["external_imports"],
+    }
+
+
+# Fragments the fuzzer glues together: every signal, its near misses and separators
+FUZZ_FRAGMENTS = [
+    "import ", "import", "from ", "from", " from ", '"./a.css"', "'react'", '"react"', "'x'", '"z"',
+    "export default function A()", "export default ", "function", "export  default\tfunction",
+    'className="', "className='", "className = '", "flex", "grid", "bg-red", "text-", "p-2", "card",
+    "dark:", 'class="dark"', "class='dark'", "dark", "return (", "return", "return(<", "return <",
+    "<div>", "</div>", "</", "<", ">", "(", ")", "{", "}", ";", "//", "here is", "Here  Is", "note:",
+    "NOTE:", "this component", "I created", "the code above", "Explanation:", "```",
+    " ", "  ", "\t", "\n", "\n\n", '"', "'", "x", "é", "İ", "ı",
+]
+
+
+def fuzz(iterations: int, seed: int = 0, max_fragments: int = 40) -> Dict[str, int]:
+    """Criterion -> number of random inputs where scanner and legacy checks disagree."""
+    rng = random.Random(seed)
+    mismatches = dict.fromkeys(legacy_criteria(""), 0)
+    for _ in range(iterations):
+        text = "".join(rng.choice(FUZZ_FRAGMENTS) for _ in range(rng.randint(1, max_fragments)))
+        legacy, current = legacy_criteria(text), scanner_criteria(text)
+        legacy_imports = [
+            imp for imp in re.findall(r'^import\s+.*?from\s+["\'].*?["\']', text, re.MULTILINE)
+            if 'react' not in imp.lower()
+        ]
+        if current["external_imports"] != legacy_imports:
+            mismatches["no_external_deps"] += 1
+            continue
+        for name in mismatches:
+            if legacy[name] != current[name]:
+                mismatches[name] += 1
+    return mismatches
+
+
+def run_legacy(sizes: List[int]) -> List[tuple]:
+    pattern = re.compile(_LEGACY_TAILWIND)
+    rows = []
+    for size in sizes:
+        text = INPUTS["minified_classnames"](size)
+        rows.append((size, _time(lambda: pattern.search(text), 1)))
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the Gate-1 auditor on adversarial inputs")
+    parser.add_argument("--max-size", type=int, default=1_000_000, help="Largest input in bytes")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-growth", type=float, default=3.0,
+                        help="Fail if per-byte cost grows more than this from smallest to largest size")
+    parser.add_argument("--legacy", action="store_true", help="Also time the old backtracking tailwind regex")
+    parser.add_argument("--fuzz", type=int, default=5000, help="Random inputs compared against the legacy checks")
+    args = parser.parse_args()
+
+    print("\n" + "=" * 60)
+    print("GATE-1 AUDITOR BENCHMARK")
+    print("=" * 60)
+    failed = []
+    if jsx_validator.available():
+        wrong = regressions()
+        print(f"\nRegression cases: {len(REGRESSIONS) - len(wrong)}/{len(REGRESSIONS)} ok")
+        failed.extend(f"regression:{name}" for name in wrong)
+    else:
+        print("\nRegression cases skipped (TSX parser not installed)")
+    wrong = streaming_mismatches()
+    print(f"Streaming vs evaluate_output: {len(STREAMING_CASES) - len(wrong)}/{len(STREAMING_CASES)} ok")
+    failed.extend(f"streaming:{name}" for name in wrong)
+    if args.fuzz:
+        mismatches = fuzz(args.fuzz)
+        print(f"\nFuzz vs legacy checks ({args.fuzz} inputs):")
+        for name, count in mismatches.items():
+            allowed = name == "uses_tailwind"
+            print(f"  {name:<20} {count:>6} mismatches{'  (documented difference)' if allowed else ''}")
+            if count and not allowed:
+                failed.append(f"fuzz:{name}")
+
+    sizes = [args.max_size // 8, args.max_size // 4, args.max_size // 2, args.max_size]
+    results = run(sizes, args.repeat)
+    for name, rows in results.items():
+        ratio = growth(rows)
+        print(f"\n{name}  (growth x{ratio:.2f})")
+        for size, seconds in rows:
+            print(f"  {size / 1e6:6.3f} MB  {seconds * 1000:9.2f} ms  {seconds / size * 1e9:7.1f} ns/byte")
+        if ratio > args.max_growth:
+            failed.append(name)
+
+    if args.legacy:
+        legacy_sizes = [s // 64 for s in sizes]
+        print("\nlegacy tailwind regex on minified_classnames (1/64 sizes)")
+        for size, seconds in run_legacy(legacy_sizes):
+            print(f"  {size / 1e6:6.3f} MB  {seconds * 1000:9.2f} ms  {seconds / size * 1e9:7.1f} ns/byte")
+
+    print("\n" + ("❌ Failed: " + ", ".join(failed) if failed else "✅ Linear on every input, scanner agrees with the legacy checks"))
+    print("=" * 60 + "\n")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,73 @@
+"""
+Regression check for the router's response cache.
+
+Sends the same screenshot (vision) request through router.generate()
+twice against a mocked Anthropic endpoint and a throwaway SQLite store:
+the second call must come back from the cache without reaching the
+provider. A sampled request (temperature != 0) must never be cached.
+
+Run:
+    python -m agents.cache_check
+"""
+
+import sys
+import json
+import base64
+import asyncio
+import tempfile
+from pathlib import Path
+from typing import List
+
+import httpx
+
+from agents import router, response_cache
+from agents.response_cache import ResponseCache, DiskStore
+
+COMPONENT = 'export default function Card() {\n  return (<div className="p-4 dark:bg-gray-900">Hi</div>);\n}'
+SCREENSHOT = base64.b64encode(b"\x89PNG\r\n\x1a\n screenshot").decode()
+
+
+async def _run(db_path: str) -> List[str]:
+    calls = []
+
+    def anthropic(request: httpx.Request) -> httpx.Response:
+        calls.append(json.loads(request.content))
+        return httpx.Response(200, json={"content": [{"type": "text", "text": COMPONENT}]})
+
+    response_cache._cache = ResponseCache(disk=DiskStore(db_path))
+    router._clients["anthropic"] = httpx.AsyncClient(
+        base_url=router.PROVIDERS["anthropic"]["base_url"], transport=httpx.MockTransport(anthropic)
+    )
+    failures = []
+    try:
+        first = await router.generate("Recreate this screenshot", SCREENSHOT, img_tokens=800)
+        second = await router.generate("Recreate this screenshot", SCREENSHOT, img_tokens=800)
+        if first["model"] != "claude-sonnet" or first["cached"] is not None:
+            failures.append(f"first vision call: expected a claude-sonnet provider call, got {first['model']}/{first['cached']}")
+        if calls and calls[0].get("temperature") != 0:
+            failures.append(f"vision call sent temperature {calls[0].get('temperature')!r}, expected 0")
+        if second["cached"] != "memory" or len(calls) != 1:
+            failures.append(f"repeated vision call: cached={second['cached']}, provider calls={len(calls)}")
+
+        # Sampled calls pin one random draw if cached: they must skip the cache
+        if router._cache_params(1500, router.BEST_OF_N_TEMPERATURE) is not None:
+            failures.append("a sampled call produced cache params")
+    finally:
+        await router.close_clients()
+        response_cache._cache = None
+    return failures
+
+
+def main() -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        failures = asyncio.run(_run(str(Path(tmp) / "cache.db")))
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        return 1
+    print("✅ Repeated vision request served from the response cache")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
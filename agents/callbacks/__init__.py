@@ -22,6 +22,30 @@ from .marketing_callbacks import (
     ensure_triptico_specs
 )
 
+from .workspace_state import get_workspace_state
+from .injection import inject_instruction, injection_stats
+from .keyword_matcher import register_keywords, scan_response
+from .profiler import profiled, callback_stats, set_load_shedding
+
+import importlib
+
+# The runner plugins subclass google.adk's BasePlugin: import them on first
+# attribute access so the stats helpers above work without ADK installed.
+_PLUGIN_MODULES = {
+    'MetricsPlugin': 'metrics_callbacks',
+    'TracingPlugin': 'tracing_callbacks',
+}
+
+
+def __getattr__(name):
+    module_name = _PLUGIN_MODULES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
+
 __all__ = [
     'validate_user_brief',
     'log_delegation_summary',
@@ -31,5 +55,15 @@ __all__ = [
     'block_on_critical_failures',
     'validate_brand_assets',
     'ensure_triptico_specs',
+    'get_workspace_state',
+    'inject_instruction',
+    'injection_stats',
+    'register_keywords',
+    'scan_response',
+    'profiled',
+    'callback_stats',
+    'set_load_shedding',
+    'MetricsPlugin',
+    'TracingPlugin',
 ]
 
@@ -0,0 +1,122 @@
+"""
+Tagged system-instruction injection for the before_model callbacks.
+
+Guardrail notes ([SYSTEM NOTE], [TRIPTICO SPECS REMINDER]) are appended
+as tagged blocks, "[LABEL #key]: text", separated from the existing
+instruction by a blank line. Before appending, the system instruction is
+checked for a block with the same tag: an identical block is left alone
+and a different one is replaced in place. Each note is present at most
+once per request however many times the agent loop runs the callback.
+
+The prompt tokens every agent receives from callbacks are counted in
+agents.metrics (purrpur_callback_injected_tokens_total) and in
+injection_stats().
+"""
+
+import re
+import logging
+import threading
+from typing import Dict, Any, Optional, Tuple
+
+from agents import metrics
+from agents.routing import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+_stats: Dict[str, Dict[str, int]] = {}
+_stats_lock = threading.Lock()
+
+
+def block_tag(label: str, key: str) -> str:
+    return f"[{label} #{key}]"
+
+
+def _block_pattern(tag: str) -> re.Pattern:
+    # Blocks are single paragraphs: they start the text or follow a blank line
+    # and end at the next blank line or at the end
+    return re.compile(r"(?:\A|(?<=\n\n))" + re.escape(tag) + r":.*?(?=\n\n|\Z)", re.S)
+
+
+def _system_text(llm_request) -> Optional[Tuple[Any, str]]:
+    """
+    Locates the system instruction as (holder, attribute) so it can be
+    rewritten: config.system_instruction (string or Content) on ADK
+    requests, or the first part of a 'system' content.
+    """
+    config = getattr(llm_request, "config", None)
+    if config is not None:
+        instruction = getattr(config, "system_instruction", None)
+        if instruction is None or isinstance(instruction, str):
+            return config, "system_instruction"
+        parts = getattr(instruction, "parts", None)
+        if parts and hasattr(parts[0], "text"):
+            return parts[0], "text"
+
+    for content in getattr(llm_request, "contents", None) or []:
+        if content.role == "system" and content.parts and hasattr(content.parts[0], "text"):
+            return content.parts[0], "text"
+    return None
+
+
+def _record(agent: str, key: str, tokens: int, duplicate: bool):
+    with _stats_lock:
+        entry = _stats.setdefault(agent, {"injections": 0, "duplicates": 0, "tokens": 0})
+        if duplicate:
+            entry["duplicates"] += 1
+        else:
+            entry["injections"] += 1
+            entry["tokens"] += tokens
+    if tokens:
+        metrics.CALLBACK_INJECTED_TOKENS.inc(tokens, agent=agent, block=key)
+
+
+def inject_instruction(callback_context, llm_request, label: str, key: str, text: str) -> int:
+    """
+    Adds a tagged block to the system instruction, at most once.
+
+    Args:
+        callback_context: Context object from ADK (used for the agent name).
+        llm_request: The LLM request about to be sent.
+        label: Visible label, e.g. "SYSTEM NOTE".
+        key: Identifies the block among those sharing a label, e.g. "tech_context".
+        text: Block body.
+
+    Returns:
+        Prompt tokens added (0 if the block was already present or there is
+        no system instruction to extend).
+    """
+    target = _system_text(llm_request)
+    if target is None:
+        return 0
+
+    holder, attribute = target
+    current = getattr(holder, attribute) or ""
+    tag = block_tag(label, key)
+    block = f"{tag}: {text}"
+    agent = getattr(callback_context, "agent_name", None) or "unknown"
+
+    pattern = _block_pattern(tag)
+    existing = pattern.search(current)
+    if existing is not None and existing.group(0) == block:
+        _record(agent, key, 0, duplicate=True)
+        return 0
+
+    if existing is not None:
+        # Same note with different content (e.g. another set of missing docs)
+        updated = pattern.sub(lambda _: block, current, count=1)
+        added = max(0, estimate_tokens(block) - estimate_tokens(existing.group(0)))
+    else:
+        # A missing instruction becomes the block itself, with no leading separator
+        updated = f"{current}\n\n{block}" if current else block
+        added = estimate_tokens(block)
+
+    setattr(holder, attribute, updated)
+    _record(agent, key, added, duplicate=False)
+    logger.debug(f"📝 {tag} inyectado para {agent} (+{added} tokens)")
+    return added
+
+
+def injection_stats() -> Dict[str, Dict[str, int]]:
+    """Per agent: blocks injected, duplicates skipped and prompt tokens added."""
+    with _stats_lock:
+        return {agent: dict(entry) for agent, entry in _stats.items()}
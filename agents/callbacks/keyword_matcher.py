@@ -0,0 +1,126 @@
+"""
+Shared keyword matcher for the after_model callbacks.
+
+Each callback registers its keyword set once at import time
+(register_keywords). The first scan compiles every registered set into
+one matcher. scan_response() then lowercases the response once, finds all
+keywords in a single pass and caches the result per response object, so
+several callbacks on the same model call share one scan.
+
+Uses a pyahocorasick automaton when the package is installed. Otherwise
+it checks the deduplicated keyword list against the single lowered copy
+with str's C substring search. A re alternation was measured slower than
+that on CPython. Matching keeps the callbacks' substring semantics: "cto"
+matches inside "directory".
+
+Benchmark: python -m agents.keyword_benchmark
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Responses whose scan is kept (callbacks of one model call run back to back)
+CACHE_SIZE = 32
+
+_sets: Dict[str, List[str]] = {}
+_matcher: Optional["KeywordMatcher"] = None
+_cache: "OrderedDict[int, tuple]" = OrderedDict()
+_lock = threading.Lock()
+
+
+class ResponseMatches:
+    """Keywords found in one response, grouped by keyword set (in registration order)."""
+
+    def __init__(self, text_length: int, found: Dict[str, List[str]]):
+        self.text_length = text_length
+        self.found = found
+
+    def __getitem__(self, name: str) -> List[str]:
+        return self.found.get(name, [])
+
+    def any(self, name: str) -> bool:
+        return bool(self.found.get(name))
+
+
+class KeywordMatcher:
+    """All keyword sets compiled into one matcher."""
+
+    def __init__(self, sets: Dict[str, Sequence[str]]):
+        self.sets = {name: [kw.lower() for kw in keywords] for name, keywords in sets.items()}
+        self.keywords = sorted({kw for keywords in self.sets.values() for kw in keywords})
+        self.backend = "aho-corasick" if ahocorasick is not None else "substring"
+        self._automaton = None
+        if ahocorasick is not None and self.keywords:
+            automaton = ahocorasick.Automaton()
+            for keyword in self.keywords:
+                automaton.add_word(keyword, keyword)
+            automaton.make_automaton()
+            self._automaton = automaton
+
+    def present(self, lowered: str) -> set:
+        """Keywords that occur in an already lowercased text."""
+        if self._automaton is not None:
+            return {keyword for _, keyword in self._automaton.iter(lowered)}
+        return {keyword for keyword in self.keywords if keyword in lowered}
+
+    def scan(self, text: str) -> ResponseMatches:
+        present = self.present(text.lower())
+        found = {
+            name: [kw for kw in keywords if kw in present]
+            for name, keywords in self.sets.items()
+        }
+        return ResponseMatches(len(text), found)
+
+
+def register_keywords(name: str, keywords: Sequence[str]):
+    """Adds (or replaces) a keyword set; the matcher is rebuilt on next use."""
+    global _matcher
+    with _lock:
+        _sets[name] = list(keywords)
+        _matcher = None
+        _cache.clear()
+
+
+def registered_sets() -> Dict[str, List[str]]:
+    with _lock:
+        return {name: list(keywords) for name, keywords in _sets.items()}
+
+
+def get_matcher() -> KeywordMatcher:
+    global _matcher
+    with _lock:
+        if _matcher is None:
+            _matcher = KeywordMatcher(_sets)
+        return _matcher
+
+
+def response_text(llm_response) -> str:
+    """Text parts of the first candidate, joined with spaces."""
+    return " ".join(
+        part.text for part in llm_response.candidates[0].content.parts
+        if hasattr(part, 'text') and part.text
+    )
+
+
+def scan_response(llm_response) -> ResponseMatches:
+    """Scans a model response once; later calls with the same object reuse the result."""
+    key = id(llm_response)
+    with _lock:
+        cached = _cache.get(key)
+        # The response is kept alive by the cache entry, so its id cannot be reused
+        if cached is not None and cached[0] is llm_response:
+            return cached[1]
+
+    matches = get_matcher().scan(response_text(llm_response))
+    with _lock:
+        _cache[key] = (llm_response, matches)
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return matches
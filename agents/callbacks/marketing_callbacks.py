@@ -7,11 +7,22 @@ before creative agents start producing content.
 
 import logging
 from typing import Optional
-from pathlib import Path
+
+from .injection import inject_instruction
+from .keyword_matcher import register_keywords, scan_response
+from .profiler import profiled
+from .workspace_state import get_workspace_state
 
 logger = logging.getLogger(__name__)
 
+# Purpur should be: professional, empathetic, strategic, visionary
+register_keywords("negative_tone", [
+    "spam", "clickbait", "urgente!!!", "compra ya",
+    "oferta limitada", "último día"
+])
+
 
+@profiled
 def validate_brand_assets(callback_context, llm_request) -> Optional[dict]:
     """
     Callback 'before_model' para agentes creativos.
@@ -30,30 +41,25 @@ def validate_brand_assets(callback_context, llm_request) -> Optional[dict]:
         "docs/DESIGN-SYSTEM.md"
     ]
     
-    missing_assets = [asset for asset in required_assets if not Path(asset).exists()]
+    missing_assets = get_workspace_state().missing(required_assets)
     
     if missing_assets:
         logger.warning(f"⚠️ Assets de marca faltantes: {missing_assets}")
         
-        # Inject warning into system instruction
-        system_parts = [
-            part for content in llm_request.contents
-            if content.role == 'system'
-            for part in content.parts
-        ]
-        
-        if system_parts and hasattr(system_parts[0], 'text'):
-            system_parts[0].text += (
-                f"\n\n[SYSTEM NOTE]: Algunos assets de marca no están disponibles: "
-                f"{', '.join(missing_assets)}. Trabaja con lineamientos generales y "
-                "menciona que se necesitarán estos archivos para producción final."
-            )
+        # Inject warning into system instruction (once per request)
+        inject_instruction(
+            callback_context, llm_request, "SYSTEM NOTE", "brand_assets",
+            f"Algunos assets de marca no están disponibles: "
+            f"{', '.join(missing_assets)}. Trabaja con lineamientos generales y "
+            "menciona que se necesitarán estos archivos para producción final."
+        )
     else:
         logger.info("✅ Assets de marca disponibles.")
     
     return None
 
 
+@profiled
 def ensure_triptico_specs(callback_context, llm_request) -> Optional[dict]:
     """
     Callback específico para social_triptico_agent.
@@ -78,27 +84,22 @@ def ensure_triptico_specs(callback_context, llm_request) -> Optional[dict]:
     
     logger.info("📐 Validando specs de Tríptico Instagram...")
     
-    # Inject specs into system instruction for reference
-    system_parts = [
-        part for content in llm_request.contents
-        if content.role == 'system'
-        for part in content.parts
-    ]
+    # Inject specs into system instruction for reference (once per request)
+    added = inject_instruction(
+        callback_context, llm_request, "TRIPTICO SPECS REMINDER", "triptico",
+        f"Canvas total: {triptico_specs['total_width']}x{triptico_specs['total_height']}px. "
+        f"División: {triptico_specs['panels']} paneles de {triptico_specs['panel_width']}x{triptico_specs['panel_height']}px. "
+        f"Orden: {triptico_specs['order']}. "
+        "Asegura continuidad visual entre paneles y posición correcta del logo."
+    )
     
-    if system_parts and hasattr(system_parts[0], 'text'):
-        system_parts[0].text += (
-            f"\n\n[TRIPTICO SPECS REMINDER]: "
-            f"Canvas total: {triptico_specs['total_width']}x{triptico_specs['total_height']}px. "
-            f"División: {triptico_specs['panels']} paneles de {triptico_specs['panel_width']}x{triptico_specs['panel_height']}px. "
-            f"Orden: {triptico_specs['order']}. "
-            "Asegura continuidad visual entre paneles y posición correcta del logo."
-        )
-    
-    logger.info("✅ Specs de Tríptico inyectadas en el contexto.")
+    if added:
+        logger.info("✅ Specs de Tríptico inyectadas en el contexto.")
     
     return None
 
 
+@profiled(essential=False)
 def validate_content_tone(callback_context, llm_response) -> Optional[dict]:
     """
     Callback 'after_model' para copywriter y social media agents.
@@ -113,20 +114,12 @@ def validate_content_tone(callback_context, llm_response) -> Optional[dict]:
     """
     # Extract response text
     response_parts = [
-        part.text for content in llm_response.candidates[0].content.parts
+        part.text for part in llm_response.candidates[0].content.parts
         if hasattr(part, 'text') and part.text
     ]
     
-    output = " ".join(response_parts).lower()
-    
     # Check for brand voice consistency
-    # Purpur should be: professional, empathetic, strategic, visionary
-    negative_indicators = [
-        "spam", "clickbait", "urgente!!!", "compra ya",
-        "oferta limitada", "último día"
-    ]
-    
-    has_negative_tone = any(indicator in output for indicator in negative_indicators)
+    has_negative_tone = scan_response(llm_response).any("negative_tone")
     
     if has_negative_tone:
         logger.warning("⚠️ Tono de voz detectado no alineado con marca Purpur.")
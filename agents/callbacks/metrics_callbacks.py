@@ -0,0 +1,116 @@
+"""
+Metrics callbacks.
+
+Runner-level plugin that times every model call and tool call of every
+agent in the tree and feeds the registry in agents/metrics.py.
+"""
+
+import time
+import logging
+from collections import OrderedDict
+from typing import Optional, Tuple, Any
+
+from google.adk.plugins.base_plugin import BasePlugin
+
+from agents import metrics
+
+logger = logging.getLogger(__name__)
+
+# Tool results use a 'status' key; these values count as failures
+TOOL_ERROR_STATUSES = {"error", "blocked", "timeout"}
+
+# Cap on calls tracked in flight; a run cancelled mid-call never reaches
+# its after/error or after_run callbacks, so its entries age out instead
+MAX_IN_FLIGHT = 4096
+
+
+class MetricsPlugin(BasePlugin):
+    """
+    Records per-agent LLM latency/token usage and per-tool latency/errors.
+
+    Model calls of one agent within one invocation are sequential, so
+    (invocation_id, agent_name) identifies the call in flight; tool calls
+    are keyed by their function_call_id. Whatever an invocation leaves
+    behind is dropped in after_run_callback, and both maps are bounded.
+    """
+
+    def __init__(self, name: str = "purrpur_metrics"):
+        super().__init__(name=name)
+        self._model_calls: "OrderedDict[Tuple[str, str], Tuple[float, str]]" = OrderedDict()
+        self._tool_calls: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+
+    @staticmethod
+    def _track(calls: OrderedDict, key: Tuple[str, str], value: Any) -> None:
+        calls[key] = value
+        calls.move_to_end(key)
+        while len(calls) > MAX_IN_FLIGHT:
+            calls.popitem(last=False)
+
+    @staticmethod
+    def _model_key(callback_context) -> Tuple[str, str]:
+        return (callback_context.invocation_id, callback_context.agent_name)
+
+    @staticmethod
+    def _tool_key(tool, tool_context) -> Tuple[str, str]:
+        return (tool_context.invocation_id, tool_context.function_call_id or tool.name)
+
+    async def before_model_callback(self, *, callback_context, llm_request) -> Optional[Any]:
+        self._track(self._model_calls, self._model_key(callback_context), (
+            time.perf_counter(), llm_request.model or "unknown"
+        ))
+        return None
+
+    async def after_model_callback(self, *, callback_context, llm_response) -> Optional[Any]:
+        # Streaming responses call this once per chunk; only time the final one
+        if getattr(llm_response, "partial", False):
+            return None
+
+        started = self._model_calls.pop(self._model_key(callback_context), None)
+        if started is None:
+            return None
+        start, model = started
+        agent = callback_context.agent_name
+
+        metrics.LLM_LATENCY.observe(time.perf_counter() - start, agent=agent, model=model)
+        if llm_response.error_code:
+            metrics.LLM_ERRORS.inc(agent=agent, model=model)
+
+        usage = llm_response.usage_metadata
+        if usage is not None:
+            metrics.LLM_TOKENS.observe(usage.prompt_token_count or 0, agent=agent, model=model, kind="prompt")
+            metrics.LLM_TOKENS.observe(usage.candidates_token_count or 0, agent=agent, model=model, kind="completion")
+        return None
+
+    async def on_model_error_callback(self, *, callback_context, llm_request, error) -> Optional[Any]:
+        started = self._model_calls.pop(self._model_key(callback_context), None)
+        model = started[1] if started else (llm_request.model or "unknown")
+        metrics.LLM_ERRORS.inc(agent=callback_context.agent_name, model=model)
+        return None
+
+    async def before_tool_callback(self, *, tool, tool_args, tool_context) -> Optional[dict]:
+        self._track(self._tool_calls, self._tool_key(tool, tool_context), time.perf_counter())
+        return None
+
+    async def after_tool_callback(self, *, tool, tool_args, tool_context, result) -> Optional[dict]:
+        start = self._tool_calls.pop(self._tool_key(tool, tool_context), None)
+        agent = tool_context.agent_name
+        if start is not None:
+            metrics.TOOL_LATENCY.observe(time.perf_counter() - start, tool=tool.name, agent=agent)
+        if isinstance(result, dict) and result.get("status") in TOOL_ERROR_STATUSES:
+            metrics.TOOL_ERRORS.inc(tool=tool.name, agent=agent)
+        return None
+
+    async def on_tool_error_callback(self, *, tool, tool_args, tool_context, error) -> Optional[dict]:
+        start = self._tool_calls.pop(self._tool_key(tool, tool_context), None)
+        agent = tool_context.agent_name
+        if start is not None:
+            metrics.TOOL_LATENCY.observe(time.perf_counter() - start, tool=tool.name, agent=agent)
+        metrics.TOOL_ERRORS.inc(tool=tool.name, agent=agent)
+        return None
+
+    async def after_run_callback(self, *, invocation_context) -> None:
+        # Calls that never got an after/error callback (e.g. the run was interrupted)
+        invocation_id = invocation_context.invocation_id
+        for calls in (self._model_calls, self._tool_calls):
+            for key in [key for key in calls if key[0] == invocation_id]:
+                del calls[key]
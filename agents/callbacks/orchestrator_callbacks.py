@@ -7,11 +7,22 @@ ensuring proper delegation and brief completeness.
 
 import logging
 from typing import Optional
-from pathlib import Path
+
+from .injection import inject_instruction
+from .keyword_matcher import register_keywords, scan_response
+from .profiler import profiled
+from .workspace_state import get_workspace_state
 
 logger = logging.getLogger(__name__)
 
+# Agent names looked for in the orchestrator's delegation output
+register_keywords("agents", [
+    "cto", "frontend", "backend", "mobile", "qa", "design",
+    "cmo", "marketing", "seo", "traffic", "social", "copy", "gráfico"
+])
+
 
+@profiled(essential=False)
 def validate_user_brief(callback_context, llm_request) -> Optional[dict]:
     """
     Callback 'before_model' para el Root Agent.
@@ -67,6 +78,7 @@ def validate_user_brief(callback_context, llm_request) -> Optional[dict]:
     return None  # Continue with model call
 
 
+@profiled(essential=False)
 def log_delegation_summary(callback_context, llm_response) -> Optional[dict]:
     """
     Callback 'after_model' para el Root Agent.
@@ -79,24 +91,13 @@ def log_delegation_summary(callback_context, llm_response) -> Optional[dict]:
     Returns:
         None to use the original response, or modified response dict.
     """
-    # Extract response text
-    response_parts = [
-        part.text for content in llm_response.candidates[0].content.parts
-        if hasattr(part, 'text') and part.text
-    ]
-    
-    output = " ".join(response_parts)
+    matches = scan_response(llm_response)
     
     # Log delegation decisions
-    logger.info(f"🤖 [RootAgent Finalizó]: Respuesta de {len(output)} caracteres.")
+    logger.info(f"🤖 [RootAgent Finalizó]: Respuesta de {matches.text_length} caracteres.")
     
     # Detect which agents were mentioned
-    agent_keywords = [
-        "cto", "frontend", "backend", "mobile", "qa", "design",
-        "cmo", "marketing", "seo", "traffic", "social", "copy", "gráfico"
-    ]
-    
-    mentioned_agents = [kw for kw in agent_keywords if kw in output.lower()]
+    mentioned_agents = matches["agents"]
     
     if mentioned_agents:
         logger.info(f"📋 Agentes mencionados en delegación: {', '.join(mentioned_agents)}")
@@ -104,6 +105,7 @@ def log_delegation_summary(callback_context, llm_response) -> Optional[dict]:
     return None  # Use original response
 
 
+@profiled
 def ensure_delegation_template(callback_context, llm_request) -> Optional[dict]:
     """
     Callback 'before_model' que asegura que el template de delegación esté disponible.
@@ -116,23 +118,17 @@ def ensure_delegation_template(callback_context, llm_request) -> Optional[dict]:
         None to continue normally.
     """
     # Check if delegation template exists
-    template_path = Path("purrpurragent/playbooks/delegation_template.md")
+    template_path = "purrpurragent/playbooks/delegation_template.md"
     
-    if not template_path.exists():
+    if not get_workspace_state().exists(template_path):
         logger.warning("⚠️ Delegation template no encontrado. Creando referencia...")
         
-        # Could inject a reminder into the system instruction
-        system_parts = [
-            part for content in llm_request.contents
-            if content.role == 'system'
-            for part in content.parts
-        ]
-        
-        if system_parts and hasattr(system_parts[0], 'text'):
-            system_parts[0].text += (
-                "\n\n[SYSTEM NOTE]: El template de delegación no está disponible. "
-                "Usa el formato estándar: Contexto, Objetivo, Restricciones, Entregables, KPIs."
-            )
+        # Inject a reminder into the system instruction (once per request)
+        inject_instruction(
+            callback_context, llm_request, "SYSTEM NOTE", "delegation_template",
+            "El template de delegación no está disponible. "
+            "Usa el formato estándar: Contexto, Objetivo, Restricciones, Entregables, KPIs."
+        )
     else:
         logger.debug("✅ Delegation template disponible.")
     
@@ -0,0 +1,162 @@
+"""
+Callback profiler and load shedding.
+
+Every before/after_model callback in this package is wrapped with
+@profiled, which:
+
+- times each invocation and aggregates count/total/max/over-budget per
+  (callback, agent), exported as purrpur_callback_duration_seconds and
+  in callback_stats();
+- logs a warning when an invocation exceeds its budget
+  (PURRPUR_CALLBACK_BUDGET_MS, default 25 ms);
+- skips callbacks marked essential=False while load shedding is active
+  (they return None, i.e. "continue normally").
+
+Load shedding is active when forced with PURRPUR_CALLBACK_SHEDDING=1 or
+set_load_shedding(True), or automatically when the API has at least
+PURRPUR_CALLBACK_SHED_INFLIGHT ADK agent runs in flight (0 disables the
+automatic trigger). Only endpoints that run agents count (AGENT_ENDPOINTS);
+/legacy/generate calls the router directly and fires no callbacks.
+"""
+
+import os
+import time
+import inspect
+import logging
+import functools
+import threading
+from typing import Dict, Any, Callable, Optional
+
+from agents import metrics
+
+logger = logging.getLogger(__name__)
+
+BUDGET_MS = float(os.getenv("PURRPUR_CALLBACK_BUDGET_MS", "25"))
+SHED_INFLIGHT = int(os.getenv("PURRPUR_CALLBACK_SHED_INFLIGHT", "0"))
+
+# track_request() labels of the endpoints that run ADK agents (and their callbacks)
+AGENT_ENDPOINTS = ("generate", "generate_stream", "agent", "generate_batch", "jobs")
+
+# None: automatic (in-flight threshold); True/False: forced on/off
+_shedding: Optional[bool] = True if os.getenv("PURRPUR_CALLBACK_SHEDDING") == "1" else None
+
+_stats: Dict[tuple, Dict[str, float]] = {}
+_essential: Dict[str, bool] = {}
+_stats_lock = threading.Lock()
+
+
+def set_load_shedding(enabled: Optional[bool]):
+    """Forces load shedding on/off; None returns to the automatic in-flight trigger."""
+    global _shedding
+    _shedding = enabled
+    logger.info(f"🪫 Load shedding de callbacks: {'automático' if enabled is None else enabled}")
+
+
+def agent_runs_in_flight() -> int:
+    return int(sum(metrics.REQUESTS_IN_FLIGHT.value(endpoint=endpoint) for endpoint in AGENT_ENDPOINTS))
+
+
+def load_shedding_active() -> bool:
+    if _shedding is not None:
+        return _shedding
+    return SHED_INFLIGHT > 0 and agent_runs_in_flight() >= SHED_INFLIGHT
+
+
+def _entry(callback: str, agent: str) -> Dict[str, float]:
+    entry = _stats.get((callback, agent))
+    if entry is None:
+        entry = _stats[(callback, agent)] = {"calls": 0, "total_ms": 0.0, "max_ms": 0.0, "over_budget": 0, "skipped": 0}
+    return entry
+
+
+def _record(callback: str, agent: str, seconds: float, budget_ms: float):
+    elapsed_ms = seconds * 1000
+    over = elapsed_ms > budget_ms
+    with _stats_lock:
+        entry = _entry(callback, agent)
+        entry["calls"] += 1
+        entry["total_ms"] += elapsed_ms
+        entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+        if over:
+            entry["over_budget"] += 1
+    metrics.CALLBACK_LATENCY.observe(seconds, callback=callback, agent=agent)
+    if over:
+        logger.warning(f"🐢 Callback {callback} ({agent}) tardó {elapsed_ms:.1f} ms (presupuesto {budget_ms:.0f} ms)")
+
+
+def _skip(callback: str, agent: str):
+    with _stats_lock:
+        _entry(callback, agent)["skipped"] += 1
+    metrics.CALLBACK_SKIPPED.inc(callback=callback)
+
+
+def profiled(callback: Optional[Callable] = None, *, essential: bool = True, budget_ms: Optional[float] = None):
+    """
+    Wraps an ADK callback (sync or async) with timing, budget warnings and
+    load shedding. Usable as @profiled or @profiled(essential=False).
+
+    Args:
+        essential: False if the callback may be skipped under load shedding
+            (logging-only guardrails).
+        budget_ms: Per-invocation budget; defaults to PURRPUR_CALLBACK_BUDGET_MS.
+    """
+    if callback is None:
+        return functools.partial(profiled, essential=essential, budget_ms=budget_ms)
+
+    name = callback.__name__
+    _essential[name] = essential
+
+    def _agent(args, kwargs) -> str:
+        # ADK passes callback_context (and llm_request/llm_response) as keywords
+        context = kwargs.get("callback_context", args[0] if args else None)
+        return getattr(context, "agent_name", None) or "unknown"
+
+    if inspect.iscoroutinefunction(callback):
+        @functools.wraps(callback)
+        async def async_wrapper(*args, **kwargs):
+            agent = _agent(args, kwargs)
+            if not essential and load_shedding_active():
+                _skip(name, agent)
+                return None
+            start = time.perf_counter()
+            try:
+                return await callback(*args, **kwargs)
+            finally:
+                _record(name, agent, time.perf_counter() - start, budget_ms or BUDGET_MS)
+        return async_wrapper
+
+    @functools.wraps(callback)
+    def wrapper(*args, **kwargs):
+        agent = _agent(args, kwargs)
+        if not essential and load_shedding_active():
+            _skip(name, agent)
+            return None
+        start = time.perf_counter()
+        try:
+            return callback(*args, **kwargs)
+        finally:
+            _record(name, agent, time.perf_counter() - start, budget_ms or BUDGET_MS)
+    return wrapper
+
+
+def callback_stats() -> Dict[str, Any]:
+    """Per callback: essential flag and per-agent calls, avg/max ms, over-budget and skipped counts."""
+    with _stats_lock:
+        items = [(key, dict(entry)) for key, entry in _stats.items()]
+
+    callbacks: Dict[str, Any] = {
+        name: {"essential": essential, "agents": {}} for name, essential in _essential.items()
+    }
+    for (callback, agent), entry in items:
+        entry["avg_ms"] = round(entry["total_ms"] / entry["calls"], 3) if entry["calls"] else 0.0
+        entry["total_ms"] = round(entry["total_ms"], 3)
+        entry["max_ms"] = round(entry["max_ms"], 3)
+        callbacks.setdefault(callback, {"essential": True, "agents": {}})["agents"][agent] = entry
+
+    return {
+        "budget_ms": BUDGET_MS,
+        "load_shedding": load_shedding_active(),
+        "shed_inflight": SHED_INFLIGHT,
+        "agent_runs_in_flight": agent_runs_in_flight(),
+        "callbacks": callbacks,
+    }
@@ -9,9 +9,21 @@ import logging
 from typing import Optional
 from pathlib import Path
 
+from .injection import inject_instruction
+from .keyword_matcher import register_keywords, scan_response
+from .profiler import profiled
+from .workspace_state import get_workspace_state
+
 logger = logging.getLogger(__name__)
 
+register_keywords("build_errors", ["error code", "failed", "npm err", "compilation error"])
+register_keywords("critical", [
+    "critical", "blocker", "security vulnerability",
+    "data loss", "authentication bypass"
+])
+
 
+@profiled
 def validate_tech_context(callback_context, llm_request) -> Optional[dict]:
     """
     Callback 'before_model' para agentes técnicos (CTO, Frontend, Backend).
@@ -31,28 +43,23 @@ def validate_tech_context(callback_context, llm_request) -> Optional[dict]:
         "package.json"
     ]
     
-    missing_docs = [doc for doc in tech_docs if not Path(doc).exists()]
+    missing_docs = get_workspace_state().missing(tech_docs)
     
     if missing_docs:
         logger.warning(f"⚠️ Documentación técnica faltante: {missing_docs}")
         
-        # Inject warning into system instruction
-        system_parts = [
-            part for content in llm_request.contents
-            if content.role == 'system'
-            for part in content.parts
-        ]
-        
-        if system_parts and hasattr(system_parts[0], 'text'):
-            system_parts[0].text += (
-                f"\n\n[SYSTEM NOTE]: Algunos documentos técnicos no están disponibles: "
-                f"{', '.join(missing_docs)}. Trabaja con información general y menciona "
-                "que se necesitarán estos archivos para implementación completa."
-            )
+        # Inject warning into system instruction (once per request)
+        inject_instruction(
+            callback_context, llm_request, "SYSTEM NOTE", "tech_context",
+            f"Algunos documentos técnicos no están disponibles: "
+            f"{', '.join(missing_docs)}. Trabaja con información general y menciona "
+            "que se necesitarán estos archivos para implementación completa."
+        )
     
     return None
 
 
+@profiled(essential=False)
 def validate_build_success(callback_context, llm_response) -> Optional[dict]:
     """
     Callback 'after_model' para agentes de desarrollo.
@@ -67,15 +74,12 @@ def validate_build_success(callback_context, llm_response) -> Optional[dict]:
     """
     # Extract response text
     response_parts = [
-        part.text for content in llm_response.candidates[0].content.parts
+        part.text for part in llm_response.candidates[0].content.parts
         if hasattr(part, 'text') and part.text
     ]
     
-    output = " ".join(response_parts).lower()
-    
     # Check for error indicators
-    error_indicators = ["error code", "failed", "npm err", "compilation error"]
-    has_errors = any(indicator in output for indicator in error_indicators)
+    has_errors = scan_response(llm_response).any("build_errors")
     
     if has_errors:
         logger.error("❌ Build/Command execution detectó errores.")
@@ -92,6 +96,7 @@ def validate_build_success(callback_context, llm_response) -> Optional[dict]:
     return None
 
 
+@profiled
 def block_on_critical_failures(callback_context, llm_response) -> Optional[dict]:
     """
     Callback 'after_model' para QA Testing Agent.
@@ -106,19 +111,12 @@ def block_on_critical_failures(callback_context, llm_response) -> Optional[dict]
     """
     # Extract response text
     response_parts = [
-        part.text for content in llm_response.candidates[0].content.parts
+        part.text for part in llm_response.candidates[0].content.parts
         if hasattr(part, 'text') and part.text
     ]
     
-    output = " ".join(response_parts).lower()
-    
     # Check for critical failures
-    critical_keywords = [
-        "critical", "blocker", "security vulnerability",
-        "data loss", "authentication bypass"
-    ]
-    
-    has_critical = any(keyword in output for keyword in critical_keywords)
+    has_critical = scan_response(llm_response).any("critical")
     
     if has_critical:
         logger.error("⛔ QA GATE: Fallas críticas detectadas. Bloqueando release.")
@@ -0,0 +1,114 @@
+"""
+Tracing callbacks.
+
+Runner-level plugin that records agent turns, model calls and tool calls
+as spans of the trace active for the current run (see agents/tracing.py).
+"""
+
+import json
+import logging
+from typing import Optional, Dict, Any
+
+from google.adk.plugins.base_plugin import BasePlugin
+
+from agents.tracing import current_trace
+
+logger = logging.getLogger(__name__)
+
+
+def _args_size(tool_args: Dict[str, Any]) -> int:
+    try:
+        return len(json.dumps(tool_args, default=str))
+    except Exception:
+        return 0
+
+
+class TracingPlugin(BasePlugin):
+    """Builds the root agent -> director -> subagent -> tool span tree."""
+
+    def __init__(self, name: str = "purrpur_tracing"):
+        super().__init__(name=name)
+
+    async def before_agent_callback(self, *, agent, callback_context) -> Optional[Any]:
+        trace = current_trace()
+        if trace is not None:
+            trace.start_agent(agent.name)
+        return None
+
+    async def after_agent_callback(self, *, agent, callback_context) -> Optional[Any]:
+        trace = current_trace()
+        if trace is not None:
+            trace.end_agent(agent.name)
+        return None
+
+    async def before_model_callback(self, *, callback_context, llm_request) -> Optional[Any]:
+        trace = current_trace()
+        if trace is None:
+            return None
+        agent = callback_context.agent_name
+        parent = trace.agent_span(agent)
+        trace.open_spans[("model", agent)] = trace.start_span(
+            f"llm {llm_request.model}",
+            parent.span_id,
+            **{"agent.name": agent, "gen_ai.request.model": llm_request.model}
+        )
+        return None
+
+    async def after_model_callback(self, *, callback_context, llm_response) -> Optional[Any]:
+        trace = current_trace()
+        if trace is None or getattr(llm_response, "partial", False):
+            return None
+        span = trace.open_spans.pop(("model", callback_context.agent_name), None)
+        if span is None:
+            return None
+        usage = llm_response.usage_metadata
+        span.end(
+            error=llm_response.error_message,
+            **{
+                "gen_ai.usage.input_tokens": usage.prompt_token_count if usage else None,
+                "gen_ai.usage.output_tokens": usage.candidates_token_count if usage else None,
+            }
+        )
+        return None
+
+    async def on_model_error_callback(self, *, callback_context, llm_request, error) -> Optional[Any]:
+        trace = current_trace()
+        if trace is not None:
+            span = trace.open_spans.pop(("model", callback_context.agent_name), None)
+            if span is not None:
+                span.end(error=str(error))
+        return None
+
+    async def before_tool_callback(self, *, tool, tool_args, tool_context) -> Optional[dict]:
+        trace = current_trace()
+        if trace is None:
+            return None
+        parent = trace.agent_span(tool_context.agent_name)
+        trace.open_spans[("tool", tool_context.function_call_id or tool.name)] = trace.start_span(
+            f"tool {tool.name}",
+            parent.span_id,
+            **{
+                "agent.name": tool_context.agent_name,
+                "tool.name": tool.name,
+                "tool.args_size": _args_size(tool_args),
+            }
+        )
+        return None
+
+    async def after_tool_callback(self, *, tool, tool_args, tool_context, result) -> Optional[dict]:
+        trace = current_trace()
+        if trace is None:
+            return None
+        span = trace.open_spans.pop(("tool", tool_context.function_call_id or tool.name), None)
+        if span is not None:
+            status = result.get("status") if isinstance(result, dict) else None
+            span.end(**{"tool.status": status})
+        return None
+
+    async def on_tool_error_callback(self, *, tool, tool_args, tool_context, error) -> Optional[dict]:
+        trace = current_trace()
+        if trace is not None:
+            span = trace.open_spans.pop(("tool", tool_context.function_call_id or tool.name), None)
+            if span is not None:
+                span.end(error=str(error))
+        return None
@@ -0,0 +1,119 @@
+"""
+Workspace state shared by the before_model callbacks.
+
+The guardrails check that project docs (docs/DESIGN-SYSTEM.md,
+docs/BRAND.md, package.json, the delegation template) exist before every
+model call of every agent. Paths are resolved against the project root,
+not the process CWD, and existence answers are cached per directory:
+
+- within PURRPUR_WORKSPACE_STAT_TTL seconds answers come from memory;
+- after that one stat of the parent directory revalidates every cached
+  entry in it (creating, deleting or renaming a file changes the
+  directory mtime), and only a changed directory drops its entries.
+
+So a long delegation chain costs one directory stat per TTL instead of
+one stat per file per model call.
+"""
+
+import os
+import time
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(os.getenv("PURRPUR_PROJECT_ROOT") or Path(__file__).resolve().parent.parent.parent)
+STAT_TTL = float(os.getenv("PURRPUR_WORKSPACE_STAT_TTL", "2.0"))
+
+# A directory modified this recently may change again within the same
+# mtime tick (coarse-grained filesystems), so its mtime is not trusted yet
+RACY_WINDOW = 2.0
+
+
+class WorkspaceState:
+    """Cached file-existence probes relative to the project root."""
+
+    def __init__(self, root: Path = PROJECT_ROOT, ttl: float = STAT_TTL):
+        self.root = Path(root).resolve()
+        self.ttl = ttl
+        # directory -> (mtime_ns or None if missing, monotonic time of last check)
+        self._dirs: Dict[Path, Tuple[Optional[int], float]] = {}
+        self._entries: Dict[Path, bool] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stat_calls = 0
+
+    def resolve(self, path) -> Path:
+        path = Path(path)
+        return path if path.is_absolute() else self.root / path
+
+    def _stat_dir(self, directory: Path) -> Optional[int]:
+        self.stat_calls += 1
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            return None
+        if time.time() - mtime / 1e9 < RACY_WINDOW:
+            return -1  # never equal to itself: forces a recheck next time
+        return mtime
+
+    def _revalidate(self, directory: Path, now: float):
+        cached = self._dirs.get(directory)
+        if cached is not None and now - cached[1] < self.ttl:
+            return
+        mtime = self._stat_dir(directory)
+        if cached is None or mtime != cached[0] or mtime == -1:
+            for path in [p for p in self._entries if p.parent == directory]:
+                del self._entries[path]
+        self._dirs[directory] = (mtime, now)
+
+    def exists(self, path) -> bool:
+        target = self.resolve(path)
+        directory = target.parent
+        with self._lock:
+            self._revalidate(directory, time.monotonic())
+            cached = self._entries.get(target)
+            if cached is not None:
+                self.hits += 1
+                return cached
+            self.misses += 1
+            if self._dirs[directory][0] is None:
+                result = False
+            else:
+                self.stat_calls += 1
+                result = target.exists()
+            self._entries[target] = result
+            return result
+
+    def missing(self, paths: Iterable[str]) -> List[str]:
+        """The given paths (as passed in) that do not exist."""
+        return [path for path in paths if not self.exists(path)]
+
+    def invalidate(self):
+        with self._lock:
+            self._dirs.clear()
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "root": str(self.root),
+                "ttl": self.ttl,
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "stat_calls": self.stat_calls,
+            }
+
+
+_state: Optional[WorkspaceState] = None
+
+
+def get_workspace_state() -> WorkspaceState:
+    global _state
+    if _state is None:
+        _state = WorkspaceState()
+    return _state
@@ -0,0 +1,167 @@
+"""
+Image handling for the router's vision calls.
+
+Uploaded screenshots are kept as one bytes buffer, downsampled and
+recompressed to the resolution the vision provider actually uses (larger
+images are resized server-side anyway and only cost tokens), and
+base64-encoded once, at the provider wire boundary.
+
+Resizing needs the optional Pillow package; without it images are passed
+through unchanged and only their header is parsed for dimensions.
+"""
+
+import base64
+import struct
+import logging
+from io import BytesIO
+from functools import cached_property
+from typing import Dict, Any, Optional, Tuple
+
+from agents.routing import estimate_image_tokens
+
+logger = logging.getLogger(__name__)
+
+# Anthropic: images beyond ~1.15 megapixels or 1568px on the long edge are
+# downscaled by the API before the model sees them
+MAX_EDGE = 1568
+MAX_PIXELS = 1_150_000
+
+MEDIA_TYPES = {"PNG": "image/png", "JPEG": "image/jpeg", "GIF": "image/gif", "WEBP": "image/webp"}
+
+
+class ImageError(ValueError):
+    """Raised for unreadable or unsupported image data."""
+
+
+def _jpeg_size(data: bytes) -> Tuple[int, int]:
+    i = 2
+    while i + 9 < len(data):
+        if data[i] != 0xFF:
+            i += 1
+            continue
+        marker = data[i + 1]
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            height, width = struct.unpack(">HH", data[i + 5:i + 9])
+            return width, height
+        length = struct.unpack(">H", data[i + 2:i + 4])[0]
+        i += 2 + length
+    raise ImageError("JPEG without a frame header")
+
+
+def sniff_image(data: bytes) -> Tuple[str, int, int]:
+    """Returns (media_type, width, height) from the image header, without decoding pixels."""
+    if data[:8] == b"\x89PNG\r\n\x1a\n" and len(data) >= 24:
+        width, height = struct.unpack(">II", data[16:24])
+        return "image/png", width, height
+    if data[:3] == b"\xff\xd8\xff":
+        width, height = _jpeg_size(data)
+        return "image/jpeg", width, height
+    if data[:6] in (b"GIF87a", b"GIF89a") and len(data) >= 10:
+        width, height = struct.unpack("<HH", data[6:10])
+        return "image/gif", width, height
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP" and len(data) >= 30:
+        chunk = data[12:16]
+        if chunk == b"VP8 ":
+            width, height = struct.unpack("<HH", data[26:30])
+            return "image/webp", width & 0x3FFF, height & 0x3FFF
+        if chunk == b"VP8L":
+            bits = int.from_bytes(data[21:25], "little")
+            return "image/webp", (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        if chunk == b"VP8X":
+            width = int.from_bytes(data[24:27], "little") + 1
+            height = int.from_bytes(data[27:30], "little") + 1
+            return "image/webp", width, height
+    raise ImageError("Unsupported image format (expected PNG, JPEG, GIF or WEBP)")
+
+
+def target_size(width: int, height: int, max_edge: int = MAX_EDGE, max_pixels: int = MAX_PIXELS) -> Tuple[int, int]:
+    """Largest size with the same aspect ratio inside the provider limits."""
+    scale = min(1.0, max_edge / max(width, height), (max_pixels / (width * height)) ** 0.5)
+    return max(1, int(width * scale)), max(1, int(height * scale))
+
+
+class PreparedImage:
+    """An image ready for a vision call: one bytes buffer plus its size and token cost."""
+
+    def __init__(self, data: bytes, media_type: str, width: int, height: int, original_bytes: int):
+        self.data = data
+        self.media_type = media_type
+        self.width = width
+        self.height = height
+        self.original_bytes = original_bytes
+        # Billed at the size the provider actually processes
+        self.tokens = estimate_image_tokens(*target_size(width, height))
+
+    @cached_property
+    def base64(self) -> str:
+        """Base64 payload for the provider request (encoded once, on first use)."""
+        return base64.b64encode(self.data).decode("ascii")
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "media_type": self.media_type,
+            "width": self.width,
+            "height": self.height,
+            "bytes": len(self.data),
+            "original_bytes": self.original_bytes,
+            "tokens": self.tokens,
+        }
+
+
+def _recompress(data: bytes, size: Tuple[int, int]) -> Optional[Tuple[bytes, str]]:
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+
+    with Image.open(BytesIO(data)) as img:
+        fmt = img.format
+        if img.size != size:
+            img = img.resize(size, Image.LANCZOS)
+        out = BytesIO()
+        if fmt == "JPEG":
+            img.convert("RGB").save(out, "JPEG", quality=85, optimize=True)
+        elif fmt == "WEBP":
+            img.save(out, "WEBP", quality=85)
+        else:
+            # Screenshots: lossless keeps text and edges crisp
+            fmt = "PNG"
+            img.save(out, "PNG", optimize=True)
+    return out.getvalue(), MEDIA_TYPES[fmt]
+
+
+def prepare_image(data: bytes, max_edge: int = MAX_EDGE, max_pixels: int = MAX_PIXELS) -> PreparedImage:
+    """
+    Downsamples/recompresses an image to the provider's optimal resolution.
+
+    Args:
+        data: Raw image bytes (PNG, JPEG, GIF or WEBP).
+
+    Returns:
+        PreparedImage with the (possibly re-encoded) bytes and token cost.
+
+    Raises:
+        ImageError: If the data is not a supported image.
+    """
+    if not data:
+        raise ImageError("Empty image")
+    media_type, width, height = sniff_image(data)
+    if width <= 0 or height <= 0:
+        raise ImageError(f"Invalid image dimensions {width}x{height}")
+    size = target_size(width, height, max_edge, max_pixels)
+
+    try:
+        result = _recompress(data, size)
+    except Exception as e:
+        raise ImageError(f"Could not decode image: {e}")
+
+    if result is None:
+        if size != (width, height):
+            logger.warning("⚠️ Pillow no instalado: la imagen se envía sin redimensionar")
+        return PreparedImage(data, media_type, width, height, len(data))
+
+    new_data, new_type = result
+    if size == (width, height) and len(new_data) >= len(data):
+        # Nothing gained by re-encoding
+        return PreparedImage(data, media_type, width, height, len(data))
+    return PreparedImage(new_data, new_type, size[0], size[1], len(data))
@@ -0,0 +1,279 @@
+"""
+Background job queue for long agent runs.
+
+Jobs are persisted in a local SQLite database and executed by a bounded
+pool of asyncio workers, so clients can submit a run, poll its status and
+optionally receive a completion webhook instead of holding a connection open.
+SQLite calls run in worker threads (asyncio.to_thread) and webhooks are
+delivered by their own tasks, so neither the disk nor a slow receiver
+blocks the event loop or a worker slot.
+
+Webhooks are only sent to http(s) URLs whose host is listed in
+PURRPUR_JOB_WEBHOOK_HOSTS (comma-separated; ".example.com" also allows its
+subdomains). With the list empty, webhook_url is rejected.
+"""
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import asyncio
+import logging
+import threading
+from pathlib import Path
+from urllib.parse import urlsplit
+from typing import Dict, Any, Optional, Callable, Awaitable
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = os.getenv("PURRPUR_JOBS_DB", str(Path(__file__).parent / "jobs.db"))
+DEFAULT_WORKERS = int(os.getenv("PURRPUR_JOB_WORKERS", "4"))
+DEFAULT_MAX_PENDING = int(os.getenv("PURRPUR_JOB_MAX_PENDING", "100"))
+WEBHOOK_TIMEOUT = float(os.getenv("PURRPUR_JOB_WEBHOOK_TIMEOUT", "10"))
+WEBHOOK_ALLOWED_HOSTS = [
+    host.strip().lower() for host in os.getenv("PURRPUR_JOB_WEBHOOK_HOSTS", "").split(",") if host.strip()
+]
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    webhook_url TEXT,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+)
+"""
+
+
+class QueueFullError(Exception):
+    """Raised when the queue is at capacity and a new job is rejected."""
+
+
+class WebhookNotAllowedError(ValueError):
+    """Raised when a webhook URL is not http(s) or its host is not allowlisted."""
+
+
+def check_webhook_url(url: str) -> None:
+    """Raises WebhookNotAllowedError unless url may receive job notifications."""
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise WebhookNotAllowedError("Webhook URL must be an absolute http(s) URL")
+    host = parts.hostname.lower()
+    for allowed in WEBHOOK_ALLOWED_HOSTS:
+        if host == allowed.lstrip(".") or (allowed.startswith(".") and host.endswith(allowed)):
+            return
+    raise WebhookNotAllowedError(f"Webhook host '{host}' is not in PURRPUR_JOB_WEBHOOK_HOSTS")
+
+
+class JobStore:
+    """SQLite persistence for job records (safe to share across threads)."""
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(_SCHEMA)
+
+    def create(self, payload: Dict[str, Any], priority: int, webhook_url: Optional[str]) -> str:
+        job_id = uuid.uuid4().hex
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, priority, payload, webhook_url, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, QUEUED, priority, json.dumps(payload), webhook_url, time.time())
+            )
+        return job_id
+
+    def update(self, job_id: str, **fields) -> None:
+        for key in ("result", "payload"):
+            if key in fields and fields[key] is not None:
+                fields[key] = json.dumps(fields[key], default=str)
+        columns = ", ".join(f"{key} = ?" for key in fields)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id)
+            )
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def pending(self):
+        """Returns (id, priority) of jobs that were queued or interrupted mid-run."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, priority FROM jobs WHERE status IN (?, ?) ORDER BY created_at",
+                (QUEUED, RUNNING)
+            ).fetchall()
+        return [(row["id"], row["priority"]) for row in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class JobQueue:
+    """
+    Priority queue + bounded worker pool over a JobStore.
+
+    Lower priority values run first. When `max_pending` jobs are waiting,
+    new submissions are rejected with QueueFullError (admission control).
+    The store is opened in start() (not at construction), so importing the
+    API doesn't touch the database.
+    """
+
+    def __init__(
+        self,
+        execute: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]],
+        store: Optional[JobStore] = None,
+        workers: int = DEFAULT_WORKERS,
+        max_pending: int = DEFAULT_MAX_PENDING,
+        db_path: str = DEFAULT_DB_PATH
+    ):
+        self.execute = execute
+        self.store = store
+        self.db_path = store.db_path if store is not None else db_path
+        self.workers = workers
+        self.max_pending = max_pending
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._tasks = []
+        self._seq = 0
+        # job_id -> (priority, seq) of jobs waiting for a worker
+        self._waiting: Dict[str, tuple] = {}
+        # Submissions past admission whose row is still being written
+        self._admitting = 0
+        self._deliveries: set = set()
+
+    def _enqueue(self, job_id: str, priority: int) -> None:
+        self._seq += 1
+        self._waiting[job_id] = (priority, self._seq)
+        self._queue.put_nowait((priority, self._seq, job_id))
+
+    async def start(self) -> None:
+        if self.store is None:
+            self.store = await asyncio.to_thread(JobStore, self.db_path)
+        self._queue = asyncio.PriorityQueue()
+        self._waiting = {}
+        recovered = await asyncio.to_thread(self.store.pending)
+        for job_id, priority in recovered:
+            await asyncio.to_thread(self.store.update, job_id, status=QUEUED, started_at=None)
+            self._enqueue(job_id, priority)
+        if recovered:
+            logger.info(f"♻️ {len(recovered)} jobs recuperados de {self.store.db_path}")
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # Webhooks still in flight get the rest of their timeout, then are dropped
+        if self._deliveries:
+            await asyncio.wait(self._deliveries, timeout=WEBHOOK_TIMEOUT)
+            for task in self._deliveries:
+                task.cancel()
+        if self.store is not None:
+            await asyncio.to_thread(self.store.close)
+            self.store = None
+
+    async def submit(self, payload: Dict[str, Any], priority: int = 5, webhook_url: Optional[str] = None) -> str:
+        if self._queue is None:
+            raise RuntimeError("Job queue not started")
+        if webhook_url is not None:
+            check_webhook_url(webhook_url)
+        if self._queue.qsize() + self._admitting >= self.max_pending:
+            raise QueueFullError(f"Job queue is full ({self.max_pending} pending)")
+        self._admitting += 1
+        try:
+            job_id = await asyncio.to_thread(self.store.create, payload, priority, webhook_url)
+        finally:
+            self._admitting -= 1
+        self._enqueue(job_id, priority)
+        return job_id
+
+    def position(self, job_id: str) -> Optional[int]:
+        """Jobs that will run before this one (0 = next), or None if it isn't waiting."""
+        key = self._waiting.get(job_id)
+        if key is None:
+            return None
+        return sum(1 for other in self._waiting.values() if other < key)
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        if self.store is None:
+            raise RuntimeError("Job queue not started")
+        job = await asyncio.to_thread(self.store.get, job_id)
+        if job is not None and job["status"] == QUEUED:
+            job["queue_position"] = self.position(job_id)
+        return job
+
+    async def _worker(self, worker_id: int) -> None:
+        while True:
+            _, _, job_id = await self._queue.get()
+            self._waiting.pop(job_id, None)
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                logger.error(f"❌ Worker {worker_id} falló con job {job_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str) -> None:
+        store = self.store
+        job = await asyncio.to_thread(store.get, job_id)
+        if job is None or job["status"] != QUEUED:
+            return
+
+        await asyncio.to_thread(store.update, job_id, status=RUNNING, started_at=time.time())
+        try:
+            result = await self.execute(job["payload"])
+            await asyncio.to_thread(store.update, job_id, status=SUCCEEDED, result=result, finished_at=time.time())
+        except asyncio.CancelledError:
+            # Server shutting down: leave it as running so start() requeues it
+            raise
+        except Exception as e:
+            await asyncio.to_thread(store.update, job_id, status=FAILED, error=str(e), finished_at=time.time())
+
+        if job["webhook_url"]:
+            # Delivered on its own task: the worker moves on to the next job
+            task = asyncio.create_task(self._notify(await asyncio.to_thread(store.get, job_id)))
+            self._deliveries.add(task)
+            task.add_done_callback(self._deliveries.discard)
+
+    async def _notify(self, job: Dict[str, Any]) -> None:
+        import httpx
+        try:
+            # Re-checked at send time: recovered jobs may predate the current allowlist
+            check_webhook_url(job["webhook_url"])
+            async with httpx.AsyncClient(timeout=WEBHOOK_TIMEOUT) as client:
+                # Overall cap: httpx's timeout is per read, a slow-drip receiver could outlast it
+                r = await asyncio.wait_for(
+                    client.post(
+                        job["webhook_url"],
+                        content=json.dumps(job, default=str),
+                        headers={"Content-Type": "application/json"}
+                    ),
+                    WEBHOOK_TIMEOUT
+                )
+                r.raise_for_status()
+        except Exception as e:
+            logger.warning(f"⚠️ Webhook de job {job['id']} falló: {str(e) or type(e).__name__}")
@@ -0,0 +1,128 @@
+"""
+JSX/TSX syntax validation for the Gate-1 auditor.
+
+Parses generated components with tree-sitter's TSX grammar in-process
+(no node/npm round-trip) and reports syntax errors and mismatched
+opening/closing tags. Results are cached by content hash, so the same
+generation is only parsed once.
+
+Needs the optional `tree-sitter` and `tree-sitter-typescript` packages;
+without them validate_jsx() returns None and the auditor keeps its
+heuristic check.
+"""
+
+import os
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PARSER_ENABLED = os.getenv("PURRPUR_JSX_PARSER", "1") == "1"
+CACHE_SIZE = int(os.getenv("PURRPUR_JSX_CACHE_SIZE", "4096"))
+MAX_REPORTED_ERRORS = 5
+
+_local = threading.local()
+_language = None
+_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _load_language():
+    global _language
+    if _language is None:
+        try:
+            import tree_sitter_typescript
+            from tree_sitter import Language
+            _language = Language(tree_sitter_typescript.language_tsx())
+        except Exception as e:
+            logger.info(f"JSX parser not available ({e}); using heuristic JSX check")
+            _language = False
+    return _language
+
+
+def _parser():
+    """Per-thread parser (tree-sitter parsers must not be shared across threads)."""
+    parser = getattr(_local, "parser", None)
+    if parser is None:
+        from tree_sitter import Parser
+        parser = _local.parser = Parser(_load_language())
+    return parser
+
+
+def available() -> bool:
+    return PARSER_ENABLED and bool(_load_language())
+
+
+def _position(node) -> str:
+    row, column = node.start_point
+    return f"{row + 1}:{column + 1}"
+
+
+def _tag_name(node, source: bytes) -> str:
+    name = node.child_by_field_name("name")
+    return source[name.start_byte:name.end_byte].decode("utf-8", "replace") if name else ""
+
+
+def _find_errors(tree, source: bytes) -> List[str]:
+    """Syntax errors, missing tokens and mismatched JSX tags (first few, in order)."""
+    errors = []
+    cursor = tree.walk()
+    visited_children = False
+    while len(errors) < MAX_REPORTED_ERRORS:
+        node = cursor.node
+        if not visited_children:
+            if node.is_error:
+                errors.append(f"syntax error at {_position(node)}")
+            elif node.is_missing:
+                errors.append(f"missing '{node.type}' at {_position(node)}")
+            elif node.type == "jsx_element":
+                opening = node.child_by_field_name("open_tag")
+                closing = node.child_by_field_name("close_tag")
+                if opening is not None and closing is not None:
+                    open_name, close_name = _tag_name(opening, source), _tag_name(closing, source)
+                    if open_name != close_name:
+                        errors.append(
+                            f"<{open_name}> at {_position(opening)} closed by </{close_name}> at {_position(closing)}"
+                        )
+            if cursor.goto_first_child():
+                continue
+        if cursor.goto_next_sibling():
+            visited_children = False
+            continue
+        if not cursor.goto_parent():
+            break
+        visited_children = True
+    return errors
+
+
+def validate_jsx(code: str) -> Optional[Dict[str, Any]]:
+    """
+    Parses a component as TSX.
+
+    Returns:
+        {"valid": bool, "errors": [...], "backend": "tree-sitter", "cached": bool},
+        or None when no parser is available.
+    """
+    if not available():
+        return None
+
+    source = code.encode("utf-8")
+    key = hashlib.sha256(source).hexdigest()
+    with _cache_lock:
+        result = _cache.get(key)
+        if result is not None:
+            _cache.move_to_end(key)
+            return {**result, "cached": True}
+
+    tree = _parser().parse(source)
+    errors = _find_errors(tree, source)
+    result = {"valid": not errors, "errors": errors, "backend": "tree-sitter"}
+
+    with _cache_lock:
+        _cache[key] = result
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return {**result, "cached": False}
@@ -0,0 +1,124 @@
+"""
+After_model keyword matching benchmark.
+
+Times the four keyword callbacks' matching on ~100 KB responses:
+
+- legacy: every callback joins and lowercases the response, then loops
+  `any(kw in output ...)` over its own list (four passes per response);
+- shared: one scan_response() per response, consumed by all callbacks;
+- shared (cached): the three callbacks after the first reuse the scan.
+
+Usage:
+    python -m agents.keyword_benchmark
+    python -m agents.keyword_benchmark --size 500000 --repeat 20
+"""
+
+import time
+import random
+import argparse
+from types import SimpleNamespace
+from typing import Dict, Callable, List
+
+import agents.callbacks  # noqa: F401  (registers every callback's keyword set)
+from agents.callbacks import keyword_matcher
+from agents.callbacks.keyword_matcher import KeywordMatcher, registered_sets
+
+WORDS = (
+    "the component renders a responsive layout with tailwind classes and a dark mode "
+    "toggle while the build step bundles assets for production deployment"
+).split()
+
+PART_SIZE = 4096
+
+
+def _prose(size: int, extra: List[str] = (), rate: float = 0.0, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    words, length = [], 0
+    while length < size:
+        word = rng.choice(extra) if extra and rng.random() < rate else rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)[:size]
+
+
+def _keywords() -> List[str]:
+    return sorted({kw for keywords in registered_sets().values() for kw in keywords})
+
+
+# name -> builder(size) for each response text
+INPUTS: Dict[str, Callable[[int], str]] = {
+    "no_matches": lambda n: _prose(n),
+    "sparse_matches": lambda n: _prose(n, _keywords(), 0.001),
+    "dense_matches": lambda n: _prose(n, _keywords(), 0.05),
+    "unicode": lambda n: _prose(n, ["diseño", "página", "órbita", "🚀"], 0.1),
+}
+
+
+def _response(text: str):
+    parts = [SimpleNamespace(text=text[i:i + PART_SIZE]) for i in range(0, len(text), PART_SIZE)]
+    return SimpleNamespace(candidates=[SimpleNamespace(content=SimpleNamespace(parts=parts))])
+
+
+def _legacy(response) -> Dict[str, bool]:
+    result = {}
+    for name, keywords in registered_sets().items():
+        parts = [part.text for part in response.candidates[0].content.parts if part.text]
+        output = " ".join(parts).lower()
+        result[name] = any(kw in output for kw in keywords)
+    return result
+
+
+def _shared(response) -> Dict[str, bool]:
+    keyword_matcher._cache.clear()
+    matches = keyword_matcher.scan_response(response)
+    return {name: matches.any(name) for name in registered_sets()}
+
+
+def _cached(response) -> Dict[str, bool]:
+    matches = keyword_matcher.scan_response(response)
+    return {name: matches.any(name) for name in registered_sets()}
+
+
+def _time(fn: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(size: int, repeat: int = 10) -> Dict[str, Dict[str, float]]:
+    """Returns input name -> {variant: seconds} (best of `repeat`)."""
+    results = {}
+    for name, build in INPUTS.items():
+        response = _response(build(size))
+        legacy = _legacy(response)
+        if _shared(response) != legacy:
+            raise AssertionError(f"{name}: shared matcher disagrees with the legacy checks")
+        results[name] = {
+            "legacy": _time(lambda: _legacy(response), repeat),
+            "shared": _time(lambda: _shared(response), repeat),
+            "shared (cached)": _time(lambda: _cached(response), repeat),
+        }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the shared after_model keyword matcher")
+    parser.add_argument("--size", type=int, default=100_000, help="Response size in characters")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    results = run(args.size, args.repeat)
+    backend = KeywordMatcher(registered_sets()).backend
+
+    print("\n" + "=" * 60)
+    print(f"KEYWORD MATCHER BENCHMARK  ({args.size / 1000:.0f} KB, backend: {backend})")
+    print("=" * 60)
+    for name, variants in results.items():
+        print(f"\n{name}")
+        for variant, seconds in variants.items():
+            speedup = variants["legacy"] / max(seconds, 1e-12)
+            print(f"  {variant:16s} {seconds * 1000:8.3f} ms  x{speedup:.1f}")
+    print("=" * 60 + "\n")
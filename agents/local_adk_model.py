@@ -0,0 +1,70 @@
+"""
+ADK model backed by the local stand-in engine (see agents/local_llm.py).
+
+Used for every agent in the tree when PURRPUR_LLM_PROVIDER=local, so the
+API and runner path can be load-tested without Gemini keys.
+"""
+
+from typing import AsyncGenerator
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+from agents.local_llm import get_engine
+from agents.routing import estimate_tokens
+
+
+def _prompt_of(llm_request: LlmRequest) -> str:
+    for content in reversed(llm_request.contents or []):
+        if content.role == "user" and content.parts:
+            text = "".join(part.text or "" for part in content.parts)
+            if text:
+                return text
+    return ""
+
+
+class LocalLlm(BaseLlm):
+    """Serves canned/templated completions with simulated latency and token rate."""
+
+    @classmethod
+    def supported_models(cls) -> list[str]:
+        return [r"local/.*"]
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        engine = get_engine()
+        prompt = _prompt_of(llm_request)
+        max_tokens = 1500
+        if llm_request.config and llm_request.config.max_output_tokens:
+            max_tokens = llm_request.config.max_output_tokens
+
+        if stream:
+            chunks = []
+            async for text in engine.stream(prompt, self.model, max_tokens):
+                chunks.append(text)
+                yield LlmResponse(
+                    content=types.Content(role="model", parts=[types.Part(text=text)]),
+                    partial=True
+                )
+            text = "".join(chunks)
+        else:
+            text = (await engine.complete(prompt, self.model, max_tokens))["text"]
+
+        input_tokens = estimate_tokens(prompt)
+        output_tokens = estimate_tokens(text)
+        yield LlmResponse(
+            content=types.Content(role="model", parts=[types.Part(text=text)]),
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=input_tokens,
+                candidates_token_count=output_tokens,
+                total_token_count=input_tokens + output_tokens,
+            )
+        )
+
+
+def local_model(model: str) -> LocalLlm:
+    """LocalLlm standing in for `model` (keeps the configured name for metrics)."""
+    return LocalLlm(model=f"local/{model}")
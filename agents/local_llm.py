@@ -0,0 +1,285 @@
+"""
+Local stand-in LLM provider for offline load testing.
+
+Serves canned or templated completions with a configurable latency
+distribution and token rate, over OpenAI- and Anthropic-compatible HTTP
+endpoints (non-streaming and SSE), so the router and the API can be
+benchmarked without Groq/Anthropic/Gemini keys.
+
+Run the server:
+    python -m agents.local_llm --port 8088
+
+Point the stack at it:
+    PURRPUR_LLM_PROVIDER=local PURRPUR_LOCAL_LLM_URL=http://127.0.0.1:8088
+    (leave PURRPUR_RESPONSE_CACHE unset: with the cache on, repeated prompts never reach the provider)
+
+With PURRPUR_LLM_PROVIDER=local the router sends Groq/Anthropic calls to
+the server and the ADK agent tree uses LocalLlm (agents/local_adk_model.py),
+which runs the same engine in-process.
+
+Configuration (env):
+    PURRPUR_LOCAL_LATENCY      time to first token: "fixed:0.2",
+                               "uniform:0.1,0.5" or "lognormal:0.4,0.5"
+                               (median seconds, sigma); default lognormal:0.3,0.4
+    PURRPUR_LOCAL_TOKEN_RATE   output tokens per second (default 200)
+    PURRPUR_LOCAL_RESPONSES    JSON file: [{"match": "<regex>", "response": "<template>"}]
+    PURRPUR_LOCAL_SEED         seed for the latency draws (default 0); a run
+                               replays the same delays in the same request order
+
+Templates may use {prompt}, {model} and {prompt_tokens}.
+"""
+
+import os
+import re
+import json
+import math
+import time
+import uuid
+import random
+import asyncio
+import logging
+import argparse
+from typing import Dict, Any, List, Optional, AsyncIterator, Tuple
+
+from agents.routing import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+PROVIDER = os.getenv("PURRPUR_LLM_PROVIDER", "").lower()
+LOCAL_ENABLED = PROVIDER == "local"
+LOCAL_URL = os.getenv("PURRPUR_LOCAL_LLM_URL", "http://127.0.0.1:8088").rstrip("/")
+
+DEFAULT_RESPONSE = """export default function Component() {
+  return (
+    <div className="flex min-h-screen items-center justify-center bg-white dark:bg-gray-900">
+      <div className="p-6 rounded-lg shadow bg-gray-100 dark:bg-gray-800">
+        <h1 className="text-xl font-bold text-gray-900 dark:text-white">Local stand-in</h1>
+        <p className="mt-2 text-gray-600 dark:text-gray-300">{prompt_tokens} prompt tokens</p>
+      </div>
+    </div>
+  );
+}
+"""
+
+
+def parse_latency(spec: str) -> Tuple[str, List[float]]:
+    """Parses "kind:a,b" into (kind, [a, b])."""
+    kind, _, args = spec.partition(":")
+    kind = kind.strip().lower()
+    values = [float(v) for v in args.split(",") if v.strip()]
+    expected = {"fixed": 1, "uniform": 2, "lognormal": 2}
+    if kind not in expected or len(values) != expected[kind]:
+        raise ValueError(f"Invalid latency spec '{spec}' (use fixed:s, uniform:a,b or lognormal:median,sigma)")
+    return kind, values
+
+
+class CompletionEngine:
+    """Picks a response for a prompt and paces it like a real provider."""
+
+    def __init__(
+        self,
+        latency: str = os.getenv("PURRPUR_LOCAL_LATENCY", "lognormal:0.3,0.4"),
+        token_rate: float = float(os.getenv("PURRPUR_LOCAL_TOKEN_RATE", "200")),
+        responses_path: Optional[str] = os.getenv("PURRPUR_LOCAL_RESPONSES"),
+        seed: int = int(os.getenv("PURRPUR_LOCAL_SEED", "0"))
+    ):
+        self.latency_kind, self.latency_args = parse_latency(latency)
+        self.token_rate = token_rate
+        self.seed = seed
+        # One stream of draws per engine: reproducible for a given seed and
+        # request order, while repeats of a prompt still sample the distribution
+        self.rng = random.Random(seed)
+        self.responses: List[Tuple[re.Pattern, str]] = []
+        if responses_path:
+            with open(responses_path, "r", encoding="utf-8") as f:
+                for entry in json.load(f):
+                    self.responses.append((re.compile(entry.get("match", ".*"), re.S), entry["response"]))
+
+    def first_token_delay(self) -> float:
+        if self.latency_kind == "fixed":
+            return self.latency_args[0]
+        if self.latency_kind == "uniform":
+            return self.rng.uniform(*self.latency_args)
+        median, sigma = self.latency_args
+        return self.rng.lognormvariate(math.log(median), sigma)
+
+    def render(self, prompt: str, model: str) -> str:
+        template = DEFAULT_RESPONSE
+        for pattern, response in self.responses:
+            if pattern.search(prompt):
+                template = response
+                break
+        values = {"prompt": prompt, "model": model, "prompt_tokens": estimate_tokens(prompt)}
+        return re.sub(r"\{(prompt|model|prompt_tokens)\}", lambda m: str(values[m.group(1)]), template)
+
+    def completion(self, prompt: str, model: str, max_tokens: int) -> Dict[str, Any]:
+        """Returns {"text", "input_tokens", "output_tokens"} truncated to max_tokens (~4 chars/token)."""
+        text = self.render(prompt, model)
+        if estimate_tokens(text) > max_tokens:
+            text = text[:max_tokens * 4]
+        return {
+            "text": text,
+            "input_tokens": estimate_tokens(prompt),
+            "output_tokens": estimate_tokens(text),
+        }
+
+    async def complete(self, prompt: str, model: str, max_tokens: int = 1500) -> Dict[str, Any]:
+        result = self.completion(prompt, model, max_tokens)
+        await asyncio.sleep(self.first_token_delay() + result["output_tokens"] / self.token_rate)
+        return result
+
+    async def stream(self, prompt: str, model: str, max_tokens: int = 1500) -> AsyncIterator[str]:
+        """Yields ~one token (4 chars) per chunk at token_rate after the first-token delay."""
+        result = self.completion(prompt, model, max_tokens)
+        await asyncio.sleep(self.first_token_delay())
+        text = result["text"]
+        start = time.perf_counter()
+        for i, offset in enumerate(range(0, len(text), 4)):
+            # Pace against the wall clock so slow consumers don't drift the rate
+            delay = start + i / self.token_rate - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            yield text[offset:offset + 4]
+
+
+_engine: Optional[CompletionEngine] = None
+
+
+def get_engine() -> CompletionEngine:
+    global _engine
+    if _engine is None:
+        _engine = CompletionEngine()
+    return _engine
+
+
+def _sse(data: Dict[str, Any], event: Optional[str] = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+def _text_content(content: Any) -> str:
+    """Flattens OpenAI/Anthropic message content (string or typed parts) to text."""
+    if isinstance(content, str):
+        return content
+    return "".join(part.get("text", "") for part in content or [] if isinstance(part, dict))
+
+
+def create_app():
+    """FastAPI app exposing /openai/v1/chat/completions and /anthropic/v1/messages."""
+    from fastapi import FastAPI, Request
+    from fastapi.responses import StreamingResponse
+
+    app = FastAPI(title="Purrpur local LLM")
+
+    @app.get("/")
+    async def health():
+        engine = get_engine()
+        return {
+            "status": "healthy",
+            "latency": f"{engine.latency_kind}:{','.join(map(str, engine.latency_args))}",
+            "token_rate": engine.token_rate,
+            "canned_responses": len(engine.responses),
+        }
+
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        model = body.get("model", "local")
+        prompt = "\n".join(_text_content(m.get("content")) for m in body.get("messages", []))
+        max_tokens = body.get("max_tokens") or 1500
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        engine = get_engine()
+
+        if not body.get("stream"):
+            result = await engine.complete(prompt, model, max_tokens)
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": result["text"]},
+                    "finish_reason": "stop",
+                }],
+                "usage": {
+                    "prompt_tokens": result["input_tokens"],
+                    "completion_tokens": result["output_tokens"],
+                    "total_tokens": result["input_tokens"] + result["output_tokens"],
+                },
+            }
+
+        async def events():
+            chunk = {"id": completion_id, "object": "chat.completion.chunk", "model": model}
+            yield _sse({**chunk, "choices": [{"index": 0, "delta": {"role": "assistant"}}]})
+            output_tokens = 0
+            async for text in engine.stream(prompt, model, max_tokens):
+                output_tokens += 1
+                yield _sse({**chunk, "choices": [{"index": 0, "delta": {"content": text}}]})
+            yield _sse({**chunk, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+            if (body.get("stream_options") or {}).get("include_usage"):
+                input_tokens = estimate_tokens(prompt)
+                yield _sse({**chunk, "choices": [], "usage": {
+                    "prompt_tokens": input_tokens,
+                    "completion_tokens": output_tokens,
+                    "total_tokens": input_tokens + output_tokens,
+                }})
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.post("/anthropic/v1/messages")
+    async def messages(request: Request):
+        body = await request.json()
+        model = body.get("model", "local")
+        prompt = "\n".join(_text_content(m.get("content")) for m in body.get("messages", []))
+        max_tokens = body.get("max_tokens") or 1500
+        message_id = f"msg_{uuid.uuid4().hex}"
+        engine = get_engine()
+
+        if not body.get("stream"):
+            result = await engine.complete(prompt, model, max_tokens)
+            return {
+                "id": message_id,
+                "type": "message",
+                "role": "assistant",
+                "model": model,
+                "content": [{"type": "text", "text": result["text"]}],
+                "stop_reason": "end_turn",
+                "usage": {"input_tokens": result["input_tokens"], "output_tokens": result["output_tokens"]},
+            }
+
+        async def events():
+            yield _sse({"type": "message_start", "message": {
+                "id": message_id, "type": "message", "role": "assistant", "model": model,
+                "content": [], "usage": {"input_tokens": estimate_tokens(prompt), "output_tokens": 0},
+            }}, "message_start")
+            yield _sse({"type": "content_block_start", "index": 0,
+                        "content_block": {"type": "text", "text": ""}}, "content_block_start")
+            output_tokens = 0
+            async for text in engine.stream(prompt, model, max_tokens):
+                output_tokens += 1
+                yield _sse({"type": "content_block_delta", "index": 0,
+                            "delta": {"type": "text_delta", "text": text}}, "content_block_delta")
+            yield _sse({"type": "content_block_stop", "index": 0}, "content_block_stop")
+            yield _sse({"type": "message_delta", "delta": {"stop_reason": "end_turn"},
+                        "usage": {"output_tokens": output_tokens}}, "message_delta")
+            yield _sse({"type": "message_stop"}, "message_stop")
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Local OpenAI/Anthropic-compatible stand-in LLM")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8088)
+    args = parser.parse_args()
+
+    engine = get_engine()
+    print(f"🧪 Local LLM on http://{args.host}:{args.port} "
+          f"(latency {engine.latency_kind}:{engine.latency_args}, {engine.token_rate} tok/s)")
+    uvicorn.run(create_app(), host=args.host, port=args.port, log_level="warning")
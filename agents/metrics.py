@@ -0,0 +1,207 @@
+"""
+In-process metrics registry with Prometheus text exposition.
+
+Keeps counters, gauges and histograms (with labels) for API requests,
+LLM calls and tool calls, and renders them for the /metrics endpoint.
+"""
+
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, Tuple, Sequence, Iterator
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+TOKEN_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144)
+CALLBACK_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} {self.kind}"
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        """Current value for one label combination (0 if never set)."""
+        key = self._key(labels)
+        with self._lock:
+            return self._values.get(key, 0)
+
+    def render(self) -> Iterator[str]:
+        yield from super().render()
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_format_labels(self.label_names, key)} {value}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [bucket counts..., sum, count]
+        self._values: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = [0] * len(self.buckets) + [0.0, 0]
+                self._values[key] = state
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> Iterator[str]:
+        yield from super().render()
+        with self._lock:
+            items = [(key, list(state)) for key, state in self._values.items()]
+        for key, state in items:
+            for bound, count in zip(self.buckets, state):
+                labels = _format_labels(self.label_names, key, f'le="{bound}"')
+                yield f"{self.name}_bucket{labels} {count}"
+            labels = _format_labels(self.label_names, key, 'le="+Inf"')
+            yield f"{self.name}_bucket{labels} {state[-1]}"
+            yield f"{self.name}_sum{_format_labels(self.label_names, key)} {state[-2]}"
+            yield f"{self.name}_count{_format_labels(self.label_names, key)} {state[-1]}"
+
+
+# --- API requests ---
+REQUEST_LATENCY = Histogram(
+    "purrpur_request_duration_seconds", "End-to-end agent run latency per endpoint", ["endpoint"]
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "purrpur_requests_in_flight", "Agent runs currently executing per endpoint", ["endpoint"]
+)
+REQUEST_ERRORS = Counter(
+    "purrpur_request_errors_total", "Failed agent runs per endpoint", ["endpoint"]
+)
+
+# --- LLM calls (fed by callbacks.metrics_callbacks) ---
+LLM_LATENCY = Histogram(
+    "purrpur_llm_call_duration_seconds", "Latency of a single model call", ["agent", "model"]
+)
+LLM_TOKENS = Histogram(
+    "purrpur_llm_tokens", "Tokens per model call", ["agent", "model", "kind"], buckets=TOKEN_BUCKETS
+)
+LLM_ERRORS = Counter(
+    "purrpur_llm_errors_total", "Failed model calls", ["agent", "model"]
+)
+
+# --- Tool calls ---
+TOOL_LATENCY = Histogram(
+    "purrpur_tool_duration_seconds", "Latency of a tool call", ["tool", "agent"]
+)
+TOOL_ERRORS = Counter(
+    "purrpur_tool_errors_total", "Failed tool calls (exceptions or status=error)", ["tool", "agent"]
+)
+
+# --- Router response cache and streaming audit ---
+RESPONSE_CACHE = Counter(
+    "purrpur_response_cache_total", "Response cache lookups per tier and result", ["tier", "result"]
+)
+
+AUDIT_ABORTS = Counter(
+    "purrpur_audit_aborts_total", "Provider streams cancelled by the incremental Gate-1 auditor", ["model"]
+)
+
+# --- Agent callbacks (fed by callbacks.profiler and callbacks.injection) ---
+CALLBACK_INJECTED_TOKENS = Counter(
+    "purrpur_callback_injected_tokens_total", "Prompt tokens added to system instructions by callbacks",
+    ["agent", "block"]
+)
+CALLBACK_LATENCY = Histogram(
+    "purrpur_callback_duration_seconds", "Time spent in a before/after_model callback",
+    ["callback", "agent"], buckets=CALLBACK_BUCKETS
+)
+CALLBACK_SKIPPED = Counter(
+    "purrpur_callback_skipped_total", "Non-essential callbacks skipped under load shedding", ["callback"]
+)
+
+REGISTRY = [
+    REQUEST_LATENCY, REQUESTS_IN_FLIGHT, REQUEST_ERRORS,
+    LLM_LATENCY, LLM_TOKENS, LLM_ERRORS,
+    TOOL_LATENCY, TOOL_ERRORS,
+    RESPONSE_CACHE, AUDIT_ABORTS,
+    CALLBACK_INJECTED_TOKENS, CALLBACK_LATENCY, CALLBACK_SKIPPED,
+]
+
+
+@contextmanager
+def track_request(endpoint: str):
+    """Times an agent run and keeps the in-flight gauge and error counter updated."""
+    REQUESTS_IN_FLIGHT.inc(endpoint=endpoint)
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        REQUEST_ERRORS.inc(endpoint=endpoint)
+        raise
+    finally:
+        REQUESTS_IN_FLIGHT.dec(endpoint=endpoint)
+        REQUEST_LATENCY.observe(time.perf_counter() - start, endpoint=endpoint)
+
+
+def render_metrics() -> str:
+    """Renders every registered metric in Prometheus text format (0.0.4)."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,171 @@
+"""
+Agent registry for the Purrpur agent tree.
+
+Indexes every YAML agent config under agents/ and agents/subagents/ so the
+API can list agents and dispatch a request straight to a specific agent
+without going through the root orchestrator.
+"""
+
+import asyncio
+import logging
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+import yaml
+
+logger = logging.getLogger(__name__)
+
+AGENTS_DIR = Path(__file__).parent
+ROOT_CONFIG = "root_agent.yaml"
+
+
+def _is_agent_config(data: Any) -> bool:
+    """Agent configs have a name and an agent class or instruction (skips render.yaml etc)."""
+    return isinstance(data, dict) and "name" in data and (
+        "agent_class" in data or "instruction" in data
+    )
+
+
+def scan_agent_configs(base_dir: Path = AGENTS_DIR) -> Dict[str, Dict[str, Any]]:
+    """
+    Scans the agent YAML configs and returns their metadata keyed by agent name.
+
+    Args:
+        base_dir: The agents/ directory.
+
+    Returns:
+        Dict of name -> {"name", "role", "type", "division", "model", "config_path"}.
+    """
+    paths = sorted(base_dir.glob("*.yaml")) + sorted((base_dir / "subagents").rglob("*.yaml"))
+    configs = {}
+
+    for path in paths:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = yaml.safe_load(f)
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo leer {path}: {e}")
+            continue
+
+        if not _is_agent_config(data):
+            continue
+
+        relative = path.relative_to(base_dir)
+        if path.name == ROOT_CONFIG:
+            agent_type = "root"
+        elif relative.parts[0] == "subagents":
+            agent_type = "sub"
+        else:
+            agent_type = "main"
+
+        name = data["name"]
+        if name in configs:
+            logger.warning(f"⚠️ Agente duplicado '{name}' en {relative}, se ignora.")
+            continue
+
+        configs[name] = {
+            "name": name,
+            "role": data.get("description") or name.replace("_agent", "").replace("_", " ").title(),
+            "type": agent_type,
+            "division": relative.parts[1] if agent_type == "sub" else None,
+            "model": data.get("model"),
+            "config_path": str(relative),
+        }
+
+    return configs
+
+
+def detach_agent(agent, parent=None):
+    """
+    Copies an agent and its sub-agents into a standalone tree rooted at the copy.
+
+    ADK resolves transfer targets and the invocation root through
+    parent_agent, so a sub-agent run on its own must not keep pointing into
+    the original tree. Tools and other fields are shared with the original;
+    only the parent/sub-agent links are rebuilt.
+    """
+    copy = agent.model_copy(update={"parent_agent": parent, "sub_agents": []})
+    copy.sub_agents = [detach_agent(sub_agent, copy) for sub_agent in agent.sub_agents or []]
+    return copy
+
+
+class AgentIndex:
+    """
+    Name -> agent lookup built once at startup.
+
+    Agents reachable from the root agent reuse the already loaded objects;
+    configs that are not wired into the tree are loaded from YAML on first use.
+    A sub-agent of the tree is returned as a detached copy (see detach_agent),
+    so running it as a runner's root cannot transfer or escalate to agents
+    outside its own subtree. YAML loading runs in a worker thread, and
+    concurrent first lookups of the same config share one load.
+    """
+
+    def __init__(self, root_agent=None, base_dir: Path = AGENTS_DIR):
+        self.base_dir = base_dir
+        self.refresh(root_agent)
+
+    def refresh(self, root_agent=None, configs: Optional[Dict[str, Dict[str, Any]]] = None) -> None:
+        """
+        Re-indexes the agent tree (after a hot reload).
+
+        `configs` is a scan_agent_configs() result made off the event loop;
+        if omitted the configs are rescanned here.
+        """
+        self.configs = scan_agent_configs(self.base_dir) if configs is None else configs
+        self._agents: Dict[str, Any] = {}
+        self._detached: Dict[str, Any] = {}
+        self._loading: Dict[str, asyncio.Future] = {}
+        if root_agent is not None:
+            self._index_tree(root_agent)
+        logger.info(
+            f"📇 Agent index: {len(self.configs)} configs, {len(self._agents)} agentes cargados."
+        )
+
+    def _index_tree(self, agent) -> None:
+        self._agents.setdefault(agent.name, agent)
+        for sub_agent in getattr(agent, "sub_agents", None) or []:
+            self._index_tree(sub_agent)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.configs or name in self._agents
+
+    async def get(self, name: str):
+        """Returns the agent object for a name, or None if it is unknown."""
+        agent = self._agents.get(name)
+        if agent is not None:
+            if getattr(agent, "parent_agent", None) is None:
+                return agent
+            detached = self._detached.get(name)
+            if detached is None:
+                detached = self._detached[name] = detach_agent(agent)
+            return detached
+
+        config = self.configs.get(name)
+        if config is None:
+            return None
+
+        loading = self._loading.get(name)
+        if loading is None:
+            loading = self._loading[name] = asyncio.ensure_future(self._load(name, config))
+        return await asyncio.shield(loading)
+
+    async def _load(self, name: str, config: Dict[str, Any]):
+        from google.adk.agents.config_agent_utils import from_config
+
+        # A refresh() during the load swaps these dicts; the stale agent stays out of the new index
+        agents, loading = self._agents, self._loading
+        try:
+            agent = await asyncio.to_thread(from_config, str(self.base_dir / config["config_path"]))
+        finally:
+            loading.pop(name, None)
+        agents[name] = agent
+        return agent
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Returns the public metadata of every indexed agent (root first)."""
+        order = {"root": 0, "main": 1, "sub": 2}
+        return sorted(
+            (dict(config) for config in self.configs.values()),
+            key=lambda config: order[config["type"]]
+        )
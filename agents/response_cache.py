@@ -0,0 +1,338 @@
+"""
+Response cache in front of the router providers.
+
+Completions are keyed by a hash of (model, prompt, image bytes, params)
+and looked up in three tiers:
+
+1. in-memory LRU (exact key)
+2. on-disk SQLite store with TTL and size-bounded LRU eviction (exact key)
+3. optional embedding similarity over prompts sharing the same model,
+   image and params, for near-duplicate prompts (PURRPUR_SEMANTIC_CACHE=1)
+
+Hits and misses are counted per tier in the /metrics registry.
+
+Opt-in (PURRPUR_RESPONSE_CACHE=1), and the router only caches
+deterministic (temperature 0) calls: a sampled completion would pin one
+random draw for the whole TTL. Async callers use aget()/aset(), which
+run the SQLite and similarity tiers in a worker thread. Router calls are
+sent with temperature 0 unless they explicitly sample, so repeated
+screenshot requests to the vision model hit the cache too.
+
+Check: python -m agents.cache_check
+"""
+
+import os
+import json
+import asyncio
+import math
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Callable, List, Tuple
+
+from agents.metrics import RESPONSE_CACHE
+
+logger = logging.getLogger(__name__)
+
+CACHE_ENABLED = os.getenv("PURRPUR_RESPONSE_CACHE", "0") == "1"
+DEFAULT_DB_PATH = os.getenv("PURRPUR_RESPONSE_CACHE_DB", str(Path(__file__).parent / "response_cache.db"))
+MEMORY_ENTRIES = int(os.getenv("PURRPUR_RESPONSE_CACHE_ENTRIES", "512"))
+DISK_TTL = float(os.getenv("PURRPUR_RESPONSE_CACHE_TTL", str(7 * 24 * 3600)))
+DISK_MAX_BYTES = int(os.getenv("PURRPUR_RESPONSE_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+SEMANTIC_ENABLED = os.getenv("PURRPUR_SEMANTIC_CACHE", "0") == "1"
+SEMANTIC_THRESHOLD = float(os.getenv("PURRPUR_SEMANTIC_THRESHOLD", "0.97"))
+SEMANTIC_ENTRIES = int(os.getenv("PURRPUR_SEMANTIC_ENTRIES", "2048"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+)
+"""
+
+Embedder = Callable[[str], List[float]]
+
+
+def image_digest(image: Optional[bytes]) -> str:
+    return hashlib.sha256(image).hexdigest() if image else ""
+
+
+def _scope(model: str, image_hash: str, params: Dict[str, Any]) -> str:
+    return json.dumps([model, image_hash, params], sort_keys=True, default=str)
+
+
+def cache_key(model: str, prompt: str, image: Optional[bytes] = None, params: Optional[Dict[str, Any]] = None) -> str:
+    """sha256 of (model, prompt, image bytes, params)."""
+    digest = hashlib.sha256(_scope(model, image_digest(image), params or {}).encode())
+    digest.update(b"\0")
+    digest.update(prompt.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def hashed_ngram_embedding(text: str, dims: int = 512) -> List[float]:
+    """
+    Dependency-free embedding: L2-normalized hashed character trigrams.
+
+    Good enough to catch near-duplicate prompts (whitespace, punctuation,
+    small edits); pass a real embedder to ResponseCache for paraphrases.
+    """
+    vector = [0.0] * dims
+    normalized = " ".join(text.lower().split())
+    for i in range(max(len(normalized) - 2, 0)):
+        bucket = int.from_bytes(hashlib.blake2b(normalized[i:i + 3].encode(), digest_size=4).digest(), "little")
+        vector[bucket % dims] += 1.0
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+class DiskStore:
+    """SQLite tier: TTL expiry plus LRU eviction once the total size exceeds max_bytes."""
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, ttl: float = DISK_TTL, max_bytes: int = DISK_MAX_BYTES):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(_SCHEMA)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        data = json.dumps(value)
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, data, len(data), now, now)
+            )
+            self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        freed = 0
+        stale = []
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at"):
+            stale.append((key,))
+            freed += size
+            if total - freed <= self.max_bytes:
+                break
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class ResponseCache:
+    """Three-tier completion cache (memory LRU -> disk -> optional semantic)."""
+
+    def __init__(
+        self,
+        disk: Optional[DiskStore] = None,
+        memory_entries: int = MEMORY_ENTRIES,
+        embedder: Optional[Embedder] = None,
+        semantic_threshold: float = SEMANTIC_THRESHOLD,
+        semantic_entries: int = SEMANTIC_ENTRIES
+    ):
+        self.disk = disk
+        self.memory_entries = memory_entries
+        self.embedder = embedder
+        self.semantic_threshold = semantic_threshold
+        self.semantic_entries = semantic_entries
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # key -> (scope, embedding); scoped so an image/model/params mismatch never matches
+        self._vectors: "OrderedDict[str, Tuple[str, List[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _remember(self, key: str, value: Dict[str, Any]) -> None:
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def _semantic_lookup(self, scope: str, prompt: str) -> Optional[str]:
+        query = self.embedder(prompt)
+        best_key, best_score = None, self.semantic_threshold
+        with self._lock:
+            candidates = [(key, vector) for key, (s, vector) in self._vectors.items() if s == scope]
+        for key, vector in candidates:
+            score = sum(a * b for a, b in zip(query, vector))
+            if score >= best_score:
+                best_key, best_score = key, score
+        return best_key
+
+    def get(
+        self,
+        model: str,
+        prompt: str,
+        image: Optional[bytes] = None,
+        params: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Looks a completion up in every tier.
+
+        Returns:
+            The cached value plus 'cache_tier', or None on a miss.
+        """
+        key = cache_key(model, prompt, image, params)
+        hit = self._memory_get(key)
+        if hit is not None:
+            return hit
+        return self._slow_get(key, model, prompt, image, params)
+
+    async def aget(
+        self,
+        model: str,
+        prompt: str,
+        image: Optional[bytes] = None,
+        params: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """get() for the event loop: disk and semantic tiers run in a worker thread."""
+        key = cache_key(model, prompt, image, params)
+        hit = self._memory_get(key)
+        if hit is not None:
+            return hit
+        if self.disk is None and self.embedder is None:
+            return None
+        return await asyncio.to_thread(self._slow_get, key, model, prompt, image, params)
+
+    def _memory_get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+        if value is not None:
+            RESPONSE_CACHE.inc(tier="memory", result="hit")
+            return {**value, "cache_tier": "memory"}
+        RESPONSE_CACHE.inc(tier="memory", result="miss")
+        return None
+
+    def _slow_get(
+        self,
+        key: str,
+        model: str,
+        prompt: str,
+        image: Optional[bytes],
+        params: Optional[Dict[str, Any]]
+    ) -> Optional[Dict[str, Any]]:
+        if self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                RESPONSE_CACHE.inc(tier="disk", result="hit")
+                self._remember(key, value)
+                return {**value, "cache_tier": "disk"}
+            RESPONSE_CACHE.inc(tier="disk", result="miss")
+
+        if self.embedder is not None:
+            match = self._semantic_lookup(_scope(model, image_digest(image), params or {}), prompt)
+            value = None
+            if match is not None:
+                with self._lock:
+                    value = self._memory.get(match)
+                if value is None and self.disk is not None:
+                    value = self.disk.get(match)
+            if value is not None:
+                RESPONSE_CACHE.inc(tier="semantic", result="hit")
+                return {**value, "cache_tier": "semantic"}
+            RESPONSE_CACHE.inc(tier="semantic", result="miss")
+        return None
+
+    def set(
+        self,
+        model: str,
+        prompt: str,
+        value: Dict[str, Any],
+        image: Optional[bytes] = None,
+        params: Optional[Dict[str, Any]] = None
+    ) -> None:
+        key = cache_key(model, prompt, image, params)
+        self._remember(key, value)
+        self._slow_set(key, model, prompt, value, image, params)
+
+    async def aset(
+        self,
+        model: str,
+        prompt: str,
+        value: Dict[str, Any],
+        image: Optional[bytes] = None,
+        params: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """set() for the event loop: the SQLite write and embedding run in a worker thread."""
+        key = cache_key(model, prompt, image, params)
+        self._remember(key, value)
+        if self.disk is not None or self.embedder is not None:
+            await asyncio.to_thread(self._slow_set, key, model, prompt, value, image, params)
+
+    def _slow_set(
+        self,
+        key: str,
+        model: str,
+        prompt: str,
+        value: Dict[str, Any],
+        image: Optional[bytes],
+        params: Optional[Dict[str, Any]]
+    ) -> None:
+        if self.disk is not None:
+            try:
+                self.disk.set(key, value)
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ No se pudo escribir en el cache de respuestas: {e}")
+        if self.embedder is not None:
+            vector = self.embedder(prompt)
+            with self._lock:
+                self._vectors[key] = (_scope(model, image_digest(image), params or {}), vector)
+                self._vectors.move_to_end(key)
+                while len(self._vectors) > self.semantic_entries:
+                    self._vectors.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._vectors.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+
+_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Process-wide cache built from the PURRPUR_RESPONSE_CACHE* env vars (None when disabled)."""
+    global _cache
+    if _cache is None and CACHE_ENABLED:
+        _cache = ResponseCache(
+            disk=DiskStore(),
+            embedder=hashed_ngram_embedding if SEMANTIC_ENABLED else None
+        )
+    return _cache
@@ -1,7 +1,18 @@
-import os, base64, httpx
-from typing import Literal
+import os, json, base64, time, random, asyncio, httpx
+import importlib.util
+from typing import Literal, Dict, Any, Optional, AsyncIterator, Union
 from dotenv import load_dotenv
 
+from agents.routing import MODEL_SPECS, choose_model, estimate_tokens, tracker, get_breaker
+from agents.response_cache import get_response_cache
+from agents.images import PreparedImage
+from agents.local_llm import LOCAL_ENABLED, LOCAL_URL
+from agents.auditor import StreamingAuditor, evaluate_output
+from agents.metrics import AUDIT_ABORTS
+
+# A prepared image (bytes, encoded once at the wire) or a legacy base64 PNG string
+Image = Union[PreparedImage, str]
+
 # Load environment variables
 load_dotenv()
 
@@ -10,50 +21,502 @@ ANTHROPIC_KEY = os.getenv("ANTHROPIC_API_KEY", "").strip()
 
 Model = Literal["llama-groq", "claude-sonnet"]
 
+# Per-provider connection pools. Limits/timeouts are overridable via env, e.g.
+# GROQ_MAX_CONNECTIONS=50, ANTHROPIC_TIMEOUT=120
+PROVIDERS = {
+    "groq": {
+        "base_url": "https://api.groq.com/openai/v1",
+        "headers": {"Authorization": f"Bearer {GROQ_KEY}", "Content-Type": "application/json"},
+        "max_connections": int(os.getenv("GROQ_MAX_CONNECTIONS", "20")),
+        "timeout": float(os.getenv("GROQ_TIMEOUT", "60")),
+    },
+    "anthropic": {
+        "base_url": "https://api.anthropic.com/v1",
+        "headers": {"x-api-key": ANTHROPIC_KEY, "anthropic-version": "2023-06-01"},
+        "max_connections": int(os.getenv("ANTHROPIC_MAX_CONNECTIONS", "20")),
+        "timeout": float(os.getenv("ANTHROPIC_TIMEOUT", "120")),
+    },
+}
+# PURRPUR_LLM_PROVIDER=local: same wire formats, served by agents/local_llm.py
+if LOCAL_ENABLED:
+    PROVIDERS["groq"]["base_url"] = f"{LOCAL_URL}/openai/v1"
+    PROVIDERS["anthropic"]["base_url"] = f"{LOCAL_URL}/anthropic/v1"
+    # No keys needed offline (an empty "Bearer " header is rejected by httpx)
+    PROVIDERS["groq"]["headers"]["Authorization"] = f"Bearer {GROQ_KEY or 'local'}"
+    PROVIDERS["anthropic"]["headers"]["x-api-key"] = ANTHROPIC_KEY or "local"
+KEEPALIVE_EXPIRY = float(os.getenv("PROVIDER_KEEPALIVE_EXPIRY", "60"))
+CONNECT_TIMEOUT = float(os.getenv("PROVIDER_CONNECT_TIMEOUT", "10"))
+# HTTP/2 needs the optional 'h2' package (pip install httpx[http2])
+HTTP2 = importlib.util.find_spec("h2") is not None
+
+# Retries on transport errors, 429 and 5xx with jittered exponential backoff
+MAX_RETRIES = int(os.getenv("ROUTER_MAX_RETRIES", "2"))
+RETRY_BASE_DELAY = float(os.getenv("ROUTER_RETRY_BASE_DELAY", "0.5"))
+# Opt-in hedging: if the primary model hasn't answered by its p-th latency
+# percentile, fire the same request at the fallback model and keep the first
+HEDGING = os.getenv("ROUTER_HEDGING", "0") == "1"
+HEDGE_PERCENTILE = float(os.getenv("ROUTER_HEDGE_PERCENTILE", "0.95"))
+# Best-of-N: concurrent candidates per request, and the temperature used for
+# extra candidates on a model that already has one (so they can differ)
+BEST_OF_N = int(os.getenv("ROUTER_BEST_OF_N", "3"))
+BEST_OF_N_TEMPERATURE = float(os.getenv("ROUTER_BEST_OF_N_TEMPERATURE", "0.7"))
+
+_clients: Dict[str, httpx.AsyncClient] = {}
+
+def _temperature(temperature: Optional[float] = None) -> float:
+    """Temperature a call is sent with: unset means deterministic (0) on every provider"""
+    return 0 if temperature is None else temperature
+
+def _cache_params(max_tokens: int, temperature: Optional[float] = None) -> Optional[dict]:
+    """Cache-key params for a call, or None if it samples (temperature != 0) and must not be cached"""
+    effective = _temperature(temperature)
+    if effective != 0:
+        return None
+    return {"max_tokens": max_tokens, "temperature": effective}
+
+class ProviderUnavailable(RuntimeError):
+    """Provider circuit is open; the call was not attempted"""
+
+def get_client(provider: str) -> httpx.AsyncClient:
+    """Shared keep-alive client for a provider (created on first use)"""
+    client = _clients.get(provider)
+    if client is None or client.is_closed:
+        config = PROVIDERS[provider]
+        client = httpx.AsyncClient(
+            base_url=config["base_url"],
+            headers=config["headers"],
+            http2=HTTP2,
+            limits=httpx.Limits(
+                max_connections=config["max_connections"],
+                max_keepalive_connections=config["max_connections"],
+                keepalive_expiry=KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(config["timeout"], connect=CONNECT_TIMEOUT),
+        )
+        _clients[provider] = client
+    return client
+
+async def open_clients() -> None:
+    """Create every provider pool up front (call from the app lifespan startup)"""
+    for provider in PROVIDERS:
+        get_client(provider)
+
+async def close_clients() -> None:
+    """Close every provider pool (call from the app lifespan shutdown)"""
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.aclose()
+
+def route(prompt: str, img_tokens: int = 0, max_tokens: int = 1500, needs_vision: Optional[bool] = None) -> Dict[str, Any]:
+    """Routing decision for a prompt (see agents/routing.py); decision["model"] is the pick"""
+    return choose_model(estimate_tokens(prompt), img_tokens, max_tokens, needs_vision)
+
 def select_model(prompt_b64: str, img_b64: str, img_tokens: int) -> Model:
-    # If there's an image, use Claude (vision capable)
-    if img_tokens > 0:
-        return "claude-sonnet"
-    # For long prompts, use Claude
-    if len(prompt_b64) > 6_000:
-        return "claude-sonnet"
-    # Default to Groq Llama (faster and cheaper)
-    return "llama-groq"
-
-async def call_llama(prompt: str) -> str:
-    """Call Groq API with Llama 3.3 70B"""
-    url = "https://api.groq.com/openai/v1/chat/completions"
-    headers = {
-        "Authorization": f"Bearer {GROQ_KEY}",
-        "Content-Type": "application/json"
-    }
-    payload = {
-        "model": "llama-3.3-70b-versatile",
+    try:
+        prompt = base64.b64decode(prompt_b64).decode("utf-8", errors="ignore")
+    except ValueError:
+        prompt = prompt_b64
+    return route(prompt, img_tokens)["model"]
+
+class _timed:
+    """Records call latency / errors for a model in the routing tracker"""
+    def __init__(self, model: str):
+        self.model = model
+    def __enter__(self):
+        self.start = time.perf_counter()
+    def __exit__(self, exc_type, exc, tb):
+        # A cancelled (hedged-out) call or abandoned stream says nothing about the provider
+        if exc_type not in (asyncio.CancelledError, GeneratorExit):
+            tracker.record(self.model, time.perf_counter() - self.start, ok=exc_type is None)
+        return False
+
+def _retryable(e: Exception) -> bool:
+    if isinstance(e, httpx.HTTPStatusError):
+        return e.response.status_code == 429 or e.response.status_code >= 500
+    return isinstance(e, httpx.TransportError)
+
+async def _post(model: str, path: str, payload: dict) -> dict:
+    """POST to the model's provider with retries, backoff and the provider circuit breaker"""
+    provider = MODEL_SPECS[model]["provider"]
+    breaker = get_breaker(provider)
+    for attempt in range(MAX_RETRIES + 1):
+        permit = breaker.allow()
+        if permit is None:
+            raise ProviderUnavailable(f"circuit open for {provider}")
+        try:
+            with _timed(model):
+                r = await get_client(provider).post(path, json=payload)
+                r.raise_for_status()
+                data = r.json()
+        except asyncio.CancelledError:
+            breaker.release(permit)
+            raise
+        except Exception as e:
+            # Client errors (4xx) are our fault, not the provider's: they
+            # leave the breaker as it was (only a half-open trial is given back)
+            if _retryable(e):
+                breaker.failure()
+            else:
+                breaker.release(permit)
+            if attempt == MAX_RETRIES or not _retryable(e):
+                raise
+            await asyncio.sleep(RETRY_BASE_DELAY * 2 ** attempt * random.uniform(0.5, 1.5))
+        else:
+            breaker.success()
+            return data
+
+def _llama_payload(prompt: str, max_tokens: int, temperature: Optional[float] = None) -> dict:
+    return {
+        "model": MODEL_SPECS["llama-groq"]["model_id"],
         "messages": [{"role": "user", "content": prompt}],
-        "temperature": 0,
-        "max_tokens": 1500
+        "temperature": _temperature(temperature),
+        "max_tokens": max_tokens
     }
-    async with httpx.AsyncClient() as client:
-        r = await client.post(url, headers=headers, json=payload)
-        r.raise_for_status()
-        data = r.json()
-        return data["choices"][0]["message"]["content"]
-
-async def call_claude(prompt: str, img_b64: str) -> str:
-    headers = {"x-api-key": ANTHROPIC_KEY, "anthropic-version": "2023-06-01"}
-    payload = {
-        "model": "claude-3-5-sonnet-20241022",
-        "max_tokens": 1500,
-        "messages": [{
-            "role": "user",
-            "content": [
-                {"type": "text", "text": prompt},
-                {"type": "image", "source": {"type": "base64", "media_type": "image/png", "data": img_b64}}
-            ]
-        }]
+
+def _claude_payload(prompt: str, image: Optional[Image], max_tokens: int, temperature: Optional[float] = None) -> dict:
+    content = [{"type": "text", "text": prompt}]
+    if isinstance(image, PreparedImage):
+        content.append({"type": "image", "source": {"type": "base64", "media_type": image.media_type, "data": image.base64}})
+    elif image:
+        content.append({"type": "image", "source": {"type": "base64", "media_type": "image/png", "data": image}})
+    # Pinned like Llama's: Anthropic would otherwise sample at 1.0 and the
+    # screenshot (vision-only) flow could never be cached
+    return {
+        "model": MODEL_SPECS["claude-sonnet"]["model_id"],
+        "max_tokens": max_tokens,
+        "temperature": _temperature(temperature),
+        "messages": [{"role": "user", "content": content}]
     }
-    async with httpx.AsyncClient() as client:
-        r = await client.post("https://api.anthropic.com/v1/messages", headers=headers, json=payload)
-        return r.json()["content"][0]["text"]
+
+async def call_llama(prompt: str, max_tokens: int = 1500, temperature: Optional[float] = None) -> str:
+    """Call Groq API with Llama 3.3 70B"""
+    data = await _post("llama-groq", "/chat/completions", _llama_payload(prompt, max_tokens, temperature))
+    return data["choices"][0]["message"]["content"]
+
+async def call_claude(prompt: str, image: Optional[Image] = None, max_tokens: int = 1500, temperature: Optional[float] = None) -> str:
+    data = await _post("claude-sonnet", "/messages", _claude_payload(prompt, image, max_tokens, temperature))
+    return data["content"][0]["text"]
+
+# Streaming variants. Both yield the same event dicts:
+#   {"type": "delta", "model": ..., "text": "..."}
+#   {"type": "usage", "model": ..., "input_tokens": n, "output_tokens": n}
+
+async def _sse_events(model: str, path: str, payload: dict) -> AsyncIterator[dict]:
+    """Opens a streaming POST and yields each SSE `data:` JSON object (no retries once streaming)"""
+    provider = MODEL_SPECS[model]["provider"]
+    breaker = get_breaker(provider)
+    permit = breaker.allow()
+    if permit is None:
+        raise ProviderUnavailable(f"circuit open for {provider}")
+    try:
+        with _timed(model):
+            async with get_client(provider).stream("POST", path, json=payload) as r:
+                if r.is_error:
+                    await r.aread()
+                r.raise_for_status()
+                async for line in r.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        break
+                    yield json.loads(data)
+    except (asyncio.CancelledError, GeneratorExit):
+        breaker.release(permit)
+        raise
+    except Exception as e:
+        if _retryable(e):
+            breaker.failure()
+        else:
+            breaker.release(permit)
+        raise
+    breaker.success()
+
+async def stream_llama(prompt: str, max_tokens: int = 1500, temperature: Optional[float] = None) -> AsyncIterator[dict]:
+    """Stream Groq (OpenAI-compatible SSE) deltas"""
+    payload = {**_llama_payload(prompt, max_tokens, temperature), "stream": True, "stream_options": {"include_usage": True}}
+    events = _sse_events("llama-groq", "/chat/completions", payload)
+    try:
+        async for chunk in events:
+            for choice in chunk.get("choices") or []:
+                text = (choice.get("delta") or {}).get("content")
+                if text:
+                    yield {"type": "delta", "model": "llama-groq", "text": text}
+            usage = chunk.get("usage") or (chunk.get("x_groq") or {}).get("usage")
+            if usage:
+                yield {
+                    "type": "usage",
+                    "model": "llama-groq",
+                    "input_tokens": usage.get("prompt_tokens", 0),
+                    "output_tokens": usage.get("completion_tokens", 0),
+                }
+    finally:
+        # Closing this generator must close the HTTP stream now, not at GC time
+        await events.aclose()
+
+async def stream_claude(prompt: str, image: Optional[Image] = None, max_tokens: int = 1500, temperature: Optional[float] = None) -> AsyncIterator[dict]:
+    """Stream Anthropic messages deltas"""
+    payload = {**_claude_payload(prompt, image, max_tokens, temperature), "stream": True}
+    input_tokens = 0
+    events = _sse_events("claude-sonnet", "/messages", payload)
+    try:
+        async for event in events:
+            kind = event.get("type")
+            if kind == "message_start":
+                input_tokens = event["message"].get("usage", {}).get("input_tokens", 0)
+            elif kind == "content_block_delta" and event["delta"].get("type") == "text_delta":
+                yield {"type": "delta", "model": "claude-sonnet", "text": event["delta"]["text"]}
+            elif kind == "message_delta" and "usage" in event:
+                yield {
+                    "type": "usage",
+                    "model": "claude-sonnet",
+                    "input_tokens": input_tokens,
+                    "output_tokens": event["usage"].get("output_tokens", 0),
+                }
+            elif kind == "error":
+                raise RuntimeError(f"Anthropic stream error: {event.get('error')}")
+    finally:
+        await events.aclose()
+
+def stream_model(model: str, prompt: str, image: Optional[Image] = None, max_tokens: int = 1500, temperature: Optional[float] = None) -> AsyncIterator[dict]:
+    if model == "llama-groq":
+        return stream_llama(prompt, max_tokens, temperature)
+    return stream_claude(prompt, image, max_tokens, temperature)
+
+async def call_model(model: str, prompt: str, image: Optional[Image] = None, max_tokens: int = 1500, temperature: Optional[float] = None) -> str:
+    if model == "llama-groq":
+        return await call_llama(prompt, max_tokens, temperature)
+    return await call_claude(prompt, image, max_tokens, temperature)
+
+
+def _hedge_deadline(model: str) -> float:
+    return tracker.percentile(model, HEDGE_PERCENTILE) or MODEL_SPECS[model]["prior_latency"]
+
+async def _first_response(
+    models: list,
+    prompt: str,
+    image: Optional[Image] = None,
+    max_tokens: int = 1500,
+    temperature: Optional[float] = None,
+    hedge: Optional[bool] = None
+) -> tuple:
+    """
+    Calls models[0], failing over down the list on error. With hedging the next
+    model is also fired when the primary is slower than its latency percentile;
+    the loser is cancelled. Returns (text, model, hedged).
+    """
+    hedge = HEDGING if hedge is None else hedge
+
+    def start(model: str) -> asyncio.Task:
+        task = asyncio.ensure_future(call_model(model, prompt, image, max_tokens, temperature))
+        pending[task] = model
+        return task
+
+    pending: Dict[asyncio.Task, str] = {}
+    queue = list(models)
+    start(queue.pop(0))
+    hedged = False
+    last_error: Optional[BaseException] = None
+    try:
+        while pending:
+            timeout = _hedge_deadline(models[0]) if hedge and queue and not hedged else None
+            done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                hedged = True
+                start(queue.pop(0))
+                continue
+            for task in done:
+                model = pending.pop(task)
+                if task.exception() is None:
+                    return task.result(), model, hedged
+                last_error = task.exception()
+            if not pending and queue:
+                start(queue.pop(0))
+        raise last_error
+    finally:
+        for task in pending:
+            task.cancel()
+
+async def generate(
+    prompt: str,
+    image: Optional[Image] = None,
+    img_tokens: int = 0,
+    max_tokens: int = 1500,
+    hedge: Optional[bool] = None,
+    cache: bool = True
+) -> Dict[str, Any]:
+    """
+    Routes and runs a completion, failing over to the next eligible model on error.
+    With hedging (ROUTER_HEDGING=1 or hedge=True) the fallback is also fired when the
+    primary is slower than its latency percentile; the loser is cancelled.
+    Cached completions from any eligible model are returned without a provider call
+    (only deterministic, temperature 0 calls are cached; see response_cache.py).
+    Returns {"text", "model", "hedged", "decision", "cached"}.
+    """
+    if isinstance(image, PreparedImage) and not img_tokens:
+        img_tokens = image.tokens
+    decision = route(prompt, img_tokens, max_tokens, needs_vision=bool(image) or img_tokens > 0)
+    models = [decision["model"]] + decision["fallbacks"]
+    response_cache = get_response_cache() if cache else None
+    # Cache on the raw image bytes; base64 only exists in the provider payload
+    image_bytes = image.data if isinstance(image, PreparedImage) else (image.encode() if image else None)
+
+    if response_cache is not None:
+        for model in models:
+            params = _cache_params(max_tokens)
+            if params is None:
+                continue
+            hit = await response_cache.aget(model, prompt, image_bytes, params)
+            if hit is not None:
+                return {"text": hit["text"], "model": model, "hedged": False, "decision": decision, "cached": hit["cache_tier"]}
+
+    text, model, hedged = await _first_response(models, prompt, image, max_tokens, hedge=hedge)
+    params = _cache_params(max_tokens)
+    if response_cache is not None and params is not None:
+        await response_cache.aset(model, prompt, {"text": text}, image_bytes, params)
+    return {"text": text, "model": model, "hedged": hedged, "decision": decision, "cached": None}
+
+async def generate_audited(
+    prompt: str,
+    image: Optional[Image] = None,
+    img_tokens: int = 0,
+    max_tokens: int = 1500,
+    attempts: int = 2,
+    required: tuple = ()
+) -> Dict[str, Any]:
+    """
+    Streams a completion through the incremental Gate-1 auditor. On early-fail
+    (fences/prose, external imports, or a `required` criterion) the provider stream
+    is closed mid-generation and the prompt is retried on the next model; the last
+    attempt always runs to completion. A model is only called deterministically
+    once: with no other model to fail over to (vision requests route only to
+    claude-sonnet) the retry samples at BEST_OF_N_TEMPERATURE, since the same
+    temperature 0 request would reproduce the failing output.
+    Returns {"text", "model", "audit", "attempts", "decision"}.
+    """
+    if isinstance(image, PreparedImage) and not img_tokens:
+        img_tokens = image.tokens
+    decision = route(prompt, img_tokens, max_tokens, needs_vision=bool(image) or img_tokens > 0)
+    models = [decision["model"]] + decision["fallbacks"]
+    history = []
+    for attempt in range(attempts):
+        model = models[attempt % len(models)]
+        temperature = 0 if attempt < len(models) else BEST_OF_N_TEMPERATURE
+        last = attempt == attempts - 1
+        auditor = StreamingAuditor(required=required)
+        stream = stream_model(model, prompt, image, max_tokens, temperature)
+        try:
+            async for event in stream:
+                if event["type"] == "delta" and auditor.feed(event["text"])["failed"] and not last:
+                    break
+        except Exception as e:
+            history.append({"model": model, "temperature": temperature, "error": str(e)})
+            if last:
+                raise
+            continue
+        finally:
+            # Closing the generator closes the HTTP stream: no more tokens billed
+            await stream.aclose()
+
+        if auditor.failed and not last:
+            AUDIT_ABORTS.inc(model=model)
+            history.append({"model": model, "temperature": temperature, "aborted": auditor.fail_reason, "chars": len(auditor.text)})
+            continue
+        audit = auditor.finish()
+        history.append({"model": model, "temperature": temperature, "passed": audit["passed"]})
+        return {"text": auditor.text, "model": model, "audit": audit, "attempts": history, "decision": decision}
+
+def _rank(audit: Dict[str, Any]) -> tuple:
+    return (audit["passed"], audit["criteria"]["valid_jsx"], audit["score"])
+
+async def best_of_n(
+    prompt: str,
+    image: Optional[Image] = None,
+    img_tokens: int = 0,
+    max_tokens: int = 1500,
+    candidates: Optional[int] = None,
+    cache: bool = True,
+    hedge: Optional[bool] = None
+) -> Dict[str, Any]:
+    """
+    Fires K candidate generations concurrently (round-robin over the eligible models,
+    each failing over and hedging like generate() does), audits each with Gate-1 as it completes and returns the first that passes,
+    cancelling the rest; if none passes, the highest-scoring candidate wins (preferring
+    ones with valid JSX), returned with its failing audit.
+    Returns {"text", "model", "audit", "candidates", "cancelled", "decision", "cached"}.
+    """
+    if isinstance(image, PreparedImage) and not img_tokens:
+        img_tokens = image.tokens
+    decision = route(prompt, img_tokens, max_tokens, needs_vision=bool(image) or img_tokens > 0)
+    models = [decision["model"]] + decision["fallbacks"]
+    k = max(1, candidates or BEST_OF_N)
+    response_cache = get_response_cache() if cache else None
+    image_bytes = image.data if isinstance(image, PreparedImage) else (image.encode() if image else None)
+
+    if response_cache is not None:
+        for model in models:
+            params = _cache_params(max_tokens)
+            if params is None:
+                continue
+            hit = await response_cache.aget(model, prompt, image_bytes, params)
+            if hit is not None:
+                audit = evaluate_output(hit["text"])
+                if audit["passed"]:
+                    return {"text": hit["text"], "model": model, "audit": audit, "candidates": [],
+                            "cancelled": 0, "decision": decision, "cached": hit["cache_tier"]}
+
+    pending: Dict[asyncio.Task, Dict[str, Any]] = {}
+    for i in range(k):
+        model = models[i % len(models)]
+        # First candidate per model is deterministic (and cacheable)
+        temperature = 0 if i < len(models) else BEST_OF_N_TEMPERATURE
+        # The candidate's model goes first; the others are its failover/hedge targets
+        order = [model] + [other for other in models if other != model]
+        task = asyncio.ensure_future(_first_response(order, prompt, image, max_tokens, temperature, hedge))
+        pending[task] = {"model": model, "temperature": temperature, "started": time.perf_counter()}
+
+    finished = []
+    best = None
+    last_error: Optional[BaseException] = None
+    try:
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            # Every task of the round is recorded (and its exception retrieved)
+            # before a winner is picked among them
+            for task in done:
+                info = pending.pop(task)
+                info["latency"] = time.perf_counter() - info.pop("started")
+                if task.exception() is not None:
+                    last_error = task.exception()
+                    finished.append({**info, "error": str(last_error)})
+                    continue
+                text, info["model"], info["hedged"] = task.result()
+                audit = evaluate_output(text)
+                finished.append({**info, "passed": audit["passed"], "score": audit["score"]})
+                # Fallback ranking: a component that parses beats a higher
+                # heuristic score that doesn't (its audit keeps passed=False)
+                if best is None or _rank(audit) > _rank(best[2]):
+                    best = (text, info["model"], audit, info["temperature"])
+            if best is not None and best[2]["passed"]:
+                break
+    finally:
+        # Tasks that finished since the last wait() are done, not cancelled
+        cancelled = 0
+        for task in pending:
+            if not task.done():
+                task.cancel()
+                cancelled += 1
+        # Await them so no result or exception is left unretrieved
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    if best is None:
+        raise last_error
+    text, model, audit, temperature = best
+    params = _cache_params(max_tokens, temperature)
+    if audit["passed"] and response_cache is not None and params is not None:
+        await response_cache.aset(model, prompt, {"text": text}, image_bytes, params)
+    return {"text": text, "model": model, "audit": audit, "candidates": finished,
+            "cancelled": cancelled, "decision": decision, "cached": None}
 
 # gemini-pro idem (omito para brevedad)
@@ -0,0 +1,270 @@
+"""
+Token- and latency-aware model routing for router.py.
+
+Estimates the request size in tokens, keeps rolling latency/error stats
+per model, filters models that can't serve the request (vision, context
+window, max output) and picks the fastest healthy one. Every decision is
+returned (and kept in a short history) with the inputs that produced it.
+"""
+
+import os
+import time
+import math
+import threading
+from collections import deque
+from typing import Dict, Any, List, Optional
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _ENCODING = None
+
+# Static capabilities per routable model. prior_latency is the p95 (seconds)
+# assumed until enough live samples exist.
+MODEL_SPECS: Dict[str, Dict[str, Any]] = {
+    "llama-groq": {
+        "provider": "groq",
+        "model_id": "llama-3.3-70b-versatile",
+        "context_window": 131_072,
+        "max_output_tokens": 32_768,
+        "vision": False,
+        "prior_latency": 2.0,
+    },
+    "claude-sonnet": {
+        "provider": "anthropic",
+        "model_id": "claude-3-5-sonnet-20241022",
+        "context_window": 200_000,
+        "max_output_tokens": 8_192,
+        "vision": True,
+        "prior_latency": 8.0,
+    },
+}
+
+WINDOW_SIZE = int(os.getenv("ROUTER_STATS_WINDOW", "200"))
+MIN_SAMPLES = int(os.getenv("ROUTER_MIN_SAMPLES", "5"))
+# Models whose recent error rate exceeds this are only used as a last resort
+MAX_ERROR_RATE = float(os.getenv("ROUTER_MAX_ERROR_RATE", "0.5"))
+# Room left for chat formatting / system tokens when checking the context window
+CONTEXT_MARGIN = 256
+# Circuit breaker: open after N consecutive failures, retry after the cooldown
+BREAKER_THRESHOLD = int(os.getenv("ROUTER_BREAKER_THRESHOLD", "5"))
+BREAKER_COOLDOWN = float(os.getenv("ROUTER_BREAKER_COOLDOWN", "30"))
+
+
+def estimate_tokens(text: str) -> int:
+    """Token count of a text (tiktoken when installed, ~4 chars/token otherwise)."""
+    if not text:
+        return 0
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text, disallowed_special=()))
+    return max(math.ceil(len(text) / 4), len(text.split()))
+
+
+def estimate_image_tokens(width: int, height: int) -> int:
+    """Vision token cost of an image from its dimensions (Anthropic: w*h/750)."""
+    if width <= 0 or height <= 0:
+        return 0
+    return math.ceil(width * height / 750)
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, math.ceil(q * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class LatencyTracker:
+    """Rolling window of (latency, ok) samples per model (thread-safe)."""
+
+    def __init__(self, window: int = WINDOW_SIZE):
+        self.window = window
+        self._samples: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def record(self, model: str, latency: float, ok: bool = True) -> None:
+        with self._lock:
+            samples = self._samples.setdefault(model, deque(maxlen=self.window))
+            samples.append((latency, ok))
+
+    def percentile(self, model: str, q: float) -> Optional[float]:
+        """Latency percentile of successful calls, None until MIN_SAMPLES exist."""
+        with self._lock:
+            latencies = sorted(latency for latency, ok in self._samples.get(model, ()) if ok)
+        if len(latencies) < MIN_SAMPLES:
+            return None
+        return _percentile(latencies, q)
+
+    def stats(self, model: str) -> Dict[str, Any]:
+        with self._lock:
+            samples = list(self._samples.get(model, ()))
+        if not samples:
+            return {"samples": 0, "p50": None, "p95": None, "error_rate": 0.0}
+        latencies = sorted(latency for latency, ok in samples if ok)
+        errors = sum(1 for _, ok in samples if not ok)
+        return {
+            "samples": len(samples),
+            "p50": _percentile(latencies, 0.50) if latencies else None,
+            "p95": _percentile(latencies, 0.95) if latencies else None,
+            "error_rate": errors / len(samples),
+        }
+
+
+class CircuitBreaker:
+    """
+    Per-provider breaker: closed -> open after `threshold` consecutive
+    failures; after `cooldown` seconds one trial call is let through
+    (half-open) and its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, threshold: int = BREAKER_THRESHOLD, cooldown: float = BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> Optional[str]:
+        """
+        Permit for one call: "call" (circuit closed), "trial" (claims the
+        half-open trial) or None if the call may not go through now.
+        """
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return "call"
+            if state == "half_open" and not self._trial:
+                self._trial = True
+                return "trial"
+            return None
+
+    def release(self, permit: Optional[str]) -> None:
+        """Gives back the permit of a call with no verdict (cancelled, or a client error)."""
+        if permit != "trial":
+            return
+        with self._lock:
+            self._trial = False
+
+    def success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._trial = False
+            if self.opened_at is not None or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+
+tracker = LatencyTracker()
+breakers: Dict[str, CircuitBreaker] = {}
+_decisions: deque = deque(maxlen=50)
+
+
+def get_breaker(provider: str) -> CircuitBreaker:
+    breaker = breakers.get(provider)
+    if breaker is None:
+        breaker = breakers.setdefault(provider, CircuitBreaker())
+    return breaker
+
+
+def choose_model(
+    prompt_tokens: int,
+    image_tokens: int = 0,
+    max_tokens: int = 1500,
+    needs_vision: Optional[bool] = None
+) -> Dict[str, Any]:
+    """
+    Picks the fastest model that can serve the request.
+
+    Args:
+        prompt_tokens: Estimated prompt size.
+        image_tokens: Estimated vision tokens (0 = no image).
+        max_tokens: Requested completion budget.
+        needs_vision: Defaults to image_tokens > 0.
+
+    Returns:
+        Decision dict: 'model', ordered 'fallbacks', 'reason', 'inputs' and
+        per-model 'candidates'.
+
+    Raises:
+        ValueError: If no model can serve the request.
+    """
+    if needs_vision is None:
+        needs_vision = image_tokens > 0
+    required_context = prompt_tokens + image_tokens + max_tokens + CONTEXT_MARGIN
+
+    candidates = []
+    for model, spec in MODEL_SPECS.items():
+        stats = tracker.stats(model)
+        candidate = {"model": model, "stats": stats, "eligible": True, "rejected": None}
+        if needs_vision and not spec["vision"]:
+            candidate.update(eligible=False, rejected="no vision support")
+        elif required_context > spec["context_window"]:
+            candidate.update(eligible=False, rejected=f"needs {required_context} tokens of context")
+        elif max_tokens > spec["max_output_tokens"]:
+            candidate.update(eligible=False, rejected=f"max_tokens > {spec['max_output_tokens']}")
+        elif get_breaker(spec["provider"]).state == "open":
+            candidate.update(eligible=False, rejected=f"circuit open for {spec['provider']}")
+
+        has_data = stats["samples"] >= MIN_SAMPLES and stats["p95"] is not None
+        candidate["expected_latency"] = stats["p95"] if has_data else spec["prior_latency"]
+        candidate["healthy"] = not (has_data and stats["error_rate"] > MAX_ERROR_RATE)
+        candidates.append(candidate)
+
+    eligible = [c for c in candidates if c["eligible"]]
+    if not eligible:
+        raise ValueError(
+            "No model can serve this request: "
+            + "; ".join(f"{c['model']}: {c['rejected']}" for c in candidates)
+        )
+
+    # Healthy models first, then lowest expected (p95) latency
+    ranked = sorted(eligible, key=lambda c: (not c["healthy"], c["expected_latency"]))
+    best = ranked[0]
+    reason = f"lowest expected p95 ({best['expected_latency']:.2f}s) among {len(eligible)} eligible"
+    if not best["healthy"]:
+        reason = "all eligible models degraded; " + reason
+
+    decision = {
+        "model": best["model"],
+        "fallbacks": [c["model"] for c in ranked[1:]],
+        "reason": reason,
+        "inputs": {
+            "prompt_tokens": prompt_tokens,
+            "image_tokens": image_tokens,
+            "max_tokens": max_tokens,
+            "needs_vision": needs_vision,
+            "required_context": required_context,
+        },
+        "candidates": candidates,
+        "timestamp": time.time(),
+    }
+    _decisions.append(decision)
+    return decision
+
+
+def recent_decisions() -> List[Dict[str, Any]]:
+    return list(_decisions)
+
+
+def routing_status() -> Dict[str, Any]:
+    """Live stats per model plus the most recent routing decisions."""
+    return {
+        "models": {model: tracker.stats(model) for model in MODEL_SPECS},
+        "circuits": {
+            spec["provider"]: get_breaker(spec["provider"]).state for spec in MODEL_SPECS.values()
+        },
+        "decisions": recent_decisions(),
+    }
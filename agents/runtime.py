@@ -0,0 +1,279 @@
+"""
+Runtime helpers for executing ADK agents from the API layer.
+
+Wraps the ADK Runner event API and normalizes its events into plain
+dictionaries (token deltas, delegation hops, tool calls) that the
+FastAPI endpoints can serialize.
+"""
+
+import os
+import uuid
+import asyncio
+import inspect
+import logging
+import functools
+import threading
+from typing import Dict, Any, Optional, AsyncIterator, Callable
+
+from agents.tracing import Trace, export_trace
+
+logger = logging.getLogger(__name__)
+
+APP_NAME = "purrpur"
+
+# Max in-flight agent runs per endpoint. Override per endpoint with
+# PURRPUR_MAX_CONCURRENCY_<ENDPOINT> (e.g. PURRPUR_MAX_CONCURRENCY_GENERATE=64)
+DEFAULT_MAX_CONCURRENCY = int(os.getenv("PURRPUR_MAX_CONCURRENCY", "256"))
+
+# One runner per agent object, created on first use
+_runners: Dict[str, Any] = {}
+_runners_lock = threading.Lock()
+_limiters: Dict[str, asyncio.Semaphore] = {}
+
+
+def get_limiter(endpoint: str) -> asyncio.Semaphore:
+    """Returns the concurrency limiter for an endpoint, creating it on first use."""
+    limiter = _limiters.get(endpoint)
+    if limiter is None:
+        env_key = f"PURRPUR_MAX_CONCURRENCY_{endpoint.upper()}"
+        limit = int(os.getenv(env_key, DEFAULT_MAX_CONCURRENCY))
+        limiter = asyncio.Semaphore(limit)
+        _limiters[endpoint] = limiter
+    return limiter
+
+
+def get_plugins() -> list:
+    """Runner plugins applied to every agent in the tree (metrics, tracing, ...)."""
+    from agents.callbacks.metrics_callbacks import MetricsPlugin
+    from agents.callbacks.tracing_callbacks import TracingPlugin
+    return [MetricsPlugin(), TracingPlugin()]
+
+
+def _is_blocking(func) -> bool:
+    """True for plain synchronous tool functions (ADK would call them on the event loop)."""
+    return (
+        inspect.isfunction(func)
+        and not inspect.iscoroutinefunction(func)
+        and not inspect.isgeneratorfunction(func)
+        and not inspect.isasyncgenfunction(func)
+    )
+
+
+def _in_thread(func):
+    """Wraps a sync tool function in an async one that runs it in a worker thread."""
+    @functools.wraps(func)
+    async def run_in_thread(*args, **kwargs):
+        return await asyncio.to_thread(func, *args, **kwargs)
+    return run_in_thread
+
+
+def offload_sync_tools(agent) -> None:
+    """
+    Makes every synchronous tool in an agent tree run in a worker thread.
+
+    ADK awaits async tools but calls sync ones directly on the event loop,
+    so a subprocess or HTTP call in a tool (command_runner, scrape_url, ...)
+    would stall every other request. functools.wraps keeps the name,
+    docstring and signature ADK builds the function declaration from.
+    Already wrapped tools are async, so this is safe to call again.
+    """
+    from google.adk.tools import FunctionTool
+
+    tools = getattr(agent, "tools", None) or []
+    for i, tool in enumerate(tools):
+        if isinstance(tool, FunctionTool):
+            if _is_blocking(tool.func):
+                tool.func = _in_thread(tool.func)
+        elif _is_blocking(tool):
+            tools[i] = _in_thread(tool)
+    for sub_agent in getattr(agent, "sub_agents", None) or []:
+        offload_sync_tools(sub_agent)
+
+
+def get_runner(agent):
+    """Returns (and caches) an in-memory ADK runner for the given agent."""
+    with _runners_lock:
+        runner = _runners.get(agent.name)
+        # A run that looked its agent up before a reload keeps the old object
+        if runner is None or runner.agent is not agent:
+            from google.adk.runners import InMemoryRunner
+            offload_sync_tools(agent)
+            runner = InMemoryRunner(agent=agent, app_name=APP_NAME, plugins=get_plugins())
+            _runners[agent.name] = runner
+        return runner
+
+
+def reset_runners(swap: Optional[Callable[[], None]] = None) -> None:
+    """
+    Drops cached runners so the next run picks up reloaded agent objects.
+
+    `swap` (installing the new agent tree) runs under the same lock as
+    runner creation, so no runner is built from a half-swapped tree.
+    """
+    with _runners_lock:
+        if swap is not None:
+            swap()
+        _runners.clear()
+
+
+def _text_of(content) -> str:
+    """Joins the text parts of an ADK/GenAI content object."""
+    if content is None or not content.parts:
+        return ""
+    return "".join(part.text for part in content.parts if getattr(part, "text", None))
+
+
+async def stream_agent_events(
+    agent,
+    prompt: str,
+    parameters: Optional[Dict[str, Any]] = None,
+    user_id: str = "api",
+    streaming: bool = True,
+    trace: Optional[Trace] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Runs an agent and yields normalized events as they happen.
+
+    Event types:
+        delta       -> {"agent", "text"} incremental model output
+        delegation  -> {"from", "to"} control moved to another agent
+        tool_start  -> {"agent", "tool", "args"}
+        tool_end    -> {"agent", "tool", "response"}
+        final       -> {"agent", "text", "trace_id"} final answer of the run
+
+    Args:
+        agent: ADK agent object to run.
+        prompt: User message.
+        parameters: Optional values stored in the session state.
+        user_id: Session owner id.
+        streaming: Request token-level (SSE) streaming from the model.
+        trace: Trace to record the span tree into (a new one is created if omitted).
+    """
+    from google.genai import types
+    from google.adk.agents.run_config import RunConfig, StreamingMode
+
+    runner = get_runner(agent)
+    session = await runner.session_service.create_session(
+        app_name=APP_NAME,
+        user_id=user_id,
+        session_id=uuid.uuid4().hex,
+        state=dict(parameters or {})
+    )
+    run_config = RunConfig(
+        streaming_mode=StreamingMode.SSE if streaming else StreamingMode.NONE
+    )
+    message = types.Content(role="user", parts=[types.Part(text=prompt)])
+
+    current_agent = agent.name
+    streamed_partial = False
+    final_text = ""
+    if trace is None:
+        trace = Trace(f"run {agent.name}", **{"agent.name": agent.name})
+    error = None
+
+    try:
+        with trace.activate():
+            async for event in runner.run_async(
+                user_id=user_id,
+                session_id=session.id,
+                new_message=message,
+                run_config=run_config
+            ):
+                author = event.author
+                if author and author != "user" and author != current_agent:
+                    yield {"type": "delegation", "from": current_agent, "to": author}
+                    current_agent = author
+
+                if event.partial:
+                    text = _text_of(event.content)
+                    if text:
+                        streamed_partial = True
+                        yield {"type": "delta", "agent": author, "text": text}
+                    continue
+
+                for call in event.get_function_calls():
+                    yield {
+                        "type": "tool_start",
+                        "agent": author,
+                        "tool": call.name,
+                        "args": dict(call.args or {})
+                    }
+                for result in event.get_function_responses():
+                    yield {
+                        "type": "tool_end",
+                        "agent": author,
+                        "tool": result.name,
+                        "response": result.response
+                    }
+
+                text = _text_of(event.content)
+                if text and not streamed_partial:
+                    # Model returned the whole turn at once, emit it as one delta
+                    yield {"type": "delta", "agent": author, "text": text}
+                streamed_partial = False
+
+                if event.is_final_response() and text:
+                    final_text = text
+
+            yield {
+                "type": "final",
+                "agent": current_agent,
+                "text": final_text,
+                "trace_id": trace.trace_id
+            }
+    except Exception as e:
+        error = str(e)
+        raise
+    finally:
+        trace.finish(error=error)
+        export_trace(trace)
+        try:
+            await runner.session_service.delete_session(
+                app_name=APP_NAME, user_id=user_id, session_id=session.id
+            )
+        except Exception as e:
+            logger.debug(f"Could not delete session {session.id}: {e}")
+
+
+async def run_agent(
+    agent,
+    prompt: str,
+    parameters: Optional[Dict[str, Any]] = None,
+    user_id: str = "api",
+    include_trace: bool = False
+) -> Dict[str, Any]:
+    """
+    Runs an agent to completion on the event loop; only its synchronous
+    tools run in worker threads (see offload_sync_tools).
+
+    Returns:
+        Dict with 'response', 'agent_used', 'delegation_chain', 'tools_used',
+        'trace_id' and, if include_trace, the OTLP/JSON 'trace'.
+    """
+    trace = Trace(f"run {agent.name}", **{"agent.name": agent.name})
+    delegation_chain = [agent.name]
+    tools_used = []
+    response_text = ""
+    last_agent = agent.name
+
+    async for event in stream_agent_events(
+        agent, prompt, parameters, user_id=user_id, streaming=False, trace=trace
+    ):
+        if event["type"] == "delegation":
+            delegation_chain.append(event["to"])
+        elif event["type"] == "tool_start" and event["tool"] not in tools_used:
+            tools_used.append(event["tool"])
+        elif event["type"] == "final":
+            response_text = event["text"]
+            last_agent = event["agent"]
+
+    result = {
+        "response": response_text,
+        "agent_used": last_agent,
+        "delegation_chain": delegation_chain,
+        "tools_used": tools_used,
+        "trace_id": trace.trace_id
+    }
+    if include_trace:
+        result["trace"] = trace.to_otlp()
+    return result
@@ -0,0 +1,106 @@
+"""
+Startup import-time report.
+
+Imports a module in a fresh interpreter with `-X importtime` and
+summarizes where cold-start time goes, grouped by top-level package.
+
+Usage:
+    python -m agents.startup_report                 # agents.agent
+    python -m agents.startup_report agents.api --top 30
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+import subprocess
+from pathlib import Path
+from typing import Dict, Any, List
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure_imports(target: str = "agents.agent") -> Dict[str, Any]:
+    """
+    Imports `target` in a subprocess with -X importtime.
+
+    Returns:
+        Dict with 'wall_time', 'modules' [(module, self_us, cumulative_us, depth)]
+        and 'returncode'.
+    """
+    project_root = str(Path(__file__).resolve().parent.parent)
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [project_root, env.get("PYTHONPATH")]))
+
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=project_root,
+        env=env,
+        capture_output=True,
+        text=True
+    )
+    wall_time = time.perf_counter() - start
+
+    modules = []
+    for line in proc.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            modules.append((module, int(self_us), int(cumulative_us), len(indent) // 2))
+
+    return {
+        "wall_time": wall_time,
+        "modules": modules,
+        "returncode": proc.returncode,
+        "stderr": proc.stderr if proc.returncode else ""
+    }
+
+
+def summarize(modules: List[tuple], top: int = 20) -> Dict[str, Any]:
+    """Groups self time by top-level package and finds the slowest imports."""
+    by_package: Dict[str, int] = {}
+    for module, self_us, _, _ in modules:
+        package = module.split(".")[0]
+        by_package[package] = by_package.get(package, 0) + self_us
+
+    return {
+        "total_us": sum(self_us for _, self_us, _, _ in modules),
+        "module_count": len(modules),
+        "packages": sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:top],
+        "slowest": sorted(modules, key=lambda item: item[2], reverse=True)[:top],
+    }
+
+
+def print_report(target: str, result: Dict[str, Any], top: int = 20) -> None:
+    summary = summarize(result["modules"], top)
+
+    print("\n" + "=" * 60)
+    print(f"STARTUP IMPORT REPORT: {target}")
+    print("=" * 60)
+    if result["returncode"]:
+        print(f"\n❌ Import failed (exit {result['returncode']}):")
+        print(result["stderr"].strip().splitlines()[-1] if result["stderr"].strip() else "")
+    print(f"\nProcess wall time: {result['wall_time']:.2f}s")
+    print(f"Import time: {summary['total_us'] / 1e6:.2f}s across {summary['module_count']} modules")
+
+    print("\nBy package (self time):")
+    for package, self_us in summary["packages"]:
+        print(f"  {self_us / 1000:9.1f} ms  {package}")
+
+    print("\nSlowest imports (cumulative):")
+    for module, _, cumulative_us, _ in summary["slowest"]:
+        print(f"  {cumulative_us / 1000:9.1f} ms  {module}")
+    print("=" * 60 + "\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report import-time cost of agent startup")
+    parser.add_argument("target", nargs="?", default="agents.agent", help="Module to import")
+    parser.add_argument("--top", type=int, default=20, help="Rows per section")
+    args = parser.parse_args()
+
+    result = measure_imports(args.target)
+    print_report(args.target, result, args.top)
+    sys.exit(1 if result["returncode"] else 0)
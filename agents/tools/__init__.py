@@ -6,17 +6,45 @@ to perform real-world actions like running commands, deploying apps,
 scaffolding projects, and managing design assets.
 """
 
-from .command_tools import command_runner
-from .deploy_tools import request_deploy_approval, vercel_deploy_trigger
-from .repo_tools import read_files, write_files, search_files, write_files_tool
-from .scaffold_tools import next_scaffolder, auth_module_generator
-from .design_tools import design_tokens_sync, brand_library_lookup
-from .image_generation_tools import generate_image, edit_image
-from .video_generation_tools import generate_video, image_to_video
-from .audio_generation_tools import text_to_speech, generate_music, generate_sound_effects
-from .utility_tools import sleep_tool
-from .web_tools import scrape_url_tool, youtube_transcript_tool
-from .system_tools import system_stats_tool
+import importlib
+
+# Tool name -> submodule. Submodules are imported on first attribute access,
+# so importing one tool (as the YAML `tools:` references do) doesn't load
+# every tool module and its SDK dependencies.
+_TOOL_MODULES = {
+    'command_runner': 'command_tools',
+    'request_deploy_approval': 'deploy_tools',
+    'vercel_deploy_trigger': 'deploy_tools',
+    'read_files': 'repo_tools',
+    'write_files': 'repo_tools',
+    'write_files_tool': 'repo_tools',
+    'search_files': 'repo_tools',
+    'next_scaffolder': 'scaffold_tools',
+    'auth_module_generator': 'scaffold_tools',
+    'design_tokens_sync': 'design_tools',
+    'brand_library_lookup': 'design_tools',
+    'generate_image': 'image_generation_tools',
+    'edit_image': 'image_generation_tools',
+    'generate_video': 'video_generation_tools',
+    'image_to_video': 'video_generation_tools',
+    'text_to_speech': 'audio_generation_tools',
+    'generate_music': 'audio_generation_tools',
+    'generate_sound_effects': 'audio_generation_tools',
+    'sleep_tool': 'utility_tools',
+    'scrape_url_tool': 'web_tools',
+    'youtube_transcript_tool': 'web_tools',
+    'system_stats_tool': 'system_tools',
+}
+
+
+def __getattr__(name):
+    module_name = _TOOL_MODULES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
 
 __all__ = [
     'command_runner',
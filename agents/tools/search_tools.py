@@ -1,5 +1,4 @@
 import os
-from googleapiclient.discovery import build
 from dotenv import load_dotenv
 
 # --- INICIO DE LA CORRECCIÓN ---
@@ -17,10 +16,13 @@ except Exception as e:
     print(f"Error al intentar cargar el archivo .env: {e}")
 # --- FIN DE LA CORRECCIÓN ---
 
-try:
-    from duckduckgo_search import DDGS
-except ImportError:
-    DDGS = None
+def _load_ddgs():
+    """Imports DuckDuckGo search on first use (keeps it out of agent startup)."""
+    try:
+        from duckduckgo_search import DDGS
+    except ImportError:
+        DDGS = None
+    return DDGS
 
 def google_search(query: str) -> str:
     """
@@ -35,6 +37,7 @@ def google_search(query: str) -> str:
     if api_key and cx:
         print("Credenciales de Google encontradas. Usando Google Custom Search...")
         try:
+            from googleapiclient.discovery import build
             service = build("customsearch", "v1", developerKey=api_key)
             res = service.cse().list(q=query, cx=cx, num=5).execute()
 
@@ -49,6 +52,7 @@ def google_search(query: str) -> str:
     else:
         print("ADVERTENCIA: No se encontraron las credenciales de Google (GOOGLE_API_KEY o GOOGLE_CSE_ID).")
 
+    DDGS = _load_ddgs()
     if DDGS:
         try:
             print(f"Usando DuckDuckGo para: {query}")
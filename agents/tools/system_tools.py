@@ -2,7 +2,6 @@
 """
 System monitoring and information tools.
 """
-import psutil
 import platform
 import os
 from typing import Dict, Any
@@ -16,6 +15,8 @@ def get_system_stats() -> Dict[str, Any]:
         Dict con uso de CPU, RAM, Disco e Info del SO.
     """
     try:
+        import psutil
+
         # CPU
         cpu_percent = psutil.cpu_percent(interval=1)
         
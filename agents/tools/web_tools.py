@@ -2,8 +2,6 @@
 """
 Web scraping and content extraction tools.
 """
-import requests
-from bs4 import BeautifulSoup
 from typing import Dict, Any, Optional
 from google.adk.tools import FunctionTool
 
@@ -19,6 +17,10 @@ def scrape_url(url: str, max_length: int = 5000) -> Dict[str, Any]:
         Dict con el título, texto y metadata.
     """
     try:
+        # Imported on first use so agent startup doesn't pay for them
+        import requests
+        from bs4 import BeautifulSoup
+
         headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
@@ -0,0 +1,200 @@
+"""
+Per-request span trees for the agent delegation chain.
+
+Each agent run gets a Trace (root agent -> director -> subagent -> tool
+call) filled in by callbacks.tracing_callbacks.TracingPlugin. Traces can
+be exported as OTLP/JSON to a local file or an OTLP/HTTP collector and
+returned in the API response metadata.
+"""
+
+import os
+import json
+import time
+import asyncio
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, Optional, List
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "purrpur-agents"
+
+# "file:/path/traces.jsonl" appends one OTLP document per line,
+# "http://collector:4318/v1/traces" POSTs it; empty disables export
+TRACE_EXPORT = os.getenv("PURRPUR_TRACE_EXPORT", "")
+
+_current_trace: ContextVar[Optional["Trace"]] = ContextVar("purrpur_trace", default=None)
+_pending_exports = set()
+# Serializes appends from the writer threads so JSONL lines never interleave
+_file_lock = threading.Lock()
+
+
+def current_trace() -> Optional["Trace"]:
+    """Returns the trace of the agent run executing in this context, if any."""
+    return _current_trace.get()
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class Span:
+    """A timed operation inside a trace (agent turn, model call or tool call)."""
+
+    def __init__(self, trace_id: str, name: str, parent_id: Optional[str] = None, **attributes):
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = {k: v for k, v in attributes.items() if v is not None}
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.error: Optional[str] = None
+
+    def end(self, error: Optional[str] = None, **attributes) -> None:
+        if self.end_ns is not None:
+            return
+        self.attributes.update({k: v for k, v in attributes.items() if v is not None})
+        self.error = error
+        self.end_ns = time.time_ns()
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or time.time_ns()),
+            "attributes": [
+                {"key": key, "value": _otlp_value(value)} for key, value in self.attributes.items()
+            ],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+class Trace:
+    """
+    Span tree of one agent run.
+
+    Agent spans form a stack (a delegated agent runs inside its parent's
+    turn); model and tool spans hang off the currently open span of the
+    agent that made the call.
+    """
+
+    def __init__(self, name: str, **attributes):
+        self.trace_id = os.urandom(16).hex()
+        self.spans: List[Span] = []
+        self.root = self.start_span(name, parent_id=None, **attributes)
+        self._agent_stack: List[Span] = []
+        # Model/tool spans awaiting their after-callback, keyed by the plugin
+        self.open_spans: Dict[tuple, Span] = {}
+
+    def start_span(self, name: str, parent_id: Optional[str] = None, **attributes) -> Span:
+        span = Span(self.trace_id, name, parent_id, **attributes)
+        self.spans.append(span)
+        return span
+
+    def start_agent(self, agent_name: str) -> Span:
+        parent = self._agent_stack[-1] if self._agent_stack else self.root
+        span = self.start_span(f"agent {agent_name}", parent.span_id, **{"agent.name": agent_name})
+        self._agent_stack.append(span)
+        return span
+
+    def end_agent(self, agent_name: str) -> None:
+        for i in range(len(self._agent_stack) - 1, -1, -1):
+            span = self._agent_stack[i]
+            if span.attributes.get("agent.name") == agent_name:
+                span.end()
+                del self._agent_stack[i]
+                return
+
+    def agent_span(self, agent_name: str) -> Span:
+        """Innermost open span of an agent (falls back to the root span)."""
+        for span in reversed(self._agent_stack):
+            if span.attributes.get("agent.name") == agent_name:
+                return span
+        return self.root
+
+    @contextmanager
+    def activate(self):
+        token = _current_trace.set(self)
+        try:
+            yield self
+        finally:
+            _current_trace.reset(token)
+
+    def finish(self, error: Optional[str] = None) -> None:
+        for span in self.spans:
+            if span is not self.root:
+                span.end()
+        self.root.end(error=error)
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """Returns the trace as an OTLP/JSON ExportTraceServiceRequest document."""
+        return {
+            "resourceSpans": [{
+                "resource": {
+                    "attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]
+                },
+                "scopeSpans": [{
+                    "scope": {"name": "agents.tracing"},
+                    "spans": [span.to_otlp() for span in self.spans],
+                }],
+            }]
+        }
+
+
+def _write_file(path: str, document: Dict[str, Any]) -> None:
+    line = json.dumps(document, default=str) + "\n"
+    with _file_lock, open(path, "a", encoding="utf-8") as f:
+        f.write(line)
+
+
+async def _append(path: str, document: Dict[str, Any]) -> None:
+    try:
+        await asyncio.to_thread(_write_file, path, document)
+    except Exception as e:
+        logger.warning(f"⚠️ Export de trace a {path} falló: {e}")
+
+
+async def _post(url: str, document: Dict[str, Any]) -> None:
+    import httpx
+    try:
+        async with httpx.AsyncClient(timeout=5) as client:
+            r = await client.post(url, json=document)
+            r.raise_for_status()
+    except Exception as e:
+        logger.warning(f"⚠️ Export de trace a {url} falló: {e}")
+
+
+def export_trace(trace: Trace, target: str = TRACE_EXPORT) -> None:
+    """Exports a finished trace to the configured target without blocking the request."""
+    if not target:
+        return
+    document = trace.to_otlp()
+    try:
+        if target.startswith("file:"):
+            # Disk I/O runs in a worker thread, off the request path
+            export = _append(target[len("file:"):], document)
+        elif target.startswith(("http://", "https://")):
+            export = _post(target, document)
+        else:
+            logger.warning(f"⚠️ PURRPUR_TRACE_EXPORT no reconocido: {target}")
+            return
+        task = asyncio.get_running_loop().create_task(export)
+        _pending_exports.add(task)
+        task.add_done_callback(_pending_exports.discard)
+    except Exception as e:
+        logger.warning(f"⚠️ Export de trace falló: {e}")
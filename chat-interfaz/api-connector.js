@@ -133,14 +133,19 @@ async function sendMessageToAPI() {
     // Limpiar input
     input.value = '';
     
+    // Burbuja de respuesta en curso (se crea al empezar el stream)
+    let messageDiv = null;
+    let text = '';
+    
     // Enviar a la API
     try {
         logToConsole('info', `> Enviando mensaje a API: "${message.substring(0, 50)}..."`);
         
-        const response = await fetch(`${API_URL}/generate`, {
+        const response = await fetch(`${API_URL}/generate/stream`, {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
+                'Accept': 'text/event-stream'
             },
             body: JSON.stringify({
                 prompt: message,
@@ -148,25 +153,74 @@ async function sendMessageToAPI() {
             })
         });
         
-        if (response.ok) {
-            const data = await response.json();
-            
-            // Agregar respuesta del agente
-            addMessage('agent', data.response || 'No response received', {
-                cost: '$0.0000', // La API no devuelve costo actualmente
-                tokens: 0 // La API no devuelve tokens actualmente
-            });
-            
-            logToConsole('success', `> ✓ Respuesta recibida de ${data.agent_used} (${data.execution_time.toFixed(2)}s)`);
-            
-            // Actualizar estadísticas (usar valores estimados)
-            updateStats(0.001, 100); // Valores estimados para demostración
-        } else {
+        if (!response.ok) {
             throw new Error(`HTTP ${response.status}`);
         }
+        
+        // Renderizar la respuesta progresivamente a medida que llegan eventos SSE
+        messageDiv = addMessage('agent', '');
+        const contentEl = messageDiv.querySelector('.message-content');
+        
+        await readEventStream(response, (type, data) => {
+            if (type === 'delta') {
+                text += data.text;
+                contentEl.innerHTML = text.replace(/\n/g, '<br>');
+                document.getElementById('chat-messages').scrollTop = Number.MAX_SAFE_INTEGER;
+            } else if (type === 'delegation') {
+                logToConsole('info', `> ↪ ${data.from} → ${data.to}`);
+            } else if (type === 'tool_start') {
+                logToConsole('info', `> ⚙ ${data.agent}: ${data.tool}...`);
+            } else if (type === 'tool_end') {
+                logToConsole('success', `> ✓ ${data.agent}: ${data.tool}`);
+            } else if (type === 'final') {
+                if (data.text) {
+                    contentEl.innerHTML = data.text.replace(/\n/g, '<br>');
+                }
+                logToConsole('success', `> ✓ Respuesta recibida de ${data.agent} (${data.execution_time.toFixed(2)}s)`);
+            } else if (type === 'error') {
+                throw new Error(data.detail);
+            }
+        });
+        
+        // Actualizar estadísticas (usar valores estimados)
+        updateStats(0.001, 100); // Valores estimados para demostración
     } catch (error) {
         logToConsole('error', `> ✗ Error enviando mensaje: ${error.message}`);
-        addMessage('agent', `Lo siento, hubo un error al procesar tu mensaje: ${error.message}`);
+        const errorText = `Lo siento, hubo un error al procesar tu mensaje: ${error.message}`;
+        if (messageDiv) {
+            // El stream falló a mitad: el error va en la misma burbuja, tras lo recibido
+            const shown = text ? `${text}\n\n${errorText}` : errorText;
+            messageDiv.querySelector('.message-content').innerHTML = shown.replace(/\n/g, '<br>');
+        } else {
+            addMessage('agent', errorText);
+        }
+    }
+}
+
+// Leer un stream Server-Sent Events de una respuesta fetch (POST no soporta EventSource)
+async function readEventStream(response, onEvent) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const frame = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            
+            let type = 'message';
+            let data = '';
+            frame.split('\n').forEach(line => {
+                if (line.startsWith('event: ')) type = line.slice(7);
+                else if (line.startsWith('data: ')) data += line.slice(6);
+            });
+            if (data) onEvent(type, JSON.parse(data));
+        }
     }
 }
 
@@ -218,6 +272,7 @@ function addMessage(type, content, metadata = {}) {
     
     messagesDiv.appendChild(messageDiv);
     messagesDiv.scrollTop = messagesDiv.scrollHeight;
+    return messageDiv;
 }
 
 // Actualizar estadísticas